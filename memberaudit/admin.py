@@ -217,9 +217,11 @@ class CharacterAdmin(admin.ModelAdmin):
     delete_characters.short_description = "Delete selected characters"
 
     def update_characters(self, request, queryset):
-        for obj in queryset:
-            tasks.update_character.delay(character_pk=obj.pk, force_update=True)
-            self.message_user(request, f"Started updating character: {obj}. ")
+        character_pks = list(queryset.values_list("pk", flat=True))
+        tasks.update_characters.delay(character_pks=character_pks, force_update=True)
+        self.message_user(
+            request, f"Started updating {len(character_pks)} character(s). "
+        )
 
     update_characters.short_description = "Update selected characters from EVE server"
 
@@ -440,9 +442,9 @@ class SkillSetAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         obj.user = request.user
         super().save_model(request, obj, form, change)
-        tasks.update_characters_skill_checks.delay(force_update=True)
 
-    def delete_model(self, request, obj):
-        obj.user = request.user
-        super().delete_model(request, obj)
-        tasks.update_characters_skill_checks.delay(force_update=True)
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        tasks.update_characters_skill_checks.delay(
+            force_update=True, skill_set_ids=[form.instance.pk]
+        )
@@ -38,16 +38,55 @@ MEMBERAUDIT_LOG_UPDATE_STATS = clean_setting("MEMBERAUDIT_LOG_UPDATE_STATS", Fal
 # Maximum amount of mails fetched from ESI for each character
 MEMBERAUDIT_MAX_MAILS = clean_setting("MEMBERAUDIT_MAX_MAILS", 250)
 
-# Technical parameter defining the maximum number of asset items processed in each pass
-# when updating character assets.
-# A higher value reduces duration, but also increases task queue congestion
-MEMBERAUDIT_TASKS_MAX_ASSETS_PER_PASS = clean_setting(
-    "MEMBERAUDIT_TASKS_MAX_ASSETS_PER_PASS", 2500
+# Hours between full syncs of the mail headers of a character
+# In between only new mails are fetched. 0 will always do full syncs.
+MEMBERAUDIT_MAIL_HEADERS_FULL_SYNC_HOURS = clean_setting(
+    "MEMBERAUDIT_MAIL_HEADERS_FULL_SYNC_HOURS", 24, min_value=0
+)
+
+# Maximum number of mail bodies fetched from ESI in one task
+MEMBERAUDIT_TASKS_MAX_MAIL_BODIES_PER_TASK = clean_setting(
+    "MEMBERAUDIT_TASKS_MAX_MAIL_BODIES_PER_TASK", 50, min_value=1
+)
+
+# Maximum number of contracts for which items or bids are fetched from ESI in one task
+MEMBERAUDIT_TASKS_MAX_CONTRACTS_PER_TASK = clean_setting(
+    "MEMBERAUDIT_TASKS_MAX_CONTRACTS_PER_TASK", 50, min_value=1
+)
+
+# When enabled, updates of characters are spread out evenly across the update window
+# of ring 1 instead of starting all at once. Each character has a stable time slot
+MEMBERAUDIT_TASKS_SPREAD_UPDATES = clean_setting(
+    "MEMBERAUDIT_TASKS_SPREAD_UPDATES", False
+)
+
+# Maximum number of section update tasks per second that are released
+# when updates are spread out
+MEMBERAUDIT_TASKS_SPREAD_RATE = clean_setting(
+    "MEMBERAUDIT_TASKS_SPREAD_RATE", 10, min_value=1
+)
+
+# Celery queue for tasks of the fast lane, i.e. the quick sections of ring 1
+# like location and online status. None uses Celery's default queue
+MEMBERAUDIT_TASKS_QUEUE_FAST = clean_setting(
+    "MEMBERAUDIT_TASKS_QUEUE_FAST", None, required_type=str
+)
+
+# Celery queue for tasks of the bulk lane, i.e. long running tasks like assets
+# and the fan-out of mail bodies and contract items. None uses Celery's default queue
+MEMBERAUDIT_TASKS_QUEUE_BULK = clean_setting(
+    "MEMBERAUDIT_TASKS_QUEUE_BULK", None, required_type=str
 )
 
 # Global timeout for tasks in seconds to reduce task accumulation during outages
 MEMBERAUDIT_TASKS_TIME_LIMIT = clean_setting("MEMBERAUDIT_TASKS_TIME_LIMIT", 7200)
 
+# Timeout for data sets staged between tasks in seconds, e.g. asset lists.
+# Must cover the time the tasks may wait in the queue
+MEMBERAUDIT_TASKS_STAGING_TIMEOUT = clean_setting(
+    "MEMBERAUDIT_TASKS_STAGING_TIMEOUT", 86400, min_value=1
+)
+
 # Character sections are updated on different schedules, called rings.
 # Ring 1 is the quickest, Ring 3 is the slowest
 # Settings define after how many minutes a section is considered stale
@@ -55,6 +94,13 @@ MEMBERAUDIT_UPDATE_STALE_RING_1 = clean_setting("MEMBERAUDIT_UPDATE_STALE_RING_1
 MEMBERAUDIT_UPDATE_STALE_RING_2 = clean_setting("MEMBERAUDIT_UPDATE_STALE_RING_2", 240)
 MEMBERAUDIT_UPDATE_STALE_RING_3 = clean_setting("MEMBERAUDIT_UPDATE_STALE_RING_3", 480)
 
+# Sections which content did not change are updated less often.
+# The time until a section is stale is doubled for every update without a change
+# up to this factor. 1 turns this off
+MEMBERAUDIT_UPDATE_BACKOFF_MAX_FACTOR = clean_setting(
+    "MEMBERAUDIT_UPDATE_BACKOFF_MAX_FACTOR", 4, min_value=1
+)
+
 # Actual value for considering staleness of a ring will be the above value
 # minus this offset. Required to avoid time synchronization issues.
 MEMBERAUDIT_UPDATE_STALE_OFFSET = clean_setting("MEMBERAUDIT_UPDATE_STALE_OFFSET", 5)
@@ -67,6 +113,39 @@ MEMBERAUDIT_DATA_RETENTION_LIMIT = clean_setting(
 ####################
 # Internal settings
 
+# Number of threads for concurrent ESI requests within one task,
+# e.g. when fetching mail bodies or contract items
+MEMBERAUDIT_TASKS_ESI_THREADS = clean_setting(
+    "MEMBERAUDIT_TASKS_ESI_THREADS", 4, min_value=1
+)
+
+# Interval in seconds for refreshing the ESI status shared by all workers
+MEMBERAUDIT_ESI_STATUS_REFRESH_INTERVAL = clean_setting(
+    "MEMBERAUDIT_ESI_STATUS_REFRESH_INTERVAL", 30, min_value=1
+)
+
+# Maximum number of tasks published to the broker at once
+# when starting tasks for many characters
+MEMBERAUDIT_TASKS_PUBLISH_BATCH_SIZE = clean_setting(
+    "MEMBERAUDIT_TASKS_PUBLISH_BATCH_SIZE", 500, min_value=1
+)
+
+# Maximum number of characters for which skill sets are checked in one task
+MEMBERAUDIT_TASKS_MAX_CHARACTERS_PER_SKILL_CHECK = clean_setting(
+    "MEMBERAUDIT_TASKS_MAX_CHARACTERS_PER_SKILL_CHECK", 200, min_value=1
+)
+
+# Timeout in seconds for remembering which skills of a character changed
+# until it's skill sets are checked next. All skill sets are checked after that.
+MEMBERAUDIT_CHANGED_SKILL_TYPES_CACHE_TIMEOUT = clean_setting(
+    "MEMBERAUDIT_CHANGED_SKILL_TYPES_CACHE_TIMEOUT", 3600 * 24
+)
+
+# Timeout in seconds for caching IDs of known locations within a process
+MEMBERAUDIT_LOCATION_IDS_CACHE_TIMEOUT = clean_setting(
+    "MEMBERAUDIT_LOCATION_IDS_CACHE_TIMEOUT", 3600
+)
+
 # Timeout for caching objects when running tasks in seconds
 MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT = clean_setting(
     "MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT", 600
@@ -9,4 +9,6 @@ EVE_CATEGORY_ID_DRONE = 18
 EVE_CATEGORY_ID_IMPLANT = 20
 EVE_CATEGORY_ID_FIGHTER = 87
 EVE_CATEGORY_ID_STRUCTURE = 65
+EVE_TYPE_ID_CORPORATION = 2
 EVE_TYPE_ID_SOLAR_SYSTEM = 5
+EVE_TYPE_ID_ALLIANCE = 16159
@@ -0,0 +1,72 @@
+"""Building of asset trees from flat asset lists as returned by ESI"""
+from collections import defaultdict
+from typing import List, NamedTuple, Set
+
+
+class AssetTree(NamedTuple):
+    """Assets of a flat asset list ordered into the levels of a tree
+
+    The first level contains all root assets, i.e. assets located directly
+    at a location. All other levels contain the children of the assets
+    from the previous level.
+    """
+
+    levels: List[List[dict]]
+    orphans: Set[int]
+    cycles: Set[int]
+
+    @property
+    def assets_count(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+
+def build_asset_tree(asset_list: list, location_ids: set) -> AssetTree:
+    """Orders a flat asset list from ESI into the levels of an asset tree
+
+    Args:
+        asset_list: flat asset list from ESI
+        location_ids: IDs of all known locations
+
+    Returns:
+        the asset tree, which also reports IDs of assets which could not be added
+        because their parent does not exist (orphans)
+        or because their parents form a cycle (cycles)
+    """
+    assets_flat = {int(x["item_id"]): x for x in asset_list}
+    children_map = defaultdict(list)
+    root_ids = list()
+    for item_id, item in assets_flat.items():
+        location_id = item.get("location_id")
+        if location_id and location_id in location_ids:
+            root_ids.append(item_id)
+        elif location_id in assets_flat:
+            children_map[location_id].append(item_id)
+
+    levels = list()
+    current_ids = root_ids
+    added_ids = set()
+    while current_ids:
+        levels.append([assets_flat[item_id] for item_id in current_ids])
+        added_ids.update(current_ids)
+        current_ids = [
+            child_id
+            for item_id in current_ids
+            for child_id in children_map[item_id]
+            if child_id not in added_ids
+        ]
+
+    orphans = set()
+    cycles = set()
+    for item_id in assets_flat.keys() - added_ids:
+        chain_ids = set()
+        parent_id = item_id
+        while parent_id in assets_flat and parent_id not in chain_ids:
+            chain_ids.add(parent_id)
+            parent_id = assets_flat[parent_id].get("location_id")
+
+        if parent_id in chain_ids:
+            cycles.add(item_id)
+        else:
+            orphans.add(item_id)
+
+    return AssetTree(levels=levels, orphans=orphans, cycles=cycles)
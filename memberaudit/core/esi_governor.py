@@ -0,0 +1,125 @@
+"""Health of ESI shared by all workers
+
+The ESI status and the remaining error budget are kept in the cache,
+so workers can check the health of ESI without making a request.
+The ESI status is refreshed by one worker at most once per interval
+and all workers pause together once the error budget falls below the threshold.
+"""
+import random
+import time
+from typing import Optional
+
+from django.core.cache import cache
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.esi import EsiErrorLimitExceeded, EsiOffline, fetch_esi_status
+from app_utils.logging import LoggerAddTag
+
+from .. import __title__
+from ..app_settings import (
+    MEMBERAUDIT_ESI_ERROR_LIMIT_THRESHOLD,
+    MEMBERAUDIT_ESI_STATUS_REFRESH_INTERVAL,
+)
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+STATUS_KEY = "MEMBERAUDIT_ESI_GOVERNOR_STATUS"
+REFRESH_LOCK_KEY = "MEMBERAUDIT_ESI_GOVERNOR_REFRESH_LOCK"
+ERROR_LIMIT_KEY = "MEMBERAUDIT_ESI_GOVERNOR_ERROR_LIMIT"
+PAUSED_UNTIL_KEY = "MEMBERAUDIT_ESI_GOVERNOR_PAUSED_UNTIL"
+
+# last known status is kept longer than the refresh interval,
+# so other workers can use it while one worker is refreshing
+STATUS_TIMEOUT = MEMBERAUDIT_ESI_STATUS_REFRESH_INTERVAL * 10
+
+# max seconds added to the pause, so paused workers do not all resume at once
+MAX_JITTER = 20
+
+
+def raise_for_status() -> None:
+    """Raises an exception if ESI is offline or all workers are paused
+    because the error limit threshold has been reached
+
+    Exceptions:
+    - EsiOffline: ESI is offline
+    - EsiErrorLimitExceeded: Error limit threshold has been reached
+    """
+    raise_if_paused()
+    status = cache.get(STATUS_KEY)
+    if (
+        not status
+        or time.time() - status["checked_at"] >= MEMBERAUDIT_ESI_STATUS_REFRESH_INTERVAL
+    ) and cache.add(
+        REFRESH_LOCK_KEY, True, timeout=MEMBERAUDIT_ESI_STATUS_REFRESH_INTERVAL
+    ):
+        status = _refresh_status()
+        raise_if_paused()
+
+    if status and not status["is_online"]:
+        raise EsiOffline()
+
+
+def _refresh_status() -> dict:
+    """Fetches the ESI status and shares it with all workers"""
+    esi_status = fetch_esi_status()
+    status = {"is_online": esi_status.is_online, "checked_at": time.time()}
+    cache.set(STATUS_KEY, status, timeout=STATUS_TIMEOUT)
+    if esi_status.error_limit_remain is not None:
+        record_error_limit(esi_status.error_limit_remain, esi_status.error_limit_reset)
+    return status
+
+
+def record_response(response) -> None:
+    """Records the error budget reported in the headers of an ESI response"""
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return
+    try:
+        remain = int(headers["X-Esi-Error-Limit-Remain"])
+        reset = int(headers["X-Esi-Error-Limit-Reset"])
+    except (KeyError, TypeError, ValueError):
+        return
+    record_error_limit(remain, reset)
+
+
+def record_error_limit(remain: int, reset: int) -> None:
+    """Records the error budget and pauses all workers
+    if it is below the threshold
+    """
+    cache.set(
+        ERROR_LIMIT_KEY,
+        {"remain": remain, "reset": reset, "recorded_at": time.time()},
+        timeout=max(reset, 1),
+    )
+    if remain <= MEMBERAUDIT_ESI_ERROR_LIMIT_THRESHOLD:
+        paused_until = time.time() + reset
+        if (cache.get(PAUSED_UNTIL_KEY) or 0) < paused_until:
+            cache.set(PAUSED_UNTIL_KEY, paused_until, timeout=max(reset, 1))
+            logger.warning(
+                "ESI error limit threshold reached with %s errors remaining. "
+                "Pausing all ESI tasks for %s seconds",
+                remain,
+                reset,
+            )
+
+
+def raise_if_paused() -> None:
+    """Raises EsiErrorLimitExceeded if all workers are paused"""
+    paused_until = cache.get(PAUSED_UNTIL_KEY)
+    if paused_until:
+        remaining_seconds = paused_until - time.time()
+        if remaining_seconds > 0:
+            raise EsiErrorLimitExceeded(
+                retry_in=remaining_seconds + random.uniform(1, MAX_JITTER)
+            )
+
+
+def error_limit_remain() -> Optional[int]:
+    """Returns the last known remaining error budget or None if unknown"""
+    error_limit = cache.get(ERROR_LIMIT_KEY)
+    return error_limit["remain"] if error_limit else None
+
+
+def clear() -> None:
+    """Clears the shared state, e.g. to resume work immediately"""
+    cache.delete_many([STATUS_KEY, REFRESH_LOCK_KEY, ERROR_LIMIT_KEY, PAUSED_UNTIL_KEY])
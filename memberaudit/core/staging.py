@@ -0,0 +1,51 @@
+"""Staging of large data sets which are shared between tasks
+
+Large data sets like asset lists are written once to the cache and tasks only
+pass on the staging key instead of the data itself.
+This keeps broker messages small regardless of the size of the data set.
+"""
+import json
+import zlib
+
+from django.core.cache import cache
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from .. import __title__
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+STAGING_KEY_PREFIX = "MEMBERAUDIT_STAGING"
+
+
+class StagedDataNotFound(Exception):
+    """Staged data does not exist, e.g. because it has timed out"""
+
+
+def make_staging_key(character_pk: int, section: str, run_id: str) -> str:
+    """Returns the staging key for a character section and a update run"""
+    return f"{STAGING_KEY_PREFIX}_{character_pk}_{section}_{run_id}"
+
+
+def stage_list(key: str, data: list, timeout: int) -> None:
+    """Stores a list compressed under given key for timeout seconds"""
+    payload = zlib.compress(json.dumps(data).encode("utf-8"))
+    cache.set(key, payload, timeout=timeout)
+    logger.debug("%s: Staged %d items with %d bytes", key, len(data), len(payload))
+
+
+def fetch_staged_list(key: str) -> list:
+    """Returns the list stored under given key
+
+    Raises StagedDataNotFound if there is no data for this key
+    """
+    payload = cache.get(key)
+    if payload is None:
+        raise StagedDataNotFound(f"No staged data found for key: {key}")
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def delete_staged_list(key: str) -> None:
+    """Deletes the list stored under given key"""
+    cache.delete(key)
@@ -0,0 +1,70 @@
+"""Lanes for separating update tasks by how latency sensitive they are
+
+Each lane has its own priority and can be routed to its own Celery queue,
+so long running tasks like assets can not starve quick sections like location.
+"""
+from celery import current_app
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from .. import __title__
+from ..app_settings import MEMBERAUDIT_TASKS_QUEUE_BULK, MEMBERAUDIT_TASKS_QUEUE_FAST
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+# quick and latency sensitive tasks, e.g. sections of ring 1
+LANE_FAST = "fast"
+# all other tasks
+LANE_DEFAULT = "default"
+# long running tasks and fan-outs, e.g. assets and mail bodies
+LANE_BULK = "bulk"
+
+LANE_PRIORITIES = {LANE_FAST: 4, LANE_DEFAULT: 6, LANE_BULK: 8}
+
+LANE_QUEUES = {
+    LANE_FAST: MEMBERAUDIT_TASKS_QUEUE_FAST,
+    LANE_DEFAULT: None,
+    LANE_BULK: MEMBERAUDIT_TASKS_QUEUE_BULK,
+}
+
+
+def lane_options(lane: str) -> dict:
+    """Returns the options for starting a task in the given lane,
+    e.g. for `apply_async()`
+    """
+    options = {"priority": LANE_PRIORITIES[lane]}
+    queue = LANE_QUEUES[lane]
+    if queue:
+        options["queue"] = queue
+        options["routing_key"] = queue
+    return options
+
+
+def lane_queue_name(lane: str) -> str:
+    """Returns the name of the queue the given lane is routed to"""
+    return LANE_QUEUES[lane] or current_app.conf.task_default_queue
+
+
+def queue_depths() -> dict:
+    """Returns the number of waiting tasks in the queue of each lane
+
+    Lanes sharing a queue report the same number.
+    The number is None if it could not be determined.
+    """
+    depths = dict()
+    queue_names = {lane: lane_queue_name(lane) for lane in LANE_PRIORITIES.keys()}
+    try:
+        with current_app.connection_for_read() as connection:
+            channel = connection.default_channel
+            for lane, queue_name in queue_names.items():
+                result = channel.queue_declare(queue=queue_name, passive=True)
+                depths[lane] = {"queue": queue_name, "depth": result.message_count}
+    except Exception:
+        logger.warning("Failed to determine queue depths", exc_info=True)
+        depths = {
+            lane: {"queue": queue_name, "depth": None}
+            for lane, queue_name in queue_names.items()
+        }
+
+    return depths
@@ -0,0 +1,76 @@
+"""Context of a character update, which is shared by all tasks of an update run
+
+The context holds invariants of a character, which are determined once
+at the start of an update run. Tasks receive the context as dict,
+so they no longer need to look up the ownership and token of the character.
+"""
+import threading
+from typing import NamedTuple, Optional
+
+from django.core.cache import cache
+
+AVOIDED_QUERIES_KEY = "MEMBERAUDIT_UPDATE_CONTEXT_AVOIDED_QUERIES"
+
+# queries for looking up the Eve character of a character
+# (character ownership, Eve character)
+QUERIES_PER_CHARACTER_LOOKUP = 2
+
+# queries needed for looking up a token by owner and scopes
+# (scopes, three token queries for scopes and validity, prefetch of token scopes)
+QUERIES_PER_TOKEN_LOOKUP = 5
+
+
+class CharacterUpdateContext(NamedTuple):
+    """Invariants of a character for an update run"""
+
+    character_pk: int
+    eve_character_id: int
+    character_name: str
+    user_id: int
+    token_pk: Optional[int] = None
+
+    def asdict(self) -> dict:
+        """Returns the context as dict, e.g. for passing it to a task"""
+        return dict(self._asdict())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CharacterUpdateContext":
+        return cls(**data)
+
+
+# avoided queries of the current process, which are not yet flushed to the cache
+_pending_avoided_queries = 0
+_pending_lock = threading.Lock()
+
+
+def record_avoided_queries(count: int) -> None:
+    """Adds count to the number of queries avoided by update contexts.
+
+    The count is only kept locally until flushed with flush_avoided_queries(),
+    so recording does not cost any cache round-trips.
+    """
+    global _pending_avoided_queries
+    with _pending_lock:
+        _pending_avoided_queries += count
+
+
+def flush_avoided_queries() -> None:
+    """Adds the locally recorded avoided queries to the count in the cache"""
+    global _pending_avoided_queries
+    with _pending_lock:
+        count = _pending_avoided_queries
+        _pending_avoided_queries = 0
+    if not count:
+        return
+    if not cache.add(AVOIDED_QUERIES_KEY, count, timeout=None):
+        try:
+            cache.incr(AVOIDED_QUERIES_KEY, count)
+        except ValueError:
+            cache.set(AVOIDED_QUERIES_KEY, count, timeout=None)
+
+
+def avoided_queries_count() -> int:
+    """Returns the number of queries avoided by update contexts so far,
+    which have been flushed to the cache
+    """
+    return cache.get(AVOIDED_QUERIES_KEY, 0)
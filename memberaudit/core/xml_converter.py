@@ -9,9 +9,25 @@ from allianceauth.services.hooks import get_extension_logger
 from app_utils.logging import LoggerAddTag
 
 from .. import __title__
+from ..constants import (
+    EVE_TYPE_ID_ALLIANCE,
+    EVE_TYPE_ID_CORPORATION,
+    EVE_TYPE_ID_SOLAR_SYSTEM,
+)
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
+# Version of the conversion. Must be increased whenever the generated HTML changes,
+# so HTML that has been stored with an older version is generated again.
+XML_CONVERTER_VERSION = 1
+
+# URL functions for showinfo links by type ID, which need the name of the linked entity
+_SHOWINFO_NAMED_URL_FUNCS = {
+    EVE_TYPE_ID_CORPORATION: dotlan.corporation_url,
+    EVE_TYPE_ID_SOLAR_SYSTEM: dotlan.solar_system_url,
+    EVE_TYPE_ID_ALLIANCE: dotlan.alliance_url,
+}
+
 
 _font_regex = re.compile(
     r'<font (?P<pre>.*?)(size="(?P<size>[0-9]{1,2})")? ?(color="#[0-9a-f]{2}(?P<color>[0-9a-f]{6})")?(?P<post>.*?)>'
@@ -38,7 +54,7 @@ def _font_replace(font_match) -> str:
     return f'<span {pre}style="{color_attr} {size_attr}"{post}>'
 
 
-def _link_replace(link_match) -> str:
+def _link_replace(link_match, names: dict = None) -> str:
     schema = link_match.group("schema")
     first_id = int(link_match.group("first_id"))
     second_id = link_match.group("second_id")
@@ -47,26 +63,49 @@ def _link_replace(link_match) -> str:
             second_id = int(second_id)
         if 1373 <= first_id <= 1386:  # Character
             return f'<a href="{evewho.character_url(second_id)}" target="_blank">'
-        elif first_id == 5:  # Solar System
-            system_name = EveEntity.objects.resolve_name(second_id)
-            return f'<a href="{dotlan.solar_system_url(system_name)}" target="_blank">'
-        elif first_id == 2:  # Corporation
-            corp_name = EveEntity.objects.resolve_name(second_id)
-            return f'<a href="{dotlan.corporation_url(corp_name)}" target="_blank">'
-        elif first_id == 16159:  # Alliance
-            alliance_name = EveEntity.objects.resolve_name(second_id)
-            return f'<a href="{dotlan.alliance_url(alliance_name)}" target="_blank">'
+        elif first_id in _SHOWINFO_NAMED_URL_FUNCS:
+            name = _resolve_name(second_id, names)
+            url = _SHOWINFO_NAMED_URL_FUNCS[first_id](name)
+            return f'<a href="{url}" target="_blank">'
     return """<a href="javascript:showInvalidError();">"""
 
 
+def _resolve_name(id: int, names: dict = None) -> str:
+    if names and id in names:
+        return names[id]
+    return EveEntity.objects.resolve_name(id)
+
+
+def eve_xml_entity_ids(xml: str) -> set:
+    """Returns the IDs of all entities in links of CCP XML,
+    which names are needed for the conversion to HTML
+    """
+    entity_ids = set()
+    for link_match in _link_regex.finditer(xml):
+        second_id = link_match.group("second_id")
+        if (
+            link_match.group("schema") == "showinfo"
+            and int(link_match.group("first_id")) in _SHOWINFO_NAMED_URL_FUNCS
+            and second_id is not None
+        ):
+            entity_ids.add(int(second_id))
+    return entity_ids
+
+
 def is_ascii(s):
     return all(ord(c) < 128 for c in s)
 
 
-def eve_xml_to_html(xml: str) -> str:
+def eve_xml_to_html(xml: str, names: dict = None) -> str:
+    """Converts CCP XML to HTML
+
+    Args:
+    - xml: CCP XML to convert
+    - names: Names of linked entities by ID. Missing names will be resolved one by one.
+    """
     x = _font_regex.sub(_font_replace, xml)
     x = x.replace("</font>", "</span>")
-    x = _link_regex.sub(_link_replace, x)
+    x = _link_regex.sub(lambda link_match: _link_replace(link_match, names), x)
     # x = strip_tags(x)
     if is_ascii(x):
         x = bytes(x, "ascii").decode("unicode-escape")
@@ -1,20 +1,36 @@
+import datetime as dt
+from collections import defaultdict
 from copy import deepcopy
 from math import floor
 
+from bravado.exception import HTTPError
+
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models import Avg, Count, ExpressionWrapper, F, Max, Min
+from django.db.models import Avg, Count, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.utils.timezone import now
 
 from allianceauth.authentication.models import CharacterOwnership
 from allianceauth.eveonline.models import EveCharacter
 from allianceauth.services.hooks import get_extension_logger
 from app_utils.caching import ObjectCacheMixin
+from app_utils.helpers import chunks
 from app_utils.logging import LoggerAddTag
 
 from .. import __title__
+from ..app_settings import (
+    MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+    MEMBERAUDIT_UPDATE_BACKOFF_MAX_FACTOR,
+)
+from ..core.task_lanes import queue_depths
+from ..core.update_context import avoided_queries_count
+from ..providers import esi
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
+# max number of characters ESI accepts for one affiliation request
+AFFILIATION_MAX_CHARACTERS = 1000
+
 
 class CharacterQuerySet(models.QuerySet):
     def eve_character_ids(self) -> set:
@@ -22,6 +38,161 @@ class CharacterQuerySet(models.QuerySet):
             self.values_list("character_ownership__character__character_id", flat=True)
         )
 
+    def stale_sections_map(self, offsets: dict = None) -> dict:
+        """returns the stale update sections for all characters of this queryset
+
+        Staleness is determined for all characters and sections at once
+        with the same rules as ``Character.is_update_section_stale()``.
+
+        Args:
+        - offsets: Optional timedelta per character PK. Staleness of a character
+        is then determined for the time it's update is planned to start.
+
+        Returns:
+        - dict with character PK as key and set of stale sections as value.
+        Characters with no stale sections are not included.
+        """
+        from ..models import CharacterUpdateStatus
+
+        all_sections = set(self.model.UpdateSection.values)
+        character_pks = list(self.values_list("pk", flat=True))
+        if not character_pks:
+            return dict()
+
+        if not offsets:
+            offsets = dict()
+
+        current = now()
+        deadlines = {
+            section: current
+            - self.model.update_section_time_until_stale(section)
+            * MEMBERAUDIT_UPDATE_BACKOFF_MAX_FACTOR
+            for section in all_sections
+        }
+        sections_by_deadline = defaultdict(set)
+        for section, deadline in deadlines.items():
+            sections_by_deadline[deadline].add(section)
+
+        is_fresh = Q()
+        for deadline, sections in sections_by_deadline.items():
+            is_fresh |= Q(section__in=sections, started_at__gte=deadline)
+
+        fresh_sections = {character_pk: set() for character_pk in character_pks}
+        zero_offset = dt.timedelta(0)
+        for character_pk, section, started_at, expires_at, unchanged_count in (
+            CharacterUpdateStatus.objects.filter(
+                character_id__in=character_pks,
+                is_success=True,
+                started_at__isnull=False,
+                finished_at__isnull=False,
+            )
+            .filter(is_fresh)
+            .values_list(
+                "character_id", "section", "started_at", "expires_at", "unchanged_count"
+            )
+        ):
+            if not self.model.section_is_stale(
+                section=section,
+                started_at=started_at,
+                expires_at=expires_at,
+                reference=current + offsets.get(character_pk, zero_offset),
+                unchanged_count=unchanged_count,
+            ):
+                fresh_sections[character_pk].add(section)
+
+        stale_sections = {
+            character_pk: all_sections.difference(sections)
+            for character_pk, sections in fresh_sections.items()
+        }
+        return {
+            character_pk: sections
+            for character_pk, sections in stale_sections.items()
+            if sections
+        }
+
+    def update_affiliations(self) -> set:
+        """checks the affiliations of all characters of this queryset in bulk
+
+        Corporation, alliance and faction of up to 1,000 characters
+        are checked with one request to ESI.
+        Characters with an unchanged affiliation have their corporation history
+        marked as fresh, so it does not need to be fetched for each character.
+        Character details are not marked, because e.g. title and security status
+        can change without a change of affiliation.
+
+        Returns:
+        - PKs of characters which affiliation changed or is not known yet.
+        Their character details and corporation history need a full update.
+        """
+        from ..models import CharacterDetails, CharacterUpdateStatus
+
+        character_pks_by_eve_id = {
+            eve_character_id: character_pk
+            for character_pk, eve_character_id in self.values_list(
+                "pk", "character_ownership__character__character_id"
+            )
+        }
+        if not character_pks_by_eve_id:
+            return set()
+
+        known_affiliations = {
+            character_pk: (corporation_id, alliance_id, faction_id)
+            for character_pk, corporation_id, alliance_id, faction_id in (
+                CharacterDetails.objects.filter(
+                    character_id__in=character_pks_by_eve_id.values()
+                ).values_list(
+                    "character_id", "corporation_id", "alliance_id", "eve_faction_id"
+                )
+            )
+        }
+        unchanged_pks = set()
+        changed_pks = set()
+        for eve_character_ids in chunks(
+            sorted(character_pks_by_eve_id.keys()), AFFILIATION_MAX_CHARACTERS
+        ):
+            try:
+                affiliations = esi.client.Character.post_characters_affiliation(
+                    characters=eve_character_ids
+                ).results()
+            except (HTTPError, OSError):
+                logger.warning(
+                    "Failed to fetch affiliations for %d characters",
+                    len(eve_character_ids),
+                    exc_info=True,
+                )
+                continue
+
+            for affiliation in affiliations:
+                character_pk = character_pks_by_eve_id.get(
+                    affiliation.get("character_id")
+                )
+                if not character_pk:
+                    continue
+                if known_affiliations.get(character_pk) == (
+                    affiliation.get("corporation_id"),
+                    affiliation.get("alliance_id"),
+                    affiliation.get("faction_id"),
+                ):
+                    unchanged_pks.add(character_pk)
+                else:
+                    changed_pks.add(character_pk)
+
+        if unchanged_pks:
+            current = now()
+            CharacterUpdateStatus.objects.filter(
+                character_id__in=unchanged_pks,
+                section=self.model.UpdateSection.CORPORATION_HISTORY,
+                is_success=True,
+            ).update(started_at=current, finished_at=current)
+
+        logger.info(
+            "Checked affiliations of %d characters: %d unchanged, %d changed",
+            len(character_pks_by_eve_id),
+            len(unchanged_pks),
+            len(changed_pks),
+        )
+        return changed_pks
+
 
 class CharacterManagerBase(ObjectCacheMixin, models.Manager):
     def unregistered_characters_of_user_count(self, user: User) -> int:
@@ -76,6 +247,28 @@ CharacterManager = CharacterManagerBase.from_queryset(CharacterQuerySet)
 
 
 class CharacterUpdateStatusManager(models.Manager):
+    def reset_for_characters(
+        self, character_pks: list, section: str, root_task_id: str = None
+    ) -> None:
+        """resets the status of the given section for many characters at once"""
+        self.bulk_create(
+            [
+                self.model(character_id=character_pk, section=section)
+                for character_pk in character_pks
+            ],
+            batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        self.filter(character_id__in=character_pks, section=section).update(
+            is_success=None,
+            last_error_message="",
+            started_at=now(),
+            finished_at=None,
+            expires_at=None,
+            root_task_id=root_task_id if root_task_id else "",
+            parent_task_id="",
+        )
+
     def statistics(self) -> dict:
         """returns detailed statistics about the last update run and the app"""
         from django.conf import settings as auth_settings
@@ -219,6 +412,16 @@ class CharacterUpdateStatusManager(models.Manager):
                         }
                     )
 
+                # content not modified according to ESI, which therefore
+                # did not need to be downloaded, parsed and hashed again
+                not_modified = self.filter(section__in=sections).aggregate(
+                    count=Sum("not_modified_count"), bytes=Sum("not_modified_bytes")
+                )
+                update_stats[f"ring_{ring}"]["not_modified"] = {
+                    "responses_count": not_modified["count"] or 0,
+                    "bytes_saved": not_modified["bytes"] or 0,
+                }
+
                 ring_characters_count = (
                     Character.objects.filter(update_status_set__in=qs)
                     .annotate(num_sections=Count("update_status_set__section"))
@@ -232,6 +435,11 @@ class CharacterUpdateStatusManager(models.Manager):
                     ring_characters_count == all_characters_count
                 )
 
+        # queries which were avoided by update contexts of character update runs
+        update_stats["update_context"] = {
+            "avoided_queries_count": avoided_queries_count()
+        }
+
         return {
             "app_totals": {
                 "users_count": User.objects.filter(
@@ -248,6 +456,7 @@ class CharacterUpdateStatusManager(models.Manager):
                 "contracts_count": CharacterContract.objects.count(),
             },
             "settings": settings,
+            "task_lanes": queue_depths(),
             "update_statistics": update_stats,
         }
 
@@ -1,27 +1,37 @@
 import datetime as dt
+import threading
+import time
 from typing import Iterable, Tuple
 
 from bravado.exception import HTTPForbidden, HTTPUnauthorized
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 from esi.models import Token
 from eveuniverse.models import EveEntity, EveSolarSystem, EveType
 
 from allianceauth.services.hooks import get_extension_logger
-from app_utils.esi import fetch_esi_status
+from app_utils.helpers import chunks
 from app_utils.logging import LoggerAddTag
 
 from .. import __title__
 from ..app_settings import (
     MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+    MEMBERAUDIT_LOCATION_IDS_CACHE_TIMEOUT,
     MEMBERAUDIT_LOCATION_STALE_HOURS,
+    MEMBERAUDIT_TASKS_TIME_LIMIT,
 )
 from ..constants import (
     EVE_CATEGORY_ID_SHIP,
     EVE_CATEGORY_ID_SKILL,
     EVE_TYPE_ID_SOLAR_SYSTEM,
 )
+from ..core import esi_governor
+from ..core.xml_converter import (
+    XML_CONVERTER_VERSION,
+    eve_xml_entity_ids,
+    eve_xml_to_html,
+)
 from ..providers import esi
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
@@ -49,6 +59,36 @@ class EveSkillTypeManger(models.Manager):
         )
 
 
+class _KnownLocationIds:
+    """Process wide cache of IDs of locations known to exist in the database
+
+    The whole cache is invalidated after a timeout,
+    so that deleted locations will eventually be noticed.
+    """
+
+    def __init__(self, timeout: int) -> None:
+        self._timeout = timeout
+        self._ids = set()
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> set:
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._ids = set()
+                self._expires_at = time.monotonic() + self._timeout
+            return self._ids
+
+    def add(self, ids: Iterable[int]) -> None:
+        with self._lock:
+            self._ids.update(ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids = set()
+            self._expires_at = 0.0
+
+
 class LocationManager(models.Manager):
     """Manager for Location model
 
@@ -66,6 +106,30 @@ class LocationManager(models.Manager):
     """
 
     _UPDATE_EMPTY_GRACE_MINUTES = 5
+    _known_ids = _KnownLocationIds(timeout=MEMBERAUDIT_LOCATION_IDS_CACHE_TIMEOUT)
+
+    def ids_existing(self, ids: Iterable[int]) -> set:
+        """returns the subset of the given location IDs which exist in the database
+
+        Only the given IDs are looked up and known IDs are cached for the process.
+        IDs found inside a transaction are not cached,
+        since that transaction might still be rolled back.
+        """
+        ids = {int(id) for id in ids}
+        known_ids = self._known_ids.get()
+        unknown_ids = ids.difference(known_ids)
+        if unknown_ids:
+            found_ids = set()
+            for ids_chunk in chunks(
+                list(unknown_ids), MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
+            ):
+                found_ids.update(
+                    self.filter(id__in=ids_chunk).values_list("id", flat=True)
+                )
+            if not transaction.get_connection(self.db).in_atomic_block:
+                self._known_ids.add(found_ids)
+            known_ids = known_ids.union(found_ids)
+        return ids.intersection(known_ids)
 
     def get_or_create_esi(self, id: int, token: Token) -> Tuple[models.Model, bool]:
         """gets or creates location object with data fetched from ESI
@@ -206,7 +270,7 @@ class LocationManager(models.Manager):
 
     def structure_update_or_create_esi(self, id: int, token: Token):
         """Update or creates structure from ESI"""
-        fetch_esi_status().raise_for_status()
+        esi_governor.raise_for_status()
         try:
             structure = esi.client.Universe.get_universe_structures_structure_id(
                 structure_id=id, token=token.valid_access_token()
@@ -257,6 +321,76 @@ class LocationManager(models.Manager):
         )
 
 
+class SkillSetSkillManager(models.Manager):
+    def skill_set_ids_by_skill_type(self, eve_type_ids: Iterable[int] = None) -> dict:
+        """returns an inverted index with the IDs of the skill sets
+        which reference a skill type
+
+        Args:
+        - eve_type_ids: Limit the index to these skill types. Default is all.
+
+        Returns:
+        - dict with skill type ID as key and set of skill set IDs as value
+        """
+        qs = self.all()
+        if eve_type_ids is not None:
+            qs = qs.filter(eve_type_id__in=eve_type_ids)
+
+        index = dict()
+        for eve_type_id, skill_set_id in qs.values_list("eve_type_id", "skill_set_id"):
+            index.setdefault(eve_type_id, set()).add(skill_set_id)
+
+        return index
+
+    def skill_set_ids_for_skill_types(self, eve_type_ids: Iterable[int]) -> set:
+        """returns the IDs of all skill sets which reference any of the given skill types"""
+        skill_set_ids = set()
+        for ids in self.skill_set_ids_by_skill_type(eve_type_ids).values():
+            skill_set_ids |= ids
+
+        return skill_set_ids
+
+
+class MailContentManager(models.Manager):
+    def delete_orphans(self) -> int:
+        """Deletes contents which are no longer referenced by any mail,
+        e.g. after mails or characters have been deleted.
+
+        Contents created within the task time limit are kept,
+        because an update task might still be about to link them to their mails.
+
+        Returns the number of deleted contents.
+        """
+        created_before = now() - dt.timedelta(seconds=MEMBERAUDIT_TASKS_TIME_LIMIT)
+        deleted_count, _ = self.filter(
+            mails__isnull=True, created_at__lt=created_before
+        ).delete()
+        return deleted_count
+
+    def render_html(self, objs: Iterable[models.Model]) -> None:
+        """Renders the HTML of the bodies of the given objects
+        with the current converter version.
+
+        Names of all linked entities are resolved in bulk first.
+        When a name can not be resolved, the HTML is not marked with
+        the current converter version, so it will be rendered again later.
+        Objects are not saved.
+        """
+        objs = list(objs)
+        entity_ids_of_objs = [eve_xml_entity_ids(obj.body) for obj in objs]
+        entity_ids = set().union(*entity_ids_of_objs)
+        names = dict()
+        if entity_ids:
+            resolver = EveEntity.objects.bulk_resolve_names(entity_ids)
+            names = {entity_id: resolver.to_name(entity_id) for entity_id in entity_ids}
+        for obj, obj_entity_ids in zip(objs, entity_ids_of_objs):
+            obj.body_html = eve_xml_to_html(obj.body, names=names)
+            if all(names[entity_id] for entity_id in obj_entity_ids):
+                obj.body_html_version = XML_CONVERTER_VERSION
+            else:
+                obj.body_html_version = 0
+
+
 class MailEntityManager(models.Manager):
     def get_or_create_esi(
         self, id: int, category: str = None
@@ -304,7 +438,7 @@ class MailEntityManager(models.Manager):
             pass
 
         if not category or category == self.model.Category.UNKNOWN:
-            fetch_esi_status().raise_for_status()
+            esi_governor.raise_for_status()
             eve_entity, _ = EveEntity.objects.get_or_create_esi(id=id)
             if eve_entity:
                 return self.update_or_create_from_eve_entity(eve_entity)
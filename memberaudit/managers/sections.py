@@ -1,7 +1,8 @@
-from typing import Dict, List
+from collections import defaultdict
+from typing import Dict, Iterable, List
 
 from django.db import models, transaction
-from django.db.models import Case, ExpressionWrapper, F, Value, When
+from django.db.models import Case, ExpressionWrapper, F, Max, Value, When
 from esi.models import Token
 from eveuniverse.models import (
     EveAncestry,
@@ -14,6 +15,7 @@ from eveuniverse.models import (
 )
 
 from allianceauth.services.hooks import get_extension_logger
+from app_utils.helpers import chunks
 from app_utils.logging import LoggerAddTag
 
 from .. import __title__
@@ -318,49 +320,61 @@ class CharacterContractManager(models.Manager):
 
 
 class CharacterContractBidManager(models.Manager):
-    @transaction.atomic()
     def update_for_contract(self, contract: models.Model, bids_list):
-        incoming_ids = set(bids_list.keys())
+        self.update_for_contracts({contract: bids_list})
+
+    @transaction.atomic()
+    def update_for_contracts(self, bids_by_contract: dict):
+        """adds new bids for multiple contracts in bulk
+
+        Args:
+            bids_by_contract: bids lists from ESI by contract
+        """
         existing_ids = set(
-            self.filter(contract=contract).values_list("bid_id", flat=True)
-        )
-        create_ids = incoming_ids.difference(existing_ids)
-        if not create_ids:
-            logger.info(
-                "%s, %s: No new contract bids to add",
-                contract.character,
-                contract.contract_id,
+            self.filter(contract__in=bids_by_contract.keys()).values_list(
+                "contract_id", "bid_id"
             )
-            return
-
-        logger.info(
-            "%s, %s: Storing %s new contract bids",
-            contract.character,
-            contract.contract_id,
-            len(create_ids),
         )
         bids = [
             self.model(
                 contract=contract,
                 bid_id=bid.get("bid_id"),
                 amount=bid.get("amount"),
-                bidder=get_or_create_or_none("bidder_id", bid, EveEntity),
+                bidder_id=bid.get("bidder_id"),
                 date_bid=bid.get("date_bid"),
             )
+            for contract, bids_list in bids_by_contract.items()
             for bid_id, bid in bids_list.items()
-            if bid_id in create_ids
+            if (contract.pk, bid_id) not in existing_ids
         ]
+        if not bids:
+            logger.info("No new contract bids to add")
+            return
+
+        logger.info(
+            "Storing %s new bids for %s contracts", len(bids), len(bids_by_contract)
+        )
         self.bulk_create(bids, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE)
 
 
 class CharacterContractItemManager(models.Manager):
     def update_for_contract(self, contract: models.Model, items_data):
-        logger.info(
-            "%s, %s: Storing %s contract items",
-            self,
-            contract.contract_id,
-            len(items_data),
-        )
+        self.update_for_contracts({contract: items_data})
+
+    def update_for_contracts(self, items_by_contract: dict):
+        """replaces the items of multiple contracts in bulk
+
+        Args:
+            items_by_contract: items data from ESI by contract
+        """
+        type_ids = {
+            item["type_id"]
+            for items_data in items_by_contract.values()
+            for item in items_data
+            if item.get("type_id")
+        }
+        if type_ids:
+            EveType.objects.bulk_get_or_create_esi(ids=type_ids)
         items = [
             self.model(
                 contract=contract,
@@ -369,13 +383,17 @@ class CharacterContractItemManager(models.Manager):
                 is_singleton=item.get("is_singleton"),
                 quantity=item.get("quantity"),
                 raw_quantity=item.get("raw_quantity"),
-                eve_type=get_or_create_esi_or_none("type_id", item, EveType),
+                eve_type_id=item.get("type_id"),
             )
+            for contract, items_data in items_by_contract.items()
             for item in items_data
             if "record_id" in item
         ]
+        logger.info(
+            "Storing %s items for %s contracts", len(items), len(items_by_contract)
+        )
         with transaction.atomic():
-            self.filter(contract=contract).delete()
+            self.filter(contract__in=items_by_contract.keys()).delete()
             self.bulk_create(items, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE)
 
     def annotate_pricing(self) -> models.QuerySet:
@@ -627,6 +645,18 @@ class CharacterMailManager(models.Manager):
         else:
             logger.info("%s: Mails have not changed", character)
 
+    def link_existing_contents(self) -> int:
+        """Links mails without content to an already stored content of the same mail,
+        e.g. when the body was fetched for another character.
+
+        Returns the number of linked mails.
+        """
+        from ..models import MailContent
+
+        return self.filter(
+            content__isnull=True, mail_id__in=MailContent.objects.values("id")
+        ).update(content=F("mail_id"))
+
     def _preload_mail_senders(self, character, mail_headers):
         from ..models import MailEntity
 
@@ -643,22 +673,42 @@ class CharacterMailManager(models.Manager):
                 MailEntity.objects.get_or_create_esi_async(header.get("from"))
 
     def _create_mail_headers(self, character, mail_headers: dict, create_ids) -> None:
-        from ..models import MailEntity
+        """Creates new mail headers incl. their recipients and labels
+
+        All related objects are created in bulk for the whole batch of mails.
+        Mails which content is already stored for another character
+        are linked to that content.
+        """
+        from ..models import MailContent, MailEntity
 
         logger.info("%s: Create %s new mail headers", character, len(create_ids))
         new_mail_headers_list = character._headers_list_subset(mail_headers, create_ids)
         self._add_missing_mailing_lists_from_recipients(
             character=character, new_mail_headers_list=new_mail_headers_list
         )
+        recipient_ids = self._create_missing_recipients(new_mail_headers_list)
 
         # create headers
+        sender_ids = {
+            header.get("from")
+            for header in new_mail_headers_list.values()
+            if header.get("from")
+        }
+        known_sender_ids = set(
+            MailEntity.objects.filter(id__in=sender_ids).values_list("id", flat=True)
+        )
+        known_content_ids = set(
+            MailContent.objects.filter(id__in=create_ids).values_list("id", flat=True)
+        )
         new_headers = list()
         for mail_id, header in new_mail_headers_list.items():
+            sender_id = header.get("from")
             new_headers.append(
                 self.model(
                     character=character,
                     mail_id=mail_id,
-                    sender=get_or_none("from", header, MailEntity),
+                    sender_id=sender_id if sender_id in known_sender_ids else None,
+                    content_id=mail_id if mail_id in known_content_ids else None,
                     is_read=bool(header.get("is_read")),
                     subject=header.get("subject", ""),
                     timestamp=header.get("timestamp"),
@@ -668,35 +718,74 @@ class CharacterMailManager(models.Manager):
         self.bulk_create(new_headers, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE)
 
         # add recipients and labels
+        mail_pks = dict(
+            self.filter(character=character, mail_id__in=create_ids).values_list(
+                "mail_id", "pk"
+            )
+        )
         labels = character.mail_labels.get_all_labels()
+        RecipientsThrough = self.model.recipients.through
+        LabelsThrough = self.model.labels.through
+        new_recipients = list()
+        new_labels = list()
         for mail_id, header in new_mail_headers_list.items():
-            mail_obj = self.filter(character=character).get(mail_id=mail_id)
-            recipients = list()
-            recipient_type_map = {
-                "alliance": MailEntity.Category.ALLIANCE,
-                "character": MailEntity.Category.CHARACTER,
-                "corporation": MailEntity.Category.CORPORATION,
-                "mailing_list": MailEntity.Category.MAILING_LIST,
-            }
-            for recipient_info in header.get("recipients"):
-                recipient, _ = MailEntity.objects.get_or_create(
-                    id=recipient_info.get("recipient_id"),
-                    defaults={
-                        "category": recipient_type_map[
-                            recipient_info.get("recipient_type")
-                        ]
-                    },
+            mail_pk = mail_pks[mail_id]
+            new_recipients += [
+                RecipientsThrough(charactermail_id=mail_pk, mailentity_id=recipient_id)
+                for recipient_id in {
+                    recipient_info.get("recipient_id")
+                    for recipient_info in header.get("recipients") or []
+                }
+            ]
+            new_labels += [
+                LabelsThrough(charactermail_id=mail_pk, charactermaillabel_id=label_pk)
+                for label_pk in self._label_pks_of_mail(
+                    character=character,
+                    mail_id=mail_id,
+                    label_ids=header.get("labels"),
+                    labels=labels,
                 )
-                recipients.append(recipient)
+            ]
 
-            mail_obj.recipients.set(recipients, clear=True)
-            MailEntity.objects.bulk_update_names(recipients, keep_names=True)
-            self._update_labels_of_mail(
-                character=character,
-                mail=mail_obj,
-                label_ids=header.get("labels"),
-                labels=labels,
-            )
+        RecipientsThrough.objects.bulk_create(
+            new_recipients, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
+        )
+        LabelsThrough.objects.bulk_create(
+            new_labels, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
+        )
+        MailEntity.objects.bulk_update_names(
+            MailEntity.objects.filter(id__in=recipient_ids), keep_names=True
+        )
+
+    def _create_missing_recipients(self, new_mail_headers_list) -> set:
+        """Creates all recipients of the given mail headers that do not yet exist
+
+        Returns the IDs of all recipients.
+        """
+        from ..models import MailEntity
+
+        recipient_type_map = {
+            "alliance": MailEntity.Category.ALLIANCE,
+            "character": MailEntity.Category.CHARACTER,
+            "corporation": MailEntity.Category.CORPORATION,
+            "mailing_list": MailEntity.Category.MAILING_LIST,
+        }
+        recipients = dict()
+        for header in new_mail_headers_list.values():
+            for recipient_info in header.get("recipients") or []:
+                recipients[recipient_info.get("recipient_id")] = recipient_type_map[
+                    recipient_info.get("recipient_type")
+                ]
+
+        MailEntity.objects.bulk_create(
+            [
+                MailEntity(id=recipient_id, category=category)
+                for recipient_id, category in recipients.items()
+            ],
+            batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        return set(recipients.keys())
 
     def _add_missing_mailing_lists_from_recipients(
         self, character, new_mail_headers_list
@@ -707,7 +796,7 @@ class CharacterMailManager(models.Manager):
 
         incoming_ids = set()
         for header in new_mail_headers_list.values():
-            for recipient in header.get("recipients"):
+            for recipient in header.get("recipients") or []:
                 if recipient.get("recipient_type") == "mailing_list":
                     incoming_ids.add(recipient.get("recipient_id"))
 
@@ -723,50 +812,111 @@ class CharacterMailManager(models.Manager):
                 character,
                 len(create_ids),
             )
-            for list_id in create_ids:
-                MailEntity.objects.get_or_create(
-                    id=list_id, defaults={"category": MailEntity.Category.MAILING_LIST}
-                )
+            MailEntity.objects.bulk_create(
+                [
+                    MailEntity(id=list_id, category=MailEntity.Category.MAILING_LIST)
+                    for list_id in create_ids
+                ],
+                batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
 
-    def _update_labels_of_mail(
-        self, character, mail: models.Model, label_ids: List[int], labels: list
-    ) -> None:
-        """Updates the labels of a mail object from a dict"""
-        mail.labels.clear()
-        if label_ids:
-            labels_to_add = list()
-            for label_id in label_ids:
-                try:
-                    labels_to_add.append(labels[label_id])
-                except KeyError:
-                    logger.info(
-                        "%s: Unknown mail label with ID %s for mail %s",
-                        character,
-                        label_id,
-                        mail,
-                    )
+    def _label_pks_of_mail(
+        self, character, mail_id: int, label_ids: List[int], labels: dict
+    ) -> set:
+        """Returns the pks of the known labels for the given label IDs of a mail"""
+        label_pks = set()
+        for label_id in label_ids or []:
+            try:
+                label_pks.add(labels[label_id].pk)
+            except KeyError:
+                logger.info(
+                    "%s: Unknown mail label with ID %s for mail %s",
+                    character,
+                    label_id,
+                    mail_id,
+                )
 
-            mail.labels.add(*labels_to_add)
+        return label_pks
 
     def _update_mail_headers(self, character, mail_headers: dict, update_ids) -> None:
+        """Updates read state and labels of existing mail headers
+
+        Only mails which read state changed and only labels which changed
+        are written to the database.
+        """
         logger.info("%s: Updating %s mail headers", character, len(update_ids))
-        mail_pks = self.filter(character=character, mail_id__in=update_ids).values_list(
-            "pk", flat=True
+        mails = list(
+            self.filter(character=character, mail_id__in=update_ids).only(
+                "pk", "mail_id", "is_read"
+            )
         )
+        mail_pks = [mail.pk for mail in mails]
+        LabelsThrough = self.model.labels.through
+        current_labels = defaultdict(set)
+        for mail_pk, label_pk in LabelsThrough.objects.filter(
+            charactermail_id__in=mail_pks
+        ).values_list("charactermail_id", "charactermaillabel_id"):
+            current_labels[mail_pk].add(label_pk)
+
         labels = character.mail_labels.get_all_labels()
-        mails = self.in_bulk(mail_pks)
-        for mail in mails.values():
+        changed_mails = list()
+        labels_to_add = list()
+        labels_to_remove = list()
+        for mail in mails:
             mail_header = mail_headers.get(mail.mail_id)
-            if mail_header:
-                mail.is_read = bool(mail_header.get("is_read"))
-                self._update_labels_of_mail(
-                    character=character,
-                    mail=mail,
-                    label_ids=mail_header.get("labels"),
-                    labels=labels,
-                )
+            if not mail_header:
+                continue
+            is_read = bool(mail_header.get("is_read"))
+            if mail.is_read != is_read:
+                mail.is_read = is_read
+                changed_mails.append(mail)
+            incoming_label_pks = self._label_pks_of_mail(
+                character=character,
+                mail_id=mail.mail_id,
+                label_ids=mail_header.get("labels"),
+                labels=labels,
+            )
+            labels_to_add += [
+                (mail.pk, label_pk)
+                for label_pk in incoming_label_pks - current_labels[mail.pk]
+            ]
+            labels_to_remove += [
+                (mail.pk, label_pk)
+                for label_pk in current_labels[mail.pk] - incoming_label_pks
+            ]
 
-        self.bulk_update(mails.values(), ["is_read"])
+        if changed_mails:
+            self.bulk_update(
+                changed_mails,
+                ["is_read"],
+                batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+            )
+        if labels_to_remove:
+            mail_pks_by_label = defaultdict(list)
+            for mail_pk, label_pk in labels_to_remove:
+                mail_pks_by_label[label_pk].append(mail_pk)
+            for label_pk, label_mail_pks in mail_pks_by_label.items():
+                LabelsThrough.objects.filter(
+                    charactermaillabel_id=label_pk, charactermail_id__in=label_mail_pks
+                ).delete()
+        if labels_to_add:
+            LabelsThrough.objects.bulk_create(
+                [
+                    LabelsThrough(
+                        charactermail_id=mail_pk, charactermaillabel_id=label_pk
+                    )
+                    for mail_pk, label_pk in labels_to_add
+                ],
+                batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+            )
+        logger.info(
+            "%s: Changed read state of %s mails, added %s and removed %s labels",
+            character,
+            len(changed_mails),
+            len(labels_to_add),
+            len(labels_to_remove),
+        )
 
 
 class CharacterMailLabelManager(models.Manager):
@@ -877,7 +1027,11 @@ class CharacterSkillqueueEntryManager(models.Manager):
 
 class CharacterSkillManager(models.Manager):
     @transaction.atomic()
-    def update_for_character(self, character, skills_list):
+    def update_for_character(self, character, skills_list) -> set:
+        """updates the skills of a character
+
+        Returns the IDs of skill types which active level changed
+        """
         incoming_ids = set(skills_list.keys())
         existing_ids = set(
             self.filter(character=character).values_list("eve_type_id", flat=True)
@@ -889,22 +1043,26 @@ class CharacterSkillManager(models.Manager):
 
         create_ids = None
         update_ids = None
+        changed_ids = set(obsolete_ids)
         if skills_list:
             create_ids = incoming_ids.difference(existing_ids)
             if create_ids:
                 self._create_from_dict(
                     character=character, skills_list=skills_list, create_ids=create_ids
                 )
+                changed_ids |= create_ids
 
             update_ids = incoming_ids.difference(create_ids)
             if update_ids:
-                self._update_from_dict(
+                changed_ids |= self._update_from_dict(
                     character=character, skills_list=skills_list, update_ids=update_ids
                 )
 
         if not obsolete_ids and not create_ids and not update_ids:
             logger.info("%s: Skills have not changed", character)
 
+        return changed_ids
+
     def _create_from_dict(self, character, skills_list: dict, create_ids: list):
         logger.info("%s: Storing %s new skills", character, len(create_ids))
         skills = [
@@ -920,7 +1078,7 @@ class CharacterSkillManager(models.Manager):
         ]
         self.bulk_create(skills, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE)
 
-    def _update_from_dict(self, character, skills_list: dict, update_ids: list):
+    def _update_from_dict(self, character, skills_list: dict, update_ids: list) -> set:
         logger.info("%s: Updating %s skills", character, len(update_ids))
         update_pks = list(
             self.filter(character=character, eve_type_id__in=update_ids).values_list(
@@ -928,10 +1086,14 @@ class CharacterSkillManager(models.Manager):
             )
         )
         skills = self.in_bulk(update_pks)
+        changed_ids = set()
         for skill in skills.values():
             skill_info = skills_list.get(skill.eve_type_id)
             if skill_info:
-                skill.active_skill_level = skill_info.get("active_skill_level")
+                active_skill_level = skill_info.get("active_skill_level")
+                if skill.active_skill_level != active_skill_level:
+                    changed_ids.add(skill.eve_type_id)
+                skill.active_skill_level = active_skill_level
                 skill.skillpoints_in_skill = skill_info.get("skillpoints_in_skill")
                 skill.trained_skill_level = skill_info.get("trained_skill_level")
 
@@ -944,77 +1106,201 @@ class CharacterSkillManager(models.Manager):
             ],
             batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
         )
+        return changed_ids
 
 
 class CharacterSkillSetCheckManager(models.Manager):
-    @transaction.atomic()
     def update_for_character(self, character):
-        from ..models import SkillSet
+        self.update_for_characters([character.pk])
 
-        character_skills = {
-            obj["eve_type_id"]: obj["active_skill_level"]
-            for obj in character.skills.values("eve_type_id", "active_skill_level")
-        }
-        self.filter(character=character).all().delete()
-        skill_sets_qs = SkillSet.objects.prefetch_related(
-            "skills", "skills__eve_type"
-        ).all()
-        skill_sets_count = skill_sets_qs.count()
-        if skill_sets_count == 0:
-            logger.info("%s: No skill sets defined", character)
+    @transaction.atomic()
+    def update_for_characters(
+        self, character_pks: Iterable[int], skill_set_ids: Iterable[int] = None
+    ) -> None:
+        """updates the skill set checks of the given characters in one pass
+
+        The requirements of all skill sets are loaded once and checked against
+        the skill levels of all given characters.
+        Only checks and failed skills which changed are written to the database.
+
+        Args:
+        - character_pks: PKs of characters to check
+        - skill_set_ids: Only check these skill sets. Default is all.
+        """
+        from ..models import CharacterSkill, SkillSet, SkillSetSkill
+
+        character_pks = set(character_pks)
+        if not character_pks:
             return
 
-        logger.info("%s: Checking %s skill sets", character, skill_sets_count)
-        skill_set_checks = [
-            self.model(character=character, skill_set=skill_set)
-            for skill_set in skill_sets_qs
-        ]
-        self.bulk_create(
-            skill_set_checks, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
-        )
+        all_skill_set_ids = set(SkillSet.objects.values_list("id", flat=True))
+        if not all_skill_set_ids:
+            logger.info("No skill sets defined")
+            self.filter(character_id__in=character_pks).delete()
+            return
 
-        # add failed recommended / required skills to objects if any
-        obj_pks = list(self.filter(character=character).values_list("pk", flat=True))
-        skill_set_checks = self.in_bulk(obj_pks)
-        checks_by_skill_set_id = {
-            obj.skill_set_id: obj for obj in skill_set_checks.values()
-        }
+        if skill_set_ids is None:
+            skill_set_ids = all_skill_set_ids
+        else:
+            skill_set_ids = all_skill_set_ids.intersection(skill_set_ids)
+            if not skill_set_ids:
+                return
 
-        # required skills
-        for skill_set in skill_sets_qs:
-            failed_skills = self._identify_failed_skills(
-                skill_set, character_skills, "required"
-            )
-            if failed_skills:
-                checks_by_skill_set_id[skill_set.id].failed_required_skills.add(
-                    *failed_skills
+        logger.info(
+            "Checking %d skill sets for %d characters",
+            len(skill_set_ids),
+            len(character_pks),
+        )
+        requirements = {"required": [], "recommended": []}
+        skill_set_skills_qs = SkillSetSkill.objects.filter(
+            skill_set_id__in=skill_set_ids
+        ).values_list(
+            "pk", "skill_set_id", "eve_type_id", "required_level", "recommended_level"
+        )
+        for row in skill_set_skills_qs:
+            skill_pk, skill_set_id, eve_type_id, required_level, recommended_level = row
+            if required_level:
+                requirements["required"].append(
+                    (skill_set_id, skill_pk, eve_type_id, required_level)
+                )
+            if recommended_level:
+                requirements["recommended"].append(
+                    (skill_set_id, skill_pk, eve_type_id, recommended_level)
                 )
 
-        # required skills
-        for skill_set in skill_sets_qs:
-            failed_skills = self._identify_failed_skills(
-                skill_set, character_skills, "recommended"
+        eve_type_ids = {row[2] for rows in requirements.values() for row in rows}
+        skill_levels = defaultdict(dict)
+        character_skills_qs = CharacterSkill.objects.filter(
+            character_id__in=character_pks, eve_type_id__in=eve_type_ids
+        ).values_list("character_id", "eve_type_id", "active_skill_level")
+        for character_pk, eve_type_id, active_skill_level in character_skills_qs:
+            skill_levels[character_pk][eve_type_id] = active_skill_level
+
+        check_pks = self._create_missing_checks(character_pks, skill_set_ids)
+        self._update_failed_skills(
+            self.model.failed_required_skills.through,
+            check_pks,
+            self._identify_failed_skills_bulk(
+                requirements["required"], skill_levels, check_pks
+            ),
+        )
+        self._update_failed_skills(
+            self.model.failed_recommended_skills.through,
+            check_pks,
+            self._identify_failed_skills_bulk(
+                requirements["recommended"], skill_levels, check_pks
+            ),
+        )
+
+    def _create_missing_checks(self, character_pks: set, skill_set_ids: set) -> dict:
+        """creates missing checks for all combinations of characters and skill sets
+
+        Returns PK of all checks by character PK and skill set ID
+        """
+        check_pks = self._check_pks(character_pks, skill_set_ids)
+        missing_checks = [
+            self.model(character_id=character_pk, skill_set_id=skill_set_id)
+            for character_pk in character_pks
+            for skill_set_id in skill_set_ids
+            if (character_pk, skill_set_id) not in check_pks
+        ]
+        if missing_checks:
+            self.bulk_create(
+                missing_checks, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
             )
-            if failed_skills:
-                checks_by_skill_set_id[skill_set.id].failed_recommended_skills.add(
-                    *failed_skills
-                )
+            check_pks = self._check_pks(character_pks, skill_set_ids)
+
+        return check_pks
+
+    def _check_pks(self, character_pks: set, skill_set_ids: set) -> dict:
+        return {
+            (character_pk, skill_set_id): check_pk
+            for check_pk, character_pk, skill_set_id in self.filter(
+                character_id__in=character_pks, skill_set_id__in=skill_set_ids
+            ).values_list("pk", "character_id", "skill_set_id")
+        }
 
     @staticmethod
-    def _identify_failed_skills(
-        skill_set: models.Model, character_skills: dict, level_name: str
-    ) -> list:
-        failed_skills = list()
-        kwargs = {f"{level_name}_level__isnull": False}
-        for skill in skill_set.skills.filter(**kwargs):
-            eve_type_id = skill.eve_type_id
-            if eve_type_id not in character_skills or character_skills[
-                eve_type_id
-            ] < getattr(skill, f"{level_name}_level"):
-                failed_skills.append(skill)
+    def _identify_failed_skills_bulk(
+        requirements: list, skill_levels: dict, check_pks: dict
+    ) -> set:
+        """identifies failed skills for all characters
+
+        Returns set of check PK and skill set skill PK for each failed skill
+        """
+        character_pks = {character_pk for character_pk, _ in check_pks.keys()}
+        failed_skills = set()
+        for character_pk in character_pks:
+            character_skill_levels = skill_levels.get(character_pk, {})
+            for skill_set_id, skill_pk, eve_type_id, level in requirements:
+                if character_skill_levels.get(eve_type_id, 0) < level:
+                    failed_skills.add(
+                        (check_pks[(character_pk, skill_set_id)], skill_pk)
+                    )
 
         return failed_skills
 
+    @staticmethod
+    def _update_failed_skills(
+        through_model: models.Model, check_pks: dict, failed_skills: set
+    ) -> None:
+        """updates the failed skills of checks in bulk
+
+        Only adds and removes the rows which changed.
+        """
+        current_rows = {
+            (check_pk, skill_pk): row_pk
+            for row_pk, check_pk, skill_pk in through_model.objects.filter(
+                characterskillsetcheck_id__in=check_pks.values()
+            ).values_list("pk", "characterskillsetcheck_id", "skillsetskill_id")
+        }
+        obsolete_row_pks = [
+            row_pk for key, row_pk in current_rows.items() if key not in failed_skills
+        ]
+        for row_pks_chunk in chunks(
+            obsolete_row_pks, MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
+        ):
+            through_model.objects.filter(pk__in=row_pks_chunk).delete()
+
+        new_rows = [
+            through_model(characterskillsetcheck_id=check_pk, skillsetskill_id=skill_pk)
+            for check_pk, skill_pk in failed_skills
+            if (check_pk, skill_pk) not in current_rows
+        ]
+        if new_rows:
+            through_model.objects.bulk_create(
+                new_rows, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
+            )
+
+
+def _new_ids_above_watermark(
+    queryset: models.QuerySet, id_field: str, incoming_ids: set
+) -> set:
+    """returns the incoming IDs which do not yet exist in the given queryset
+
+    IDs above the highest existing ID (the watermark) are new without lookup.
+    Only IDs at or below the watermark are looked up, so the effort depends
+    on the number of incoming IDs, not on the number of existing objects.
+    """
+    if not incoming_ids:
+        return set()
+
+    watermark = queryset.aggregate(watermark=Max(id_field))["watermark"]
+    if watermark is None:
+        return set(incoming_ids)
+
+    new_ids = {obj_id for obj_id in incoming_ids if obj_id > watermark}
+    known_ids = incoming_ids.difference(new_ids)
+    if known_ids:
+        existing_ids = set(
+            queryset.filter(**{f"{id_field}__in": known_ids}).values_list(
+                id_field, flat=True
+            )
+        )
+        new_ids |= known_ids.difference(existing_ids)
+
+    return new_ids
+
 
 class CharacterWalletJournalEntryManager(models.Manager):
     def update_for_character(self, character, cutoff_datetime, journal):
@@ -1027,9 +1313,9 @@ class CharacterWalletJournalEntryManager(models.Manager):
             self.filter(character=character, date__lt=cutoff_datetime).delete()
 
         with transaction.atomic():
-            incoming_ids = set(entries_list.keys())
-            existing_ids = set(self.values_list("entry_id", flat=True))
-            create_ids = incoming_ids.difference(existing_ids)
+            create_ids = _new_ids_above_watermark(
+                self.filter(character=character), "entry_id", set(entries_list.keys())
+            )
             if not create_ids:
                 logger.info("%s: No new wallet journal entries", character)
                 return
@@ -1083,9 +1369,11 @@ class CharacterWalletTransactionManager(models.Manager):
         EveType.objects.bulk_get_or_create_esi(ids=type_ids)
 
         with transaction.atomic():
-            incoming_ids = set(transaction_list.keys())
-            existing_ids = set(self.values_list("transaction_id", flat=True))
-            create_ids = incoming_ids.difference(existing_ids)
+            create_ids = _new_ids_above_watermark(
+                self.filter(character=character),
+                "transaction_id",
+                set(transaction_list.keys()),
+            )
             if not create_ids:
                 logger.info("%s: No new wallet transcations", character)
                 return
@@ -1095,30 +1383,48 @@ class CharacterWalletTransactionManager(models.Manager):
                 character,
                 len(create_ids),
             )
-            entries = []
-            for transaction_id, row in transaction_list.items():
-                if transaction_id in create_ids:
-                    try:
-                        journal_entry = character.wallet_journal.get(
-                            entry_id=row.get("journal_ref_id")
-                        )
-                    except character.wallet_journal.model.DoesNotExist:
-                        journal_entry = None
-                    entries.append(
-                        self.model(
-                            character=character,
-                            transaction_id=transaction_id,
-                            client=get_or_create_or_none("client_id", row, EveEntity),
-                            date=row.get("date"),
-                            is_buy=row.get("is_buy"),
-                            is_personal=row.get("is_personal"),
-                            journal_ref=journal_entry,
-                            location=get_or_none("location_id", row, Location),
-                            eve_type=EveType.objects.get(id=row.get("type_id")),
-                            quantity=row.get("quantity"),
-                            unit_price=row.get("unit_price"),
-                        )
-                    )
+            new_rows = [
+                row
+                for transaction_id, row in transaction_list.items()
+                if transaction_id in create_ids
+            ]
+            journal_entry_pks = dict(
+                character.wallet_journal.filter(
+                    entry_id__in={row.get("journal_ref_id") for row in new_rows}
+                ).values_list("entry_id", "pk")
+            )
+            location_ids = Location.objects.ids_existing(
+                {row.get("location_id") for row in new_rows if row.get("location_id")}
+            )
+            client_ids = {
+                row.get("client_id") for row in new_rows if row.get("client_id")
+            }
+            if client_ids:
+                EveEntity.objects.bulk_create(
+                    [EveEntity(id=client_id) for client_id in client_ids],
+                    batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+                    ignore_conflicts=True,
+                )
+            entries = [
+                self.model(
+                    character=character,
+                    transaction_id=row.get("transaction_id"),
+                    client_id=row.get("client_id") or None,
+                    date=row.get("date"),
+                    is_buy=row.get("is_buy"),
+                    is_personal=row.get("is_personal"),
+                    journal_ref_id=journal_entry_pks.get(row.get("journal_ref_id")),
+                    location_id=(
+                        row.get("location_id")
+                        if row.get("location_id") in location_ids
+                        else None
+                    ),
+                    eve_type_id=row.get("type_id"),
+                    quantity=row.get("quantity"),
+                    unit_price=row.get("unit_price"),
+                )
+                for row in new_rows
+            ]
             self.bulk_create(entries, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE)
 
         EveEntity.objects.bulk_update_new_esi()
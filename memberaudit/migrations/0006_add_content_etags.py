@@ -0,0 +1,50 @@
+# Generated by Django 3.1.14 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("memberaudit", "0005_add_character_attributes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="characterupdatestatus",
+            name="content_etags_1",
+            field=models.TextField(
+                default="", help_text="ETags of the ESI responses for content 1 as JSON"
+            ),
+        ),
+        migrations.AddField(
+            model_name="characterupdatestatus",
+            name="content_etags_2",
+            field=models.TextField(
+                default="", help_text="ETags of the ESI responses for content 2 as JSON"
+            ),
+        ),
+        migrations.AddField(
+            model_name="characterupdatestatus",
+            name="content_etags_3",
+            field=models.TextField(
+                default="", help_text="ETags of the ESI responses for content 3 as JSON"
+            ),
+        ),
+        migrations.AddField(
+            model_name="characterupdatestatus",
+            name="not_modified_bytes",
+            field=models.PositiveBigIntegerField(
+                default=0,
+                help_text="Number of bytes that did not need to be downloaded again, because ESI reported the content as not modified",
+            ),
+        ),
+        migrations.AddField(
+            model_name="characterupdatestatus",
+            name="not_modified_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Number of times ESI reported the content as not modified",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.1.14 on 2026-10-18 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("memberaudit", "0006_add_content_etags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="characterupdatestatus",
+            name="expires_at",
+            field=models.DateTimeField(
+                default=None,
+                help_text="Time when the data for this section expires on ESI",
+                null=True,
+            ),
+        ),
+    ]
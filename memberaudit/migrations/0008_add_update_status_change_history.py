@@ -0,0 +1,30 @@
+# Generated by Django 3.1.14 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("memberaudit", "0007_add_update_status_expires_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="characterupdatestatus",
+            name="changed_at",
+            field=models.DateTimeField(
+                default=None,
+                help_text="Last time the content of this section changed",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="characterupdatestatus",
+            name="unchanged_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Number of consecutive updates in which the content did not change",
+            ),
+        ),
+    ]
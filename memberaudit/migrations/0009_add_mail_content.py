@@ -0,0 +1,94 @@
+# Generated by Django 3.1.14 on 2026-10-18 21:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 500
+
+
+def forward_move_bodies_to_mail_content(apps, schema_editor):
+    CharacterMail = apps.get_model("memberaudit", "CharacterMail")
+    MailContent = apps.get_model("memberaudit", "MailContent")
+    mails_with_body = CharacterMail.objects.exclude(body="")
+    known_ids = set()
+    new_contents = list()
+    for mail_id, body in (
+        mails_with_body.order_by("pk")
+        .values_list("mail_id", "body")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        if mail_id in known_ids:
+            continue
+        known_ids.add(mail_id)
+        new_contents.append(MailContent(id=mail_id, body=body))
+        if len(new_contents) >= BATCH_SIZE:
+            MailContent.objects.bulk_create(new_contents)
+            new_contents = list()
+
+    if new_contents:
+        MailContent.objects.bulk_create(new_contents)
+
+    mails_with_body.update(content=models.F("mail_id"))
+
+
+def reverse_move_bodies_to_mail_content(apps, schema_editor):
+    CharacterMail = apps.get_model("memberaudit", "CharacterMail")
+    MailContent = apps.get_model("memberaudit", "MailContent")
+    CharacterMail.objects.filter(content__isnull=False).update(
+        body=models.Subquery(
+            MailContent.objects.filter(id=models.OuterRef("content_id")).values(
+                "body"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("memberaudit", "0008_add_update_status_change_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MailContent",
+            fields=[
+                (
+                    "id",
+                    models.PositiveIntegerField(
+                        help_text="ID of the mail", primary_key=True, serialize=False
+                    ),
+                ),
+                ("body", models.TextField()),
+            ],
+            options={
+                "default_permissions": (),
+            },
+        ),
+        migrations.AddField(
+            model_name="charactermail",
+            name="content",
+            field=models.ForeignKey(
+                default=None,
+                help_text="content of this mail, which is shared with other characters",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="mails",
+                to="memberaudit.mailcontent",
+            ),
+        ),
+        migrations.RunPython(
+            forward_move_bodies_to_mail_content, reverse_move_bodies_to_mail_content
+        ),
+        # default allows the field to be added again when reversing
+        migrations.AlterField(
+            model_name="charactermail",
+            name="body",
+            field=models.TextField(default=""),
+        ),
+        migrations.RemoveField(
+            model_name="charactermail",
+            name="body",
+        ),
+    ]
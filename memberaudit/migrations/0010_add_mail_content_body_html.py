@@ -0,0 +1,25 @@
+# Generated by Django 3.1.14 on 2026-10-18 21:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("memberaudit", "0009_add_mail_content"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailcontent",
+            name="body_html",
+            field=models.TextField(default="", help_text="body rendered as HTML"),
+        ),
+        migrations.AddField(
+            model_name="mailcontent",
+            name="body_html_version",
+            field=models.PositiveIntegerField(
+                default=0, help_text="converter version the HTML was rendered with"
+            ),
+        ),
+    ]
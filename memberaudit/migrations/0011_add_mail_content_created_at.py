@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2026-10-18 23:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("memberaudit", "0010_add_mail_content_body_html"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailcontent",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -4,6 +4,7 @@ from .general import (  # noqa: F401
     EveSkillType,
     General,
     Location,
+    MailContent,
     MailEntity,
     SkillSet,
     SkillSetGroup,
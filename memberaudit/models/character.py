@@ -6,14 +6,18 @@ import datetime as dt
 import hashlib
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 from typing import Any, Optional
 
-from bravado.exception import HTTPNotFound
+from bravado.exception import HTTPError, HTTPNotFound, HTTPNotModified
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils.functional import cached_property
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
@@ -31,19 +35,30 @@ from app_utils.logging import LoggerAddTag
 from .. import __title__
 from ..app_settings import (
     MEMBERAUDIT_APP_NAME,
+    MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+    MEMBERAUDIT_CHANGED_SKILL_TYPES_CACHE_TIMEOUT,
     MEMBERAUDIT_DATA_RETENTION_LIMIT,
     MEMBERAUDIT_DEVELOPER_MODE,
+    MEMBERAUDIT_MAIL_HEADERS_FULL_SYNC_HOURS,
     MEMBERAUDIT_MAX_MAILS,
+    MEMBERAUDIT_TASKS_ESI_THREADS,
+    MEMBERAUDIT_UPDATE_BACKOFF_MAX_FACTOR,
     MEMBERAUDIT_UPDATE_STALE_OFFSET,
     MEMBERAUDIT_UPDATE_STALE_RING_1,
     MEMBERAUDIT_UPDATE_STALE_RING_2,
     MEMBERAUDIT_UPDATE_STALE_RING_3,
 )
-from ..core.xml_converter import eve_xml_to_html
+from ..core import esi_governor
+from ..core.update_context import (
+    QUERIES_PER_CHARACTER_LOOKUP,
+    QUERIES_PER_TOKEN_LOOKUP,
+    CharacterUpdateContext,
+    record_avoided_queries,
+)
 from ..decorators import fetch_token_for_character
 from ..managers.character import CharacterManager, CharacterUpdateStatusManager
 from ..providers import esi
-from .general import Location
+from .general import Location, SkillSet, SkillSetSkill
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
@@ -130,6 +145,12 @@ class Character(models.Model):
         UpdateSection.ATTRIBUTES: 3,
     }
 
+    # sections which are updated right away
+    # when the bulk affiliation check finds a changed affiliation
+    AFFILIATION_SECTIONS = frozenset(
+        {UpdateSection.CHARACTER_DETAILS, UpdateSection.CORPORATION_HISTORY}
+    )
+
     character_ownership = models.OneToOneField(
         CharacterOwnership,
         related_name="memberaudit_character",
@@ -147,10 +168,15 @@ class Character(models.Model):
 
     objects = CharacterManager()
 
+    # context of the current update run, see `set_update_context()`
+    update_context = None
+
     class Meta:
         default_permissions = ()
 
     def __str__(self) -> str:
+        if self.update_context:
+            return f"{self.update_context.character_name} (PK:{self.pk})"
         return f"{self.character_ownership.character.character_name} (PK:{self.pk})"
 
     def __repr__(self) -> str:
@@ -174,6 +200,14 @@ class Character(models.Model):
     def name(self) -> str:
         return self.character_ownership.character.character_name
 
+    @property
+    def eve_character_id(self) -> int:
+        """Eve ID of this character. Taken from the update context if available."""
+        if self.update_context:
+            self._record_update_context_hit("character", QUERIES_PER_CHARACTER_LOOKUP)
+            return self.update_context.eve_character_id
+        return self.character_ownership.character.character_id
+
     def user_is_owner(self, user: User) -> bool:
         """Return True if the given user is owner of this character"""
         return self.character_ownership.user == user
@@ -222,6 +256,63 @@ class Character(models.Model):
         # periodic task starts
         return dt.timedelta(minutes=minutes - MEMBERAUDIT_UPDATE_STALE_OFFSET)
 
+    @classmethod
+    def update_section_min_time_until_stale(cls, section: str) -> dt.timedelta:
+        """minimum time until given update section can be considered stale"""
+        return min(
+            dt.timedelta(
+                minutes=MEMBERAUDIT_UPDATE_STALE_RING_1
+                - MEMBERAUDIT_UPDATE_STALE_OFFSET
+            ),
+            cls.update_section_time_until_stale(section),
+        )
+
+    @staticmethod
+    def update_section_backoff_factor(unchanged_count: int) -> int:
+        """factor for prolonging the time until a section is stale
+        after it's content did not change for the given number of updates
+        """
+        return min(2 ** min(unchanged_count, 16), MEMBERAUDIT_UPDATE_BACKOFF_MAX_FACTOR)
+
+    @classmethod
+    def section_is_stale(
+        cls,
+        section: str,
+        started_at: dt.datetime,
+        expires_at: dt.datetime = None,
+        reference: dt.datetime = None,
+        unchanged_count: int = 0,
+    ) -> bool:
+        """returns True if a section last updated at the given time is stale
+
+        A section is stale once the data for it has expired on ESI,
+        but no sooner than the time of ring 1 and no later than the time
+        of the section's own ring.
+        Both times are prolonged exponentially while the content of the section
+        does not change.
+
+        Args:
+        - section: update section
+        - started_at: start of the last successful update
+        - expires_at: time when the data for this section expires on ESI if known
+        - reference: time for which staleness is determined. Default is now
+        - unchanged_count: number of updates the content did not change
+        """
+        if not reference:
+            reference = now()
+
+        backoff_factor = cls.update_section_backoff_factor(unchanged_count)
+        max_time_until_stale = cls.update_section_time_until_stale(section)
+        if started_at < reference - max_time_until_stale * backoff_factor:
+            return True
+
+        min_time_until_stale = cls.update_section_min_time_until_stale(section)
+        return bool(
+            expires_at
+            and expires_at <= reference
+            and started_at < reference - min_time_until_stale * backoff_factor
+        )
+
     @classmethod
     def sections_in_ring(cls, ring: int) -> set:
         """returns set of sections for given ring"""
@@ -243,23 +334,50 @@ class Character(models.Model):
         except (CharacterUpdateStatus.DoesNotExist, ObjectDoesNotExist, AttributeError):
             return True
 
-        deadline = now() - self.update_section_time_until_stale(section)
-        return update_status.started_at < deadline
+        return self.section_is_stale(
+            section=section,
+            started_at=update_status.started_at,
+            expires_at=update_status.expires_at,
+            unchanged_count=update_status.unchanged_count,
+        )
 
     def has_section_changed(
         self, section: str, content: str, hash_num: int = 1
     ) -> bool:
         """returns False if the content hash for this section has not changed, else True"""
         try:
-            section = self.update_status_set.get(section=section)
+            update_status = self.update_status_set.get(section=section)
         except CharacterUpdateStatus.DoesNotExist:
             return True
-        else:
-            return section.has_changed(content=content, hash_num=hash_num)
+
+        if update_status.has_changed(content=content, hash_num=hash_num):
+            return True
+
+        # content is the same, but ESI might have issued new ETags for it
+        etags = self._fetched_etags.pop((section, hash_num), None)
+        if etags:
+            update_status.update_content_etags(etags=etags, hash_num=hash_num)
+
+        return False
 
     def update_section_content_hash(
         self, section: str, content: str, hash_num: int = 1
     ) -> bool:
+        etags = self._fetched_etags.pop((section, hash_num), None)
+        try:
+            section = self.update_status_set.get(section=section)
+        except CharacterUpdateStatus.DoesNotExist:
+            section, _ = CharacterUpdateStatus.objects.get_or_create(
+                character=self, section=section
+            )
+
+        section.update_content_hash(content=content, hash_num=hash_num, etags=etags)
+
+    def update_section_content_etags(self, section: str, hash_num: int = 1) -> None:
+        """stores the ETags of the fetched ESI responses for a section
+        without calculating a content hash
+        """
+        etags = self._fetched_etags.pop((section, hash_num), None)
         try:
             section = self.update_status_set.get(section=section)
         except CharacterUpdateStatus.DoesNotExist:
@@ -267,7 +385,7 @@ class Character(models.Model):
                 character=self, section=section
             )
 
-        section.update_content_hash(content=content, hash_num=hash_num)
+        section.update_content_etags(etags=etags, hash_num=hash_num)
 
     def reset_update_section(
         self, section: str, root_task_id: str = None, parent_task_id: str = None
@@ -292,12 +410,167 @@ class Character(models.Model):
 
         return section.is_updating
 
-    def _preload_all_locations(self, token: Token, incoming_ids: set) -> list:
+    @cached_property
+    def _fetched_etags(self) -> dict:
+        """ETags of fetched ESI responses, which are not yet stored"""
+        return dict()
+
+    def _fetch_esi_conditional(
+        self,
+        operation,
+        section: str,
+        hash_num: int = 1,
+        force_update: bool = False,
+        **kwargs,
+    ) -> Any:
+        """fetches the data for a section from ESI with conditional requests
+
+        Sends the ETags of the previous responses along so ESI can report
+        unchanged data as not modified. Will fetch all pages of paged endpoints.
+        The new ETags are stored together with the next content hash of the section.
+
+        Args:
+        - operation: ESI operation to call, e.g. esi.client.Skills.get_...
+        - section: Update section the data belongs to
+        - hash_num: Number of the content hash for this data
+        - force_update: When set to True will always fetch the data
+        - kwargs: Arguments for the ESI operation
+
+        Returns:
+        - data from ESI or None if the data has not been modified
+        """
+        try:
+            update_status = self.update_status_set.get(section=section)
+        except CharacterUpdateStatus.DoesNotExist:
+            update_status = None
+
+        if update_status and not force_update:
+            previous_etags = update_status.content_etags(hash_num)
+        else:
+            previous_etags = []
+
+        pages = self._fetch_esi_pages(operation, previous_etags, **kwargs)
+        if update_status:
+            update_status.update_expires_at(
+                [response.headers.get("Expires") for _, response in pages]
+            )
+
+        not_modified_pages = [
+            page_num for page_num, page in enumerate(pages, 1) if page[0] is None
+        ]
+        if not_modified_pages and len(not_modified_pages) == len(pages):
+            bytes_count = sum(size for _, size in previous_etags)
+            update_status.record_not_modified(bytes_count)
+            logger.info("%s: ESI reports %s as not modified", self, section)
+            return None
+
+        for page_num in not_modified_pages:
+            page_kwargs = {**kwargs, "page": page_num} if page_num > 1 else kwargs
+            data, response = self._fetch_esi_page(operation, **page_kwargs)
+            pages[page_num - 1] = (data, response)
+
+        self._fetched_etags[(section, hash_num)] = [
+            [
+                response.headers.get("ETag"),
+                int(response.headers.get("Content-Length", 0)),
+            ]
+            for page_data, response in pages
+            if response.headers.get("ETag")
+        ]
+        if len(pages) == 1:
+            return pages[0][0]
+
+        data = list()
+        for page_data, response in pages:
+            data += page_data
+
+        return data
+
+    @classmethod
+    def _fetch_esi_pages(cls, operation, previous_etags: list, **kwargs) -> list:
+        """fetches all pages from an ESI operation
+
+        Returns list of data and response for each page.
+        Data is None for pages that have not been modified.
+        """
+        pages = list()
+        page_num = 1
+        total_pages = 1
+        while page_num <= total_pages:
+            page_kwargs = {**kwargs, "page": page_num} if page_num > 1 else kwargs
+            try:
+                etag = previous_etags[page_num - 1][0]
+            except IndexError:
+                etag = None
+
+            data, response = cls._fetch_esi_page(operation, etag=etag, **page_kwargs)
+            x_pages = response.headers.get("X-Pages")
+            if x_pages:
+                total_pages = int(x_pages)
+            elif data is None:
+                total_pages = len(previous_etags)
+
+            pages.append((data, response))
+            page_num += 1
+
+        return pages
+
+    @staticmethod
+    def _fetch_esi_page(operation, etag: str = None, **kwargs) -> tuple:
+        """fetches one page from an ESI operation.
+
+        Returns data and response. Data is None if the page has not been modified.
+        """
+        if etag:
+            kwargs["_request_options"] = {"headers": {"If-None-Match": etag}}
+
+        request = operation(**kwargs)
+        request.request_config.also_return_response = True
+        try:
+            data, response = request.result()
+        except HTTPNotModified as ex:
+            esi_governor.record_response(ex.response)
+            return None, ex.response
+        except HTTPError as ex:
+            esi_governor.record_response(ex.response)
+            raise ex
+
+        esi_governor.record_response(response)
+        return data, response
+
+    @classmethod
+    def _fetch_esi_concurrently(cls, fetch_func, objs: list):
+        """fetches data from ESI for all given objects concurrently
+        with a small thread pool and yields the results of fetch_func
+
+        fetch_func must return a tuple with the ESI response as last element.
+        After each round of requests the ESI error limit is checked
+        and EsiErrorLimitExceeded is raised when the threshold has been reached.
+        """
+        with ThreadPoolExecutor(max_workers=MEMBERAUDIT_TASKS_ESI_THREADS) as executor:
+            for objs_chunk in chunks(objs, MEMBERAUDIT_TASKS_ESI_THREADS):
+                results = list(executor.map(fetch_func, objs_chunk))
+                yield from results
+                cls._raise_if_esi_error_limit_reached(
+                    [result[-1] for result in results]
+                )
+
+    @staticmethod
+    def _raise_if_esi_error_limit_reached(responses: list) -> None:
+        """raises EsiErrorLimitExceeded if any of the given ESI responses
+        reports that the error limit threshold has been reached
+        or if all workers are paused because of the error limit
+        """
+        for response in responses:
+            esi_governor.record_response(response)
+        esi_governor.raise_if_paused()
+
+    def _preload_all_locations(self, token: Token, incoming_ids: set) -> set:
         """loads location objects specified by given set
 
-        returns list of existing location IDs after preload
+        returns set of existing location IDs from the given IDs after preload
         """
-        existing_ids = set(Location.objects.values_list("id", flat=True))
+        existing_ids = Location.objects.ids_existing(incoming_ids)
         missing_ids = incoming_ids.difference(existing_ids)
         if missing_ids:
             logger.info(
@@ -325,6 +598,14 @@ class Character(models.Model):
         Exceptions:
         - TokenError: If no valid token can be found
         """
+        if self.update_context and self.update_context.token_pk:
+            if isinstance(scopes, str):
+                scopes = [scopes]
+            if not scopes or set(scopes).issubset(self.get_esi_scopes()):
+                token = self._fetch_token_from_update_context()
+                if token:
+                    return token
+
         user = self.character_ownership.user
         character = self.character_ownership.character
         token = (
@@ -350,6 +631,68 @@ class Character(models.Model):
 
         return token
 
+    def build_update_context(self) -> CharacterUpdateContext:
+        """Builds the context for an update run of this character
+
+        The token for all scopes is refreshed once here,
+        so the tasks of the update run do not need to refresh it again.
+        The context has no token if no valid token can be found
+        and tasks will then look up their token as usual.
+        """
+        character = self.character_ownership.character
+        try:
+            token = self.fetch_token()
+            token.valid_access_token()
+        except (TokenError, OSError) as ex:
+            logger.warning("%s: No token for update context: %s", self, ex)
+            token_pk = None
+        else:
+            token_pk = token.pk
+
+        return CharacterUpdateContext(
+            character_pk=self.pk,
+            eve_character_id=character.character_id,
+            character_name=character.character_name,
+            user_id=self.character_ownership.user_id,
+            token_pk=token_pk,
+        )
+
+    def set_update_context(self, update_context: CharacterUpdateContext) -> None:
+        """Sets the context of the current update run for this character"""
+        if update_context.character_pk != self.pk:
+            raise ValueError(
+                f"Update context for character {update_context.character_pk} "
+                f"does not match {self!r}"
+            )
+        self.update_context = update_context
+        self._update_context_token = None
+        self._update_context_hits = set()
+
+    def _fetch_token_from_update_context(self) -> Optional[Token]:
+        """Returns the token of the update context or None if it no longer exists"""
+        if not self._update_context_token:
+            try:
+                self._update_context_token = Token.objects.get(
+                    pk=self.update_context.token_pk
+                )
+            except Token.DoesNotExist:
+                self.update_context = self.update_context._replace(token_pk=None)
+                return None
+            # loading the token from the context still needed one query
+            self._record_update_context_hit("token", QUERIES_PER_TOKEN_LOOKUP - 1)
+        else:
+            record_avoided_queries(QUERIES_PER_TOKEN_LOOKUP)
+
+        return self._update_context_token
+
+    def _record_update_context_hit(self, lookup: str, queries: int) -> None:
+        """Records avoided queries once per lookup, since Django caches
+        related objects after the first lookup
+        """
+        if lookup not in self._update_context_hits:
+            self._update_context_hits.add(lookup)
+            record_avoided_queries(queries)
+
     @fetch_token_for_character("esi-assets.read_assets.v1")
     def assets_build_list_from_esi(
         self, token: Token, force_update=False
@@ -359,24 +702,20 @@ class Character(models.Model):
         returns the asset_list or None if no update is required
         """
         logger.info("%s: Fetching assets from ESI", self)
-        asset_list = esi.client.Assets.get_characters_character_id_assets(
-            character_id=self.character_ownership.character.character_id,
+        asset_list = self._fetch_esi_conditional(
+            esi.client.Assets.get_characters_character_id_assets,
+            section=Character.UpdateSection.ASSETS,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
-        assets_flat = {int(x["item_id"]): x for x in asset_list}
-
-        logger.info("%s: Fetching asset names from ESI", self)
-        names = list()
-        for asset_ids_chunk in chunks(list(assets_flat.keys()), 999):
-            names += esi.client.Assets.post_characters_character_id_assets_names(
-                character_id=self.character_ownership.character.character_id,
-                token=token.valid_access_token(),
-                item_ids=asset_ids_chunk,
-            ).results()
+        )
+        if asset_list is None:
+            logger.info("%s: Assets did not change", self)
+            self._update_asset_names(token)
+            return None
 
-        asset_names = {
-            int(x["item_id"]): x["name"] for x in names if x["name"] != "None"
-        }
+        assets_flat = {int(x["item_id"]): x for x in asset_list}
+        asset_names = self._fetch_asset_names(token, list(assets_flat.keys()))
         for item_id in assets_flat.keys():
             assets_flat[item_id]["name"] = asset_names.get(item_id, "")
 
@@ -395,6 +734,49 @@ class Character(models.Model):
             logger.info("%s: Assets did not change", self)
             return None
 
+    def _fetch_asset_names(self, token: Token, item_ids: list) -> dict:
+        """fetches the names of the given assets from ESI and returns them by item ID"""
+        logger.info("%s: Fetching asset names from ESI", self)
+        names = list()
+        for asset_ids_chunk in chunks(item_ids, 999):
+            names += esi.client.Assets.post_characters_character_id_assets_names(
+                character_id=self.eve_character_id,
+                token=token.valid_access_token(),
+                item_ids=asset_ids_chunk,
+            ).results()
+
+        return {int(x["item_id"]): x["name"] for x in names if x["name"] != "None"}
+
+    def _update_asset_names(self, token: Token) -> None:
+        """updates the names of the stored assets from ESI
+
+        Names are not part of the assets from ESI,
+        so renamed assets are not reported as modified.
+        """
+        from .sections import CharacterAsset
+
+        assets = list(self.assets.only("pk", "item_id", "name"))
+        if not assets:
+            return
+
+        asset_names = self._fetch_asset_names(
+            token, [asset.item_id for asset in assets]
+        )
+        renamed_assets = list()
+        for asset in assets:
+            name = asset_names.get(asset.item_id, "")
+            if asset.name != name:
+                asset.name = name
+                renamed_assets.append(asset)
+
+        if renamed_assets:
+            logger.info("%s: Updating names of %d assets", self, len(renamed_assets))
+            CharacterAsset.objects.bulk_update(
+                renamed_assets,
+                fields=["name"],
+                batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+            )
+
     @fetch_token_for_character("esi-universe.read_structures.v1")
     def assets_preload_objects(self, token: Token, asset_list: list) -> None:
         """preloads objects needed to build the asset tree"""
@@ -419,9 +801,16 @@ class Character(models.Model):
         from .sections import CharacterDetails
 
         logger.info("%s: Fetching character details from ESI", self)
-        details = esi.client.Character.get_characters_character_id(
-            character_id=self.character_ownership.character.character_id,
-        ).results()
+        details = self._fetch_esi_conditional(
+            esi.client.Character.get_characters_character_id,
+            section=self.UpdateSection.CHARACTER_DETAILS,
+            force_update=force_update,
+            character_id=self.eve_character_id,
+        )
+        if details is None:
+            logger.info("%s: Character details have not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(details, "character_details")
 
@@ -439,10 +828,18 @@ class Character(models.Model):
     @fetch_token_for_character("esi-characters.read_contacts.v1")
     def update_contact_labels(self, token: Token, force_update: bool = False):
         logger.info("%s: Fetching contact labels from ESI", self)
-        labels = esi.client.Contacts.get_characters_character_id_contacts_labels(
-            character_id=self.character_ownership.character.character_id,
+        labels = self._fetch_esi_conditional(
+            esi.client.Contacts.get_characters_character_id_contacts_labels,
+            section=self.UpdateSection.CONTACTS,
+            hash_num=2,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if labels is None:
+            logger.info("%s: Contact labels have not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(labels, "contact_labels")
         if force_update or self.has_section_changed(
@@ -458,10 +855,17 @@ class Character(models.Model):
     @fetch_token_for_character("esi-characters.read_contacts.v1")
     def update_contacts(self, token: Token, force_update: bool = False):
         logger.info("%s: Fetching contacts from ESI", self)
-        contacts_data = esi.client.Contacts.get_characters_character_id_contacts(
-            character_id=self.character_ownership.character.character_id,
+        contacts_data = self._fetch_esi_conditional(
+            esi.client.Contacts.get_characters_character_id_contacts,
+            section=self.UpdateSection.CONTACTS,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if contacts_data is None:
+            logger.info("%s: Contacts have not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(contacts_data, "contacts")
 
@@ -485,7 +889,11 @@ class Character(models.Model):
     def update_contract_headers(self, token: Token, force_update: bool = False):
         """update the character's contract headers"""
 
-        contracts_list = self._fetch_contracts_from_esi(token)
+        contracts_list = self._fetch_contracts_from_esi(token, force_update)
+        if contracts_list is None:
+            logger.info("%s: Contracts have not changed", self)
+            return
+
         if not contracts_list:
             logger.info("%s: No contracts received from ESI", self)
 
@@ -514,12 +922,20 @@ class Character(models.Model):
         else:
             logger.info("%s: Contracts have not changed", self)
 
-    def _fetch_contracts_from_esi(self, token) -> dict:
+    def _fetch_contracts_from_esi(
+        self, token, force_update: bool = False
+    ) -> Optional[dict]:
         logger.info("%s: Fetching contracts from ESI", self)
-        contracts_data = esi.client.Contracts.get_characters_character_id_contracts(
-            character_id=self.character_ownership.character.character_id,
+        contracts_data = self._fetch_esi_conditional(
+            esi.client.Contracts.get_characters_character_id_contracts,
+            section=self.UpdateSection.CONTRACTS,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if contracts_data is None:
+            return None
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(contracts_data, "contracts")
 
@@ -545,16 +961,55 @@ class Character(models.Model):
             )
             return
 
+        self.update_contracts_items(contract_pks=[contract.pk])
+
+    @fetch_token_for_character("esi-contracts.read_character_contracts.v1")
+    def update_contracts_items(self, token: Token, contract_pks: list):
+        """update items for the given contracts of this character
+
+        Items are fetched concurrently from ESI and written in bulk.
+
+        Raises EsiErrorLimitExceeded when the ESI error limit threshold is reached.
+        Items are only stored when all of them have been fetched.
+        """
+        from .sections import CharacterContract, CharacterContractItem
+
+        contracts = list(
+            self.contracts.filter(
+                pk__in=contract_pks,
+                contract_type__in=[
+                    CharacterContract.TYPE_ITEM_EXCHANGE,
+                    CharacterContract.TYPE_AUCTION,
+                ],
+            )
+        )
+        if not contracts:
+            return
+
         logger.info(
-            "%s, %s: Fetching contract items from ESI", self, contract.contract_id
+            "%s: Fetching items for %s contracts from ESI", self, len(contracts)
         )
-        my_esi = esi.client.Contracts
-        items_data = my_esi.get_characters_character_id_contracts_contract_id_items(
-            character_id=self.character_ownership.character.character_id,
-            contract_id=contract.contract_id,
-            token=token.valid_access_token(),
-        ).results()
-        contract.items.update_for_contract(contract, items_data)
+        character_id = self.eve_character_id
+        access_token = token.valid_access_token()
+
+        def fetch_contract_items(contract) -> tuple:
+            request = esi.client.Contracts.get_characters_character_id_contracts_contract_id_items(
+                character_id=character_id,
+                contract_id=contract.contract_id,
+                token=access_token,
+            )
+            request.request_config.also_return_response = True
+            items_data, response = request.result()
+            return contract, items_data, response
+
+        items_by_contract = dict()
+        for contract, items_data, _response in self._fetch_esi_concurrently(
+            fetch_contract_items, contracts
+        ):
+            items_by_contract[contract] = items_data
+
+        if items_by_contract:
+            CharacterContractItem.objects.update_for_contracts(items_by_contract)
 
     @fetch_token_for_character("esi-contracts.read_character_contracts.v1")
     def update_contract_bids(self, token: Token, contract: models.Model):
@@ -567,26 +1022,74 @@ class Character(models.Model):
             )
             return
 
-        logger.info(
-            "%s, %s: Fetching contract bids from ESI", self, contract.contract_id
+        self.update_contracts_bids(contract_pks=[contract.pk])
+
+    @fetch_token_for_character("esi-contracts.read_character_contracts.v1")
+    def update_contracts_bids(self, token: Token, contract_pks: list):
+        """update bids for the given contracts of this character
+
+        Bids are fetched concurrently from ESI and written in bulk.
+        Bidders are resolved once for all contracts.
+
+        Raises EsiErrorLimitExceeded when the ESI error limit threshold is reached.
+        Bids are only stored when all of them have been fetched.
+        """
+        from .sections import CharacterContract, CharacterContractBid
+
+        contracts = list(
+            self.contracts.filter(
+                pk__in=contract_pks, contract_type=CharacterContract.TYPE_AUCTION
+            )
         )
-        bids_data = (
-            esi.client.Contracts.get_characters_character_id_contracts_contract_id_bids(
-                character_id=self.character_ownership.character.character_id,
+        if not contracts:
+            return
+
+        logger.info("%s: Fetching bids for %s contracts from ESI", self, len(contracts))
+        character_id = self.eve_character_id
+        access_token = token.valid_access_token()
+
+        def fetch_contract_bids(contract) -> tuple:
+            request = esi.client.Contracts.get_characters_character_id_contracts_contract_id_bids(
+                character_id=character_id,
                 contract_id=contract.contract_id,
-                token=token.valid_access_token(),
-            ).results()
-        )
-        bids_list = {int(x["bid_id"]): x for x in bids_data if "bid_id" in x}
-        contract.bids.update_for_contract(contract, bids_list)
-        EveEntity.objects.bulk_update_new_esi()
+                token=access_token,
+            )
+            request.request_config.also_return_response = True
+            bids_data, response = request.result()
+            return contract, bids_data, response
+
+        bids_by_contract = dict()
+        for contract, bids_data, _response in self._fetch_esi_concurrently(
+            fetch_contract_bids, contracts
+        ):
+            bids_by_contract[contract] = {
+                int(x["bid_id"]): x for x in bids_data if "bid_id" in x
+            }
+
+        if bids_by_contract:
+            bidder_ids = {
+                bid["bidder_id"]
+                for bids_list in bids_by_contract.values()
+                for bid in bids_list.values()
+                if bid.get("bidder_id")
+            }
+            if bidder_ids:
+                EveEntity.objects.bulk_create_esi(ids=bidder_ids)
+            CharacterContractBid.objects.update_for_contracts(bids_by_contract)
 
     def update_corporation_history(self, force_update: bool = False):
         """syncs the character's corporation history"""
         logger.info("%s: Fetching corporation history from ESI", self)
-        history = esi.client.Character.get_characters_character_id_corporationhistory(
-            character_id=self.character_ownership.character.character_id,
-        ).results()
+        history = self._fetch_esi_conditional(
+            esi.client.Character.get_characters_character_id_corporationhistory,
+            section=self.UpdateSection.CORPORATION_HISTORY,
+            force_update=force_update,
+            character_id=self.eve_character_id,
+        )
+        if history is None:
+            logger.info("%s: Corporation history has not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(history, "corporation_history")
         if force_update or self.has_section_changed(
@@ -603,10 +1106,17 @@ class Character(models.Model):
     def update_implants(self, token: Token, force_update: bool = False):
         """update the character's implants"""
         logger.info("%s: Fetching implants from ESI", self)
-        implants_data = esi.client.Clones.get_characters_character_id_implants(
-            character_id=self.character_ownership.character.character_id,
+        implants_data = self._fetch_esi_conditional(
+            esi.client.Clones.get_characters_character_id_implants,
+            section=self.UpdateSection.IMPLANTS,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if implants_data is None:
+            logger.info("%s: Implants have not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(implants_data, "implants")
         if force_update or self.has_section_changed(
@@ -630,7 +1140,7 @@ class Character(models.Model):
 
         logger.info("%s: Fetching location from ESI", self)
         location_info = esi.client.Location.get_characters_character_id_location(
-            character_id=self.character_ownership.character.character_id,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
         ).results()
         CharacterLocation.objects.update_for_character(self, token, location_info)
@@ -639,10 +1149,17 @@ class Character(models.Model):
     def update_loyalty(self, token: Token, force_update: bool = False):
         """syncs the character's loyalty entries"""
         logger.info("%s: Fetching loyalty entries from ESI", self)
-        loyalty_entries = esi.client.Loyalty.get_characters_character_id_loyalty_points(
-            character_id=self.character_ownership.character.character_id,
+        loyalty_entries = self._fetch_esi_conditional(
+            esi.client.Loyalty.get_characters_character_id_loyalty_points,
+            section=self.UpdateSection.LOYALTY,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if loyalty_entries is None:
+            logger.info("%s: Loyalty entries have not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(loyalty_entries, "loyalty")
 
@@ -664,10 +1181,17 @@ class Character(models.Model):
     def update_jump_clones(self, token: Token, force_update: bool = False):
         """updates the character's jump clones"""
         logger.info("%s: Fetching jump clones from ESI", self)
-        jump_clones_info = esi.client.Clones.get_characters_character_id_clones(
-            character_id=self.character_ownership.character.character_id,
+        jump_clones_info = self._fetch_esi_conditional(
+            esi.client.Clones.get_characters_character_id_clones,
+            section=self.UpdateSection.JUMP_CLONES,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if jump_clones_info is None:
+            logger.info("%s: Jump clones have not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(jump_clones_info, "jump_clones")
 
@@ -706,10 +1230,18 @@ class Character(models.Model):
         since they might still be referenced by older mails
         """
         logger.info("%s: Fetching mailing lists from ESI", self)
-        mailing_lists_raw = esi.client.Mail.get_characters_character_id_mail_lists(
-            character_id=self.character_ownership.character.character_id,
+        mailing_lists_raw = self._fetch_esi_conditional(
+            esi.client.Mail.get_characters_character_id_mail_lists,
+            section=self.UpdateSection.MAILS,
+            hash_num=2,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if mailing_lists_raw is None:
+            logger.info("%s: Mailng lists have not changed", self)
+            return
+
         if mailing_lists_raw:
             mailing_lists = {
                 obj["mailing_list_id"]: obj
@@ -747,7 +1279,11 @@ class Character(models.Model):
     @fetch_token_for_character("esi-mail.read_mail.v1")
     def update_mail_labels(self, token: Token, force_update: bool = False):
         """update the mail lables for the given character"""
-        mail_labels_list = self._fetch_mail_labels_from_esi(token)
+        mail_labels_list = self._fetch_mail_labels_from_esi(token, force_update)
+        if mail_labels_list is None:
+            logger.info("%s: Mail labels have not changed", self)
+            return
+
         if not mail_labels_list:
             logger.info("%s: No mail labels", self)
             return
@@ -763,14 +1299,23 @@ class Character(models.Model):
         else:
             logger.info("%s: Mail labels have not changed", self)
 
-    def _fetch_mail_labels_from_esi(self, token) -> dict:
+    def _fetch_mail_labels_from_esi(
+        self, token, force_update: bool = False
+    ) -> Optional[dict]:
         from .sections import CharacterMailUnreadCount
 
         logger.info("%s: Fetching mail labels from ESI", self)
-        mail_labels_info = esi.client.Mail.get_characters_character_id_mail_labels(
-            character_id=self.character_ownership.character.character_id,
+        mail_labels_info = self._fetch_esi_conditional(
+            esi.client.Mail.get_characters_character_id_mail_labels,
+            section=self.UpdateSection.MAILS,
+            hash_num=3,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if mail_labels_info is None:
+            return None
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(mail_labels_info, "mail_labels")
 
@@ -788,7 +1333,14 @@ class Character(models.Model):
 
     @fetch_token_for_character("esi-mail.read_mail.v1")
     def update_mail_headers(self, token: Token, force_update: bool = False):
-        mail_headers = self._fetch_mail_headers(token)
+        """update the character's mail headers
+
+        Does a full sync when forced or when the last full sync is older than
+        MEMBERAUDIT_MAIL_HEADERS_FULL_SYNC_HOURS. Otherwise only fetches pages
+        until reaching mails which are already known.
+        """
+        full_sync = force_update or not cache.get(self._mail_headers_full_sync_key())
+        mail_headers = self._fetch_mail_headers(token, full_sync=full_sync)
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(mail_headers, "mail_headers")
         self.mails.update_for_character(
@@ -797,15 +1349,32 @@ class Character(models.Model):
             mail_headers=mail_headers,
             force_update=force_update,
         )
+        if full_sync:
+            cache.set(
+                self._mail_headers_full_sync_key(),
+                True,
+                timeout=MEMBERAUDIT_MAIL_HEADERS_FULL_SYNC_HOURS * 3600,
+            )
+
+    def _mail_headers_full_sync_key(self) -> str:
+        return f"MEMBERAUDIT_MAIL_HEADERS_FULL_SYNC_{self.pk}"
 
-    def _fetch_mail_headers(self, token) -> dict:
+    def _fetch_mail_headers(self, token, full_sync: bool = True) -> dict:
+        """fetches mail headers from ESI
+
+        When full_sync is False paging stops at the first page,
+        which reaches mails that are already known.
+        """
+        known_read_states = (
+            dict() if full_sync else dict(self.mails.values_list("mail_id", "is_read"))
+        )
         last_mail_id = None
         mail_headers_all = list()
         page = 1
         while True:
             logger.info("%s: Fetching mail headers from ESI - page %s", self, page)
             mail_headers = esi.client.Mail.get_characters_character_id_mail(
-                character_id=self.character_ownership.character.character_id,
+                character_id=self.eve_character_id,
                 last_mail_id=last_mail_id,
                 token=token.valid_access_token(),
             ).results()
@@ -815,6 +1384,13 @@ class Character(models.Model):
             mail_headers_all += mail_headers
             if len(mail_headers) < 50 or len(mail_headers_all) >= MEMBERAUDIT_MAX_MAILS:
                 break
+            elif known_read_states and self._mail_headers_page_reaches_known_mails(
+                mail_headers, known_read_states
+            ):
+                logger.info(
+                    "%s: Page %s reaches known mail headers. Stopping.", self, page
+                )
+                break
             else:
                 last_mail_id = min([x["mail_id"] for x in mail_headers])
                 page += 1
@@ -832,6 +1408,24 @@ class Character(models.Model):
         )
         return mail_headers_all_2
 
+    @staticmethod
+    def _mail_headers_page_reaches_known_mails(
+        mail_headers: list, known_read_states: dict
+    ) -> bool:
+        """Returns True when the oldest mail of a page is known
+        and all known mails on that page have an unchanged read state.
+
+        Since mails are returned newest first all following pages are known too.
+        """
+        oldest_mail_id = min(header["mail_id"] for header in mail_headers)
+        if oldest_mail_id not in known_read_states:
+            return False
+        return all(
+            known_read_states[header["mail_id"]] == bool(header.get("is_read"))
+            for header in mail_headers
+            if header["mail_id"] in known_read_states
+        )
+
     @staticmethod
     def _headers_list_subset(mail_headers, subset_ids) -> dict:
         return {
@@ -840,26 +1434,92 @@ class Character(models.Model):
             if mail_id in subset_ids
         }
 
+    def update_mail_body(self, mail: models.Model) -> None:
+        """updates the body of one mail from ESI"""
+        self.update_mail_bodies(mail_pks=[mail.pk])
+
     @fetch_token_for_character("esi-mail.read_mail.v1")
-    def update_mail_body(self, token: Token, mail: models.Model) -> None:
-        logger.debug("%s: Fetching body from ESI for mail ID %s", self, mail.mail_id)
-        try:
-            mail_body = esi.client.Mail.get_characters_character_id_mail_mail_id(
-                character_id=self.character_ownership.character.character_id,
-                mail_id=mail.mail_id,
-                token=token.valid_access_token(),
-            ).result()
-        except HTTPNotFound:
-            logger.info(
-                "%s: Mail %s was deleted in game. Removing mail header.", self, mail
+    def update_mail_bodies(self, token: Token, mail_pks: list) -> None:
+        """updates bodies of the given mails from ESI
+
+        Bodies are fetched concurrently with a small thread pool
+        and written with one bulk insert.
+
+        Bodies are stored once per mail and shared with all characters
+        that received the same mail. Bodies which are already stored
+        are not fetched again.
+
+        Raises EsiErrorLimitExceeded when the ESI error limit threshold is reached.
+        Bodies fetched so far are still stored in that case.
+        """
+        from .general import MailContent
+        from .sections import CharacterMail
+
+        mails = list(
+            self.mails.filter(pk__in=mail_pks, content__isnull=True).exclude(
+                mail_id__in=MailContent.objects.values("id")
             )
-            mail.delete()
+        )
+        if not mails:
             return
-        mail.body = mail_body.get("body", "")
-        mail.save()
-        eve_xml_to_html(mail.body)  # resolve names early
-        if MEMBERAUDIT_DEVELOPER_MODE:
-            self._store_list_to_disk(mail_body, "mail_body")
+
+        logger.info("%s: Fetching %s mail bodies from ESI", self, len(mails))
+        character_id = self.eve_character_id
+        access_token = token.valid_access_token()
+
+        def fetch_mail_body(mail) -> tuple:
+            try:
+                request = esi.client.Mail.get_characters_character_id_mail_mail_id(
+                    character_id=character_id, mail_id=mail.mail_id, token=access_token
+                )
+                request.request_config.also_return_response = True
+                mail_body, response = request.result()
+            except HTTPNotFound as ex:
+                return mail, None, ex.response
+            return mail, mail_body, response
+
+        new_contents = list()
+        deleted_mail_pks = list()
+        try:
+            for mail, mail_body, _response in self._fetch_esi_concurrently(
+                fetch_mail_body, mails
+            ):
+                if mail_body is None:
+                    deleted_mail_pks.append(mail.pk)
+                else:
+                    new_contents.append(
+                        MailContent(id=mail.mail_id, body=mail_body.get("body", ""))
+                    )
+                    if MEMBERAUDIT_DEVELOPER_MODE:
+                        self._store_list_to_disk(mail_body, "mail_body")
+
+        finally:
+            if new_contents:
+                try:
+                    MailContent.objects.render_html(new_contents)
+                except (HTTPError, OSError):
+                    logger.warning(
+                        "%s: Failed to render mail bodies. Will try again on view.",
+                        self,
+                        exc_info=True,
+                    )
+                with transaction.atomic():
+                    MailContent.objects.bulk_create(
+                        new_contents,
+                        batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
+                        ignore_conflicts=True,
+                    )
+                    CharacterMail.objects.filter(
+                        mail_id__in=[obj.id for obj in new_contents],
+                        content__isnull=True,
+                    ).update(content=F("mail_id"))
+            if deleted_mail_pks:
+                logger.info(
+                    "%s: %s mails were deleted in game. Removing mail headers.",
+                    self,
+                    len(deleted_mail_pks),
+                )
+                self.mails.filter(pk__in=deleted_mail_pks).delete()
 
     @fetch_token_for_character("esi-location.read_online.v1")
     def update_online_status(self, token):
@@ -868,7 +1528,7 @@ class Character(models.Model):
 
         logger.info("%s: Fetching online status from ESI", self)
         online_info = esi.client.Location.get_characters_character_id_online(
-            character_id=self.character_ownership.character.character_id,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
         ).results()
         CharacterOnlineStatus.objects.update_or_create(
@@ -884,10 +1544,17 @@ class Character(models.Model):
     def update_skill_queue(self, token: Token, force_update: bool = False):
         """update the character's skill queue"""
         logger.info("%s: Fetching skill queue from ESI", self)
-        skillqueue = esi.client.Skills.get_characters_character_id_skillqueue(
-            character_id=self.character_ownership.character.character_id,
+        skillqueue = self._fetch_esi_conditional(
+            esi.client.Skills.get_characters_character_id_skillqueue,
+            section=self.UpdateSection.SKILL_QUEUE,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if skillqueue is None:
+            logger.info("%s: Skill queue has not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(skillqueue, "skill_queue")
 
@@ -902,36 +1569,90 @@ class Character(models.Model):
         else:
             logger.info("%s: Skill queue has not changed", self)
 
-    def update_skill_sets(self):
+    def update_skill_sets(self, force_update: bool = False):
         """Checks if character has the skills needed for skill sets
         and updates results in database
+
+        Only skill sets which reference a skill changed by the last skill update
+        and skill sets not yet checked for this character are checked,
+        unless forced or the changed skills are not known.
+        """
+        changed_skill_type_ids = cache.get(self._changed_skill_types_cache_key())
+        if force_update or changed_skill_type_ids is None:
+            self.skill_set_checks.update_for_character(self)
+        else:
+            skill_set_ids = SkillSetSkill.objects.skill_set_ids_for_skill_types(
+                changed_skill_type_ids
+            )
+            skill_set_ids |= set(
+                SkillSet.objects.exclude(
+                    pk__in=self.skill_set_checks.values("skill_set_id")
+                ).values_list("pk", flat=True)
+            )
+            if skill_set_ids:
+                self.skill_set_checks.update_for_characters([self.pk], skill_set_ids)
+            else:
+                logger.info("%s: No skill sets affected by skill changes", self)
+
+        cache.delete(self._changed_skill_types_cache_key())
+
+    def _changed_skill_types_cache_key(self) -> str:
+        return f"MEMBERAUDIT_CHANGED_SKILL_TYPES_{self.pk}"
+
+    def _record_changed_skill_types(self, eve_type_ids: set) -> None:
+        """records skill types which active level changed
+        until the skill sets of this character are checked next
         """
-        self.skill_set_checks.update_for_character(self)
+        key = self._changed_skill_types_cache_key()
+        changed_skill_type_ids = cache.get(key)
+        if changed_skill_type_ids is not None:
+            eve_type_ids = set(eve_type_ids) | changed_skill_type_ids
+        cache.set(
+            key,
+            set(eve_type_ids),
+            timeout=MEMBERAUDIT_CHANGED_SKILL_TYPES_CACHE_TIMEOUT,
+        )
 
     @fetch_token_for_character("esi-skills.read_skills.v1")
     def update_skills(self, token, force_update: bool = False):
         """update the character's skill"""
-        skills_list = self._fetch_skills_from_esi(token)
+        skills_list = self._fetch_skills_from_esi(token, force_update)
+        if skills_list is None:
+            logger.info("%s: Skills have not changed", self)
+            self._record_changed_skill_types(set())
+            return
+
         if force_update or self.has_section_changed(
             section=self.UpdateSection.SKILLS, content=skills_list
         ):
             self._preload_types(skills_list)
-            self.skills.update_for_character(self, skills_list)
+            changed_skill_type_ids = self.skills.update_for_character(self, skills_list)
             self.update_section_content_hash(
                 section=self.UpdateSection.SKILLS, content=skills_list
             )
 
         else:
             logger.info("%s: Skills have not changed", self)
+            changed_skill_type_ids = set()
 
-    def _fetch_skills_from_esi(self, token: Token) -> dict:
+        self._record_changed_skill_types(changed_skill_type_ids)
+
+    def _fetch_skills_from_esi(
+        self, token: Token, force_update: bool = False
+    ) -> Optional[dict]:
         from .sections import CharacterSkillpoints
 
         logger.info("%s: Fetching skills from ESI", self)
-        skills_info = esi.client.Skills.get_characters_character_id_skills(
-            character_id=self.character_ownership.character.character_id,
+        skills_info = self._fetch_esi_conditional(
+            esi.client.Skills.get_characters_character_id_skills,
+            section=self.UpdateSection.SKILLS,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if skills_info is None:
+            return None
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(skills_info, "skills")
 
@@ -967,7 +1688,7 @@ class Character(models.Model):
 
         logger.info("%s: Fetching wallet balance from ESI", self)
         balance = esi.client.Wallet.get_characters_character_id_wallet(
-            character_id=self.character_ownership.character.character_id,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
         ).results()
         if MEMBERAUDIT_DEVELOPER_MODE:
@@ -978,39 +1699,61 @@ class Character(models.Model):
         )
 
     @fetch_token_for_character("esi-wallet.read_character_wallet.v1")
-    def update_wallet_journal(self, token):
+    def update_wallet_journal(self, token, force_update: bool = False):
         """syncs the character's wallet journal
 
         Note: Does not update unknown EvEntities.
         """
         logger.info("%s: Fetching wallet journal from ESI", self)
-        journal = esi.client.Wallet.get_characters_character_id_wallet_journal(
-            character_id=self.character_ownership.character.character_id,
+        journal = self._fetch_esi_conditional(
+            esi.client.Wallet.get_characters_character_id_wallet_journal,
+            section=self.UpdateSection.WALLET_JOURNAL,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        cutoff_datetime = data_retention_cutoff()
+        if journal is None:
+            logger.info("%s: Wallet journal has not changed", self)
+            if cutoff_datetime:
+                self.wallet_journal.filter(date__lt=cutoff_datetime).delete()
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(journal, "wallet_journal")
 
-        self.wallet_journal.update_for_character(self, data_retention_cutoff(), journal)
+        self.wallet_journal.update_for_character(self, cutoff_datetime, journal)
+        self.update_section_content_etags(section=self.UpdateSection.WALLET_JOURNAL)
 
     @fetch_token_for_character("esi-wallet.read_character_wallet.v1")
-    def update_wallet_transactions(self, token):
+    def update_wallet_transactions(self, token, force_update: bool = False):
         """syncs the character's wallet transactions"""
         logger.info("%s: Fetching wallet transactions from ESI", self)
-        transactions = (
-            esi.client.Wallet.get_characters_character_id_wallet_transactions(
-                character_id=self.character_ownership.character.character_id,
-                token=token.valid_access_token(),
-            ).results()
+        transactions = self._fetch_esi_conditional(
+            esi.client.Wallet.get_characters_character_id_wallet_transactions,
+            section=self.UpdateSection.WALLET_TRANSACTIONS,
+            force_update=force_update,
+            character_id=self.eve_character_id,
+            token=token.valid_access_token(),
         )
+        cutoff_datetime = data_retention_cutoff()
+        if transactions is None:
+            logger.info("%s: Wallet transactions have not changed", self)
+            if cutoff_datetime:
+                self.wallet_transactions.filter(date__lt=cutoff_datetime).delete()
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(transactions, "wallet_transactions")
         self.wallet_transactions.update_for_character(
             character=self,
-            cutoff_datetime=data_retention_cutoff(),
+            cutoff_datetime=cutoff_datetime,
             transactions=transactions,
             token=token,
         )
+        self.update_section_content_etags(
+            section=self.UpdateSection.WALLET_TRANSACTIONS
+        )
 
     def _store_list_to_disk(self, lst: list, name: str):
         """stores the given list as JSON file to disk. For debugging
@@ -1077,10 +1820,17 @@ class Character(models.Model):
         logger.info("%s: Fetching attributes from ESI", self)
         from .sections import CharacterAttributes
 
-        attribute_data = esi.client.Skills.get_characters_character_id_attributes(
-            character_id=self.character_ownership.character.character_id,
+        attribute_data = self._fetch_esi_conditional(
+            esi.client.Skills.get_characters_character_id_attributes,
+            section=self.UpdateSection.ATTRIBUTES,
+            force_update=force_update,
+            character_id=self.eve_character_id,
             token=token.valid_access_token(),
-        ).results()
+        )
+        if attribute_data is None:
+            logger.info("%s: Attributes have not changed", self)
+            return
+
         if MEMBERAUDIT_DEVELOPER_MODE:
             self._store_list_to_disk(attribute_data, "attributes")
 
@@ -1088,6 +1838,9 @@ class Character(models.Model):
             section=self.UpdateSection.ATTRIBUTES, content=attribute_data
         ):
             CharacterAttributes.objects.update_for_character(self, attribute_data)
+            self.update_section_content_hash(
+                section=self.UpdateSection.ATTRIBUTES, content=attribute_data
+            )
         else:
             logger.info("%s: Attributes have not changed", self)
 
@@ -1110,6 +1863,26 @@ class CharacterUpdateStatus(models.Model):
     content_hash_1 = models.CharField(max_length=32, default="")
     content_hash_2 = models.CharField(max_length=32, default="")
     content_hash_3 = models.CharField(max_length=32, default="")
+    content_etags_1 = models.TextField(
+        default="", help_text="ETags of the ESI responses for content 1 as JSON"
+    )
+    content_etags_2 = models.TextField(
+        default="", help_text="ETags of the ESI responses for content 2 as JSON"
+    )
+    content_etags_3 = models.TextField(
+        default="", help_text="ETags of the ESI responses for content 3 as JSON"
+    )
+    not_modified_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of times ESI reported the content as not modified",
+    )
+    not_modified_bytes = models.PositiveBigIntegerField(
+        default=0,
+        help_text=(
+            "Number of bytes that did not need to be downloaded again, "
+            "because ESI reported the content as not modified"
+        ),
+    )
     last_error_message = models.TextField()
     root_task_id = models.CharField(
         max_length=36,
@@ -1125,6 +1898,20 @@ class CharacterUpdateStatus(models.Model):
     )
     started_at = models.DateTimeField(null=True, default=None, db_index=True)
     finished_at = models.DateTimeField(null=True, default=None, db_index=True)
+    expires_at = models.DateTimeField(
+        null=True,
+        default=None,
+        help_text="Time when the data for this section expires on ESI",
+    )
+    changed_at = models.DateTimeField(
+        null=True,
+        default=None,
+        help_text="Last time the content of this section changed",
+    )
+    unchanged_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of consecutive updates in which the content did not change",
+    )
 
     objects = CharacterUpdateStatusManager()
 
@@ -1159,17 +1946,99 @@ class CharacterUpdateStatus(models.Model):
 
         return new_hash != content_hash
 
-    def update_content_hash(self, content: Any, hash_num: int = 1):
+    def update_content_hash(self, content: Any, hash_num: int = 1, etags: list = None):
+        """updates the content hash and the ETags of the ESI responses for it"""
         new_hash = self._calculate_hash(content)
+        content_etags = json.dumps(etags) if etags else ""
+        self.changed_at = now()
+        self.unchanged_count = 0
         if hash_num == 2:
             self.content_hash_2 = new_hash
+            self.content_etags_2 = content_etags
         elif hash_num == 3:
             self.content_hash_3 = new_hash
+            self.content_etags_3 = content_etags
         else:
             self.content_hash_1 = new_hash
+            self.content_etags_1 = content_etags
 
         self.save()
 
+    def content_etags(self, hash_num: int = 1) -> list:
+        """returns the ETags of the ESI responses for the given content
+
+        Returns a list of ETag and size in bytes for each page
+        """
+        if hash_num == 2:
+            content_etags = self.content_etags_2
+        elif hash_num == 3:
+            content_etags = self.content_etags_3
+        else:
+            content_etags = self.content_etags_1
+
+        return json.loads(content_etags) if content_etags else []
+
+    def update_content_etags(self, etags: list, hash_num: int = 1):
+        """updates the ETags of the ESI responses for the given content"""
+        content_etags = json.dumps(etags) if etags else ""
+        if hash_num == 2:
+            self.content_etags_2 = content_etags
+            update_fields = ["content_etags_2"]
+        elif hash_num == 3:
+            self.content_etags_3 = content_etags
+            update_fields = ["content_etags_3"]
+        else:
+            self.content_etags_1 = content_etags
+            update_fields = ["content_etags_1"]
+
+        self.save(update_fields=update_fields)
+
+    def update_expires_at(self, expires_headers: list) -> None:
+        """updates time when data for this section expires on ESI
+        from the given Expires headers of ESI responses.
+
+        Will use the latest time, when a section is fetched from multiple responses.
+        """
+        expires = list()
+        for header in expires_headers:
+            try:
+                expires.append(parsedate_to_datetime(header))
+            except (TypeError, ValueError):
+                pass
+
+        if not expires:
+            return
+
+        expires_at = max(expires)
+        if self.expires_at and self.expires_at > expires_at:
+            return
+
+        self.expires_at = expires_at
+        CharacterUpdateStatus.objects.filter(pk=self.pk).update(expires_at=expires_at)
+
+    def update_unchanged_count(self) -> None:
+        """updates the number of consecutive updates without content changes
+
+        Should be called after a successful update.
+        Sections without content hash are not tracked.
+        """
+        if not any([self.content_hash_1, self.content_hash_2, self.content_hash_3]):
+            return
+
+        if self.changed_at and self.started_at and self.changed_at >= self.started_at:
+            self.unchanged_count = 0
+        else:
+            self.unchanged_count += 1
+
+        self.save(update_fields=["unchanged_count"])
+
+    def record_not_modified(self, bytes_count: int) -> None:
+        """records that ESI reported the content as not modified"""
+        CharacterUpdateStatus.objects.filter(pk=self.pk).update(
+            not_modified_count=F("not_modified_count") + 1,
+            not_modified_bytes=F("not_modified_bytes") + bytes_count,
+        )
+
     @staticmethod
     def _calculate_hash(content: Any) -> str:
         return hashlib.md5(
@@ -1182,6 +2051,7 @@ class CharacterUpdateStatus(models.Model):
         self.last_error_message = ""
         self.started_at = now()
         self.finished_at = None
+        self.expires_at = None
         self.root_task_id = root_task_id if root_task_id else ""
-        self.parent_task_id = parent_task_id if root_task_id else ""
+        self.parent_task_id = parent_task_id if parent_task_id else ""
         self.save()
@@ -6,6 +6,7 @@ from django.contrib.auth.models import Permission, User
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 from eveuniverse.models import EveEntity, EveSolarSystem, EveType
 
@@ -15,11 +16,14 @@ from app_utils.django import users_with_permission
 from app_utils.logging import LoggerAddTag
 
 from .. import __title__
+from ..core.xml_converter import XML_CONVERTER_VERSION
 from ..managers.general import (
     EveShipTypeManger,
     EveSkillTypeManger,
     LocationManager,
+    MailContentManager,
     MailEntityManager,
+    SkillSetSkillManager,
 )
 from .constants import NAMES_MAX_LENGTH
 
@@ -293,6 +297,8 @@ class SkillSetSkill(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(5)],
     )
 
+    objects = SkillSetSkillManager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -369,3 +375,31 @@ class MailEntity(models.Model):
 
         else:
             return ""
+
+
+class MailContent(models.Model):
+    """Content of a mail, which is shared by all characters that received it"""
+
+    id = models.PositiveIntegerField(primary_key=True, help_text="ID of the mail")
+    body = models.TextField()
+    body_html = models.TextField(default="", help_text="body rendered as HTML")
+    body_html_version = models.PositiveIntegerField(
+        default=0, help_text="converter version the HTML was rendered with"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = MailContentManager()
+
+    class Meta:
+        default_permissions = ()
+
+    def __str__(self) -> str:
+        return str(self.id)
+
+    def get_body_html(self) -> str:
+        """returns the body as HTML and renders it again when it is outdated"""
+        if self.body_html_version != XML_CONVERTER_VERSION:
+            MailContent.objects.render_html([self])
+            self.save(update_fields=["body_html", "body_html_version"])
+
+        return mark_safe(self.body_html)
@@ -699,7 +699,14 @@ class CharacterMail(models.Model):
     )
     mail_id = models.PositiveIntegerField(db_index=True)
 
-    body = models.TextField()
+    content = models.ForeignKey(
+        "MailContent",
+        on_delete=models.SET_NULL,
+        null=True,
+        default=None,
+        related_name="mails",
+        help_text="content of this mail, which is shared with other characters",
+    )
     is_read = models.BooleanField(null=True, default=None, db_index=True)
     labels = models.ManyToManyField("CharacterMailLabel", related_name="mails")
     recipients = models.ManyToManyField("MailEntity", related_name="recipient_mails")
@@ -727,10 +734,15 @@ class CharacterMail(models.Model):
     def __str__(self) -> str:
         return f"{self.character}-{self.mail_id}"
 
+    @property
+    def body(self) -> str:
+        """returns the body or an empty string if it has not been fetched yet"""
+        return self.content.body if self.content else ""
+
     @property
     def body_html(self) -> str:
         """returns the body as html"""
-        return eve_xml_to_html(self.body)
+        return self.content.get_body_html() if self.content else ""
 
 
 class CharacterMailLabel(models.Model):
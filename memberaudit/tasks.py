@@ -1,10 +1,14 @@
+import datetime as dt
 import inspect
 import random
-from typing import Optional
+import uuid
+from typing import Optional, Tuple
 
 from bravado.exception import HTTPBadGateway, HTTPGatewayTimeout, HTTPServiceUnavailable
-from celery import chain, shared_task
+from celery import chain, group, shared_task
+from celery.signals import task_postrun
 
+from django.core.cache import cache
 from django.db import transaction
 from django.utils.timezone import now
 from esi.models import Token
@@ -12,25 +16,45 @@ from eveuniverse.models import EveEntity, EveMarketPrice
 
 from allianceauth.services.hooks import get_extension_logger
 from allianceauth.services.tasks import QueueOnce
-from app_utils.esi import EsiErrorLimitExceeded, EsiOffline, fetch_esi_status
+from app_utils.esi import EsiErrorLimitExceeded, EsiOffline
+from app_utils.helpers import chunks
 from app_utils.logging import LoggerAddTag
 
 from . import __title__
 from .app_settings import (
     MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
     MEMBERAUDIT_LOG_UPDATE_STATS,
-    MEMBERAUDIT_TASKS_MAX_ASSETS_PER_PASS,
+    MEMBERAUDIT_TASKS_MAX_CHARACTERS_PER_SKILL_CHECK,
+    MEMBERAUDIT_TASKS_MAX_CONTRACTS_PER_TASK,
+    MEMBERAUDIT_TASKS_MAX_MAIL_BODIES_PER_TASK,
     MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT,
+    MEMBERAUDIT_TASKS_PUBLISH_BATCH_SIZE,
+    MEMBERAUDIT_TASKS_SPREAD_RATE,
+    MEMBERAUDIT_TASKS_SPREAD_UPDATES,
+    MEMBERAUDIT_TASKS_STAGING_TIMEOUT,
     MEMBERAUDIT_TASKS_TIME_LIMIT,
+    MEMBERAUDIT_UPDATE_STALE_OFFSET,
+    MEMBERAUDIT_UPDATE_STALE_RING_1,
     MEMBERAUDIT_UPDATE_STALE_RING_2,
 )
+from .core import esi_governor
+from .core.asset_tree import build_asset_tree
+from .core.staging import (
+    delete_staged_list,
+    fetch_staged_list,
+    make_staging_key,
+    stage_list,
+)
+from .core.task_lanes import LANE_BULK, LANE_DEFAULT, LANE_FAST, lane_options
+from .core.update_context import CharacterUpdateContext, flush_avoided_queries
 from .models import (
     Character,
     CharacterAsset,
     CharacterContract,
-    CharacterMail,
+    CharacterSkillSetCheck,
     CharacterUpdateStatus,
     Location,
+    MailContent,
     MailEntity,
 )
 
@@ -38,6 +62,21 @@ logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
 DEFAULT_TASK_PRIORITY = 6
 
+# cache key for PKs of characters which updates have been deferred to the next run
+DEFERRED_CHARACTER_PKS_KEY = "MEMBERAUDIT_UPDATE_DEFERRED_CHARACTER_PKS"
+
+# fields of character assets which are synced with ESI
+ASSET_SYNC_FIELDS = [
+    "location_id",
+    "parent_id",
+    "eve_type_id",
+    "name",
+    "is_blueprint_copy",
+    "is_singleton",
+    "location_flag",
+    "quantity",
+]
+
 # params for all tasks
 TASK_DEFAULT_KWARGS = {
     "time_limit": MEMBERAUDIT_TASKS_TIME_LIMIT,
@@ -62,9 +101,12 @@ TASK_ESI_KWARGS = {
 
 
 def _retry_if_esi_is_down(self):
-    """Retries the task if ESI is not online or not within the error threshold"""
+    """Retries the task if ESI is not online or not within the error threshold
+
+    Uses the ESI status shared by all workers, so this does not need a request to ESI
+    """
     try:
-        fetch_esi_status().raise_for_status()
+        esi_governor.raise_for_status()
     except EsiOffline as ex:
         countdown = (10 + int(random.uniform(1, 10))) * 60
         logger.warning(
@@ -83,37 +125,290 @@ def run_regular_updates(self) -> None:
     """Main task to be run on a regular basis to keep everyting updated and running"""
     _retry_if_esi_is_down(self)
     update_market_prices.apply_async(priority=DEFAULT_TASK_PRIORITY)
-    update_all_characters.apply_async(priority=DEFAULT_TASK_PRIORITY)
+    delete_orphaned_mail_contents.apply_async(priority=DEFAULT_TASK_PRIORITY)
+    # update_all_characters receives the PKs of characters with changed affiliation
+    chain(update_characters_affiliations.si(), update_all_characters.s()).apply_async(
+        priority=DEFAULT_TASK_PRIORITY
+    )
 
 
 @shared_task(**TASK_DEFAULT_KWARGS)
-def update_all_characters(force_update: bool = False) -> None:
+def update_all_characters(
+    affiliation_changed_pks: list = None, force_update: bool = False
+) -> None:
     """Start the update of all registered characters
 
     Args:
+    - affiliation_changed_pks: PKs of characters which affiliation sections
+    have already been started by update_characters_affiliations.
+    None when there are no such characters, e.g. because the check failed.
     - force_update: When set to True will always update regardless of stale status
     """
     if MEMBERAUDIT_LOG_UPDATE_STATS:
         stats = CharacterUpdateStatus.objects.statistics()
         logger.info(f"Update statistics: {stats}")
 
-    for character_pk in Character.objects.values_list("pk", flat=True):
-        update_character.apply_async(
-            kwargs={"character_pk": character_pk, "force_update": force_update},
-            priority=DEFAULT_TASK_PRIORITY,
+    if MEMBERAUDIT_TASKS_SPREAD_UPDATES:
+        offsets = _calc_update_slot_offsets(
+            Character.objects.values_list("pk", flat=True)
+        )
+    else:
+        offsets = dict()
+
+    if force_update:
+        all_sections = set(Character.UpdateSection.values)
+        stale_sections_map = {
+            character_pk: all_sections
+            for character_pk in Character.objects.values_list("pk", flat=True)
+        }
+    else:
+        stale_sections_map = Character.objects.stale_sections_map(offsets)
+        for character_pk in affiliation_changed_pks or []:
+            sections = stale_sections_map.get(character_pk, set()).difference(
+                Character.AFFILIATION_SECTIONS
+            )
+            if sections:
+                stale_sections_map[character_pk] = sections
+            else:
+                stale_sections_map.pop(character_pk, None)
+
+    if MEMBERAUDIT_TASKS_SPREAD_UPDATES:
+        countdowns, deferred_pks = _calc_update_countdowns(
+            stale_sections_map, offsets, cache.get(DEFERRED_CHARACTER_PKS_KEY, [])
+        )
+        for character_pk in deferred_pks:
+            del stale_sections_map[character_pk]
+        cache.set(DEFERRED_CHARACTER_PKS_KEY, deferred_pks, timeout=None)
+    else:
+        countdowns = dict()
+
+    run_id = _new_run_id()
+    logger.info(
+        "Starting update run %s for %d characters", run_id, len(stale_sections_map)
+    )
+    _publish_in_batches(
+        [
+            update_character.signature(
+                kwargs={
+                    "character_pk": character_pk,
+                    "force_update": force_update,
+                    "sections": sorted(sections),
+                    "run_id": run_id,
+                },
+                priority=DEFAULT_TASK_PRIORITY,
+                countdown=countdowns.get(character_pk),
+            )
+            for character_pk, sections in stale_sections_map.items()
+        ]
+    )
+
+
+@shared_task(**TASK_DEFAULT_KWARGS)
+def update_characters(character_pks: list, force_update: bool = False) -> None:
+    """Start the update of the given characters
+
+    Args:
+    - character_pks: PKs of characters to update
+    - force_update: When set to True will always update regardless of stale status
+    """
+    run_id = _new_run_id()
+    logger.info("Starting update run %s for %d characters", run_id, len(character_pks))
+    _publish_in_batches(
+        [
+            update_character.signature(
+                kwargs={
+                    "character_pk": character_pk,
+                    "force_update": force_update,
+                    "run_id": run_id,
+                },
+                priority=DEFAULT_TASK_PRIORITY,
+            )
+            for character_pk in character_pks
+        ]
+    )
+
+
+@shared_task(**TASK_DEFAULT_KWARGS)
+def update_characters_affiliations() -> Optional[list]:
+    """Check the affiliations of all registered characters in bulk
+
+    Character details and corporation history are updated right away
+    for characters which affiliation changed. For all other characters
+    the corporation history is marked as fresh.
+
+    Returns the PKs of characters which affiliation changed
+    or None if the check failed, so the regular update can still run.
+    """
+    try:
+        changed_pks = sorted(Character.objects.all().update_affiliations())
+    except Exception:
+        logger.error(
+            "Failed to check affiliations of characters. "
+            "Affiliation sections will be updated with the regular update.",
+            exc_info=True,
         )
+        return None
+
+    if not changed_pks:
+        return changed_pks
+
+    run_id = _new_run_id()
+    logger.info(
+        "Starting update run %s for %d characters with changed affiliation",
+        run_id,
+        len(changed_pks),
+    )
+    _publish_in_batches(
+        [
+            update_character_section.signature(
+                kwargs={
+                    "character_pk": character_pk,
+                    "section": section,
+                    "root_task_id": run_id,
+                },
+                **_section_lane_options(section),
+            )
+            for character_pk in changed_pks
+            for section in sorted(Character.AFFILIATION_SECTIONS)
+        ]
+    )
+    return changed_pks
+
+
+def _new_run_id() -> str:
+    """returns a new ID for identifying all tasks of an update run"""
+    return uuid.uuid4().hex
+
+
+def _publish_in_batches(signatures: list) -> None:
+    """publishes the given tasks to the broker in batches
+
+    All tasks of a batch are published as group over the same connection,
+    which is much faster than publishing each task on its own.
+    """
+    for signatures_chunk in chunks(signatures, MEMBERAUDIT_TASKS_PUBLISH_BATCH_SIZE):
+        group(signatures_chunk).apply_async(add_to_parent=False)
+
+
+def _update_window_seconds() -> int:
+    """returns the length of the window for spreading updates in seconds
+
+    This is the update window of ring 1, which ends before the next regular run.
+    """
+    return (MEMBERAUDIT_UPDATE_STALE_RING_1 - MEMBERAUDIT_UPDATE_STALE_OFFSET) * 60
+
+
+def _calc_update_slot_offsets(character_pks) -> dict:
+    """returns the offset of the stable update slot for each character
+
+    Slots are spread evenly across the update window of ring 1.
+    """
+    window_seconds = _update_window_seconds()
+    offsets = dict()
+    for character_pk in character_pks:
+        # multiplicative hashing gives stable and well distributed slots
+        fraction = (character_pk * 2654435761 % 2 ** 32) / 2 ** 32
+        offsets[character_pk] = dt.timedelta(seconds=int(fraction * window_seconds))
+
+    return offsets
+
+
+def _calc_update_countdowns(
+    stale_sections_map: dict, offsets: dict, deferred_pks: list = None
+) -> Tuple[dict, list]:
+    """returns the countdown in seconds for starting the update of each character
+    and the PKs of characters which updates are deferred to the next run
+
+    Characters are started at their slot, but no more section tasks are released
+    per second than defined by MEMBERAUDIT_TASKS_SPREAD_RATE.
+
+    All characters are started within the update window,
+    so no update is still waiting when the next regular run starts.
+    When the rate does not allow this, the remaining characters are deferred
+    to the next run, where they are started first.
+    """
+    window_seconds = _update_window_seconds()
+    deferred_pks = set(deferred_pks or [])
+
+    def earliest_start(character_pk) -> float:
+        if character_pk in deferred_pks:
+            return 0
+        return offsets[character_pk].total_seconds()
+
+    countdowns = dict()
+    next_deferred_pks = list()
+    next_release = 0
+    for character_pk in sorted(
+        stale_sections_map.keys(),
+        key=lambda pk: (pk not in deferred_pks, earliest_start(pk), pk),
+    ):
+        countdown = max(earliest_start(character_pk), next_release)
+        if countdown > window_seconds:
+            next_deferred_pks.append(character_pk)
+            continue
+        countdowns[character_pk] = round(countdown)
+        next_release = countdown + (
+            len(stale_sections_map[character_pk]) / MEMBERAUDIT_TASKS_SPREAD_RATE
+        )
+
+    if next_deferred_pks:
+        logger.warning(
+            "Update rate is too low to start all updates within the update window. "
+            "Deferring updates of %d characters to the next run.",
+            len(next_deferred_pks),
+        )
+    if countdowns:
+        logger.info(
+            "Spreading updates of %d characters across %d seconds",
+            len(countdowns),
+            max(countdowns.values()),
+        )
+    return countdowns, sorted(next_deferred_pks)
+
+
+def _section_lane_options(section: str) -> dict:
+    """returns the options for starting the update tasks of a section"""
+    if section == Character.UpdateSection.ASSETS:
+        return lane_options(LANE_BULK)
+    if Character.UPDATE_SECTION_RINGS_MAP[section] == 1:
+        return lane_options(LANE_FAST)
+    return lane_options(LANE_DEFAULT)
+
+
+def _apply_chain_in_lane(lane: str, *signatures, link_error=None) -> None:
+    """starts a chain of tasks with all tasks in the given lane
+
+    link_error is an optional task, which is started when a task of the chain fails.
+    """
+    options = lane_options(lane)
+    chain_options = {**options, "link_error": link_error} if link_error else options
+    chain(*[signature.set(**options) for signature in signatures]).apply_async(
+        **chain_options
+    )
 
 
 # Main character update tasks
 
 
 @shared_task(**{**TASK_DEFAULT_KWARGS, **{"bind": True}})
-def update_character(self, character_pk: int, force_update: bool = False) -> bool:
+def update_character(
+    self,
+    character_pk: int,
+    force_update: bool = False,
+    sections: list = None,
+    run_id: str = None,
+) -> bool:
     """Start respective update tasks for all stale sections of a character
 
     Args:
     - character_pk: PL of character to update
     - force_update: When set to True will always update regardless of stale status
+    - sections: Sections known to be stale. Will determine stale sections if not given
+    - run_id: ID of the update run this update belongs to.
+    Will use the ID of the parent task if not given
+
+    The ownership and token of the character are looked up once and passed on
+    to all section tasks as update context.
 
     Returns:
     - True when update was conducted
@@ -123,18 +418,27 @@ def update_character(self, character_pk: int, force_update: bool = False) -> boo
         pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
     )
     all_sections = set(Character.UpdateSection.values)
-    needs_update = force_update
-    for section in all_sections:
-        needs_update |= character.is_update_section_stale(section)
+    if force_update:
+        stale_sections = all_sections
+    elif sections is not None:
+        stale_sections = all_sections.intersection(sections)
+    else:
+        stale_sections = {
+            section
+            for section in all_sections
+            if character.is_update_section_stale(section)
+        }
 
-    if not needs_update:
+    if not stale_sections:
         logger.info("%s: No update required", character)
         return False
 
     logger.info(
         "%s: Starting %s character update", character, "forced" if force_update else ""
     )
-    sections = all_sections.difference(
+    root_task_id = run_id or self.request.parent_id
+    update_context = character.build_update_context().asdict()
+    generic_sections = stale_sections.difference(
         {
             Character.UpdateSection.ASSETS,
             Character.UpdateSection.MAILS,
@@ -145,100 +449,100 @@ def update_character(self, character_pk: int, force_update: bool = False) -> boo
             Character.UpdateSection.WALLET_JOURNAL,
         }
     )
-    for section in sorted(sections):
-        if force_update or character.is_update_section_stale(section):
-            update_character_section.apply_async(
-                kwargs={
-                    "character_pk": character.pk,
-                    "section": section,
-                    "force_update": force_update,
-                    "root_task_id": self.request.parent_id,
-                    "parent_task_id": self.request.id,
-                },
-                priority=DEFAULT_TASK_PRIORITY,
-            )
+    for section in sorted(generic_sections):
+        update_character_section.apply_async(
+            kwargs={
+                "character_pk": character.pk,
+                "section": section,
+                "force_update": force_update,
+                "root_task_id": root_task_id,
+                "parent_task_id": self.request.id,
+                "update_context": update_context,
+            },
+            **_section_lane_options(section),
+        )
 
-    if force_update or character.is_update_section_stale(Character.UpdateSection.MAILS):
+    if Character.UpdateSection.MAILS in stale_sections:
         update_character_mails.apply_async(
             kwargs={
                 "character_pk": character.pk,
                 "force_update": force_update,
-                "root_task_id": self.request.parent_id,
+                "root_task_id": root_task_id,
                 "parent_task_id": self.request.id,
+                "update_context": update_context,
             },
-            priority=DEFAULT_TASK_PRIORITY,
+            **lane_options(LANE_DEFAULT),
         )
-    if force_update or character.is_update_section_stale(
-        Character.UpdateSection.CONTACTS
-    ):
+    if Character.UpdateSection.CONTACTS in stale_sections:
         update_character_contacts.apply_async(
             kwargs={
                 "character_pk": character.pk,
                 "force_update": force_update,
-                "root_task_id": self.request.parent_id,
+                "root_task_id": root_task_id,
                 "parent_task_id": self.request.id,
+                "update_context": update_context,
             },
-            priority=DEFAULT_TASK_PRIORITY,
+            **lane_options(LANE_DEFAULT),
         )
-    if force_update or character.is_update_section_stale(
-        Character.UpdateSection.CONTRACTS
-    ):
+    if Character.UpdateSection.CONTRACTS in stale_sections:
         update_character_contracts.apply_async(
             kwargs={
                 "character_pk": character.pk,
                 "force_update": force_update,
-                "root_task_id": self.request.parent_id,
+                "root_task_id": root_task_id,
                 "parent_task_id": self.request.id,
+                "update_context": update_context,
             },
-            priority=DEFAULT_TASK_PRIORITY,
+            **lane_options(LANE_DEFAULT),
         )
 
-    if force_update or character.is_update_section_stale(
-        Character.UpdateSection.WALLET_JOURNAL
-    ):
+    if Character.UpdateSection.WALLET_JOURNAL in stale_sections:
         update_character_wallet_journal.apply_async(
             kwargs={
                 "character_pk": character.pk,
-                "root_task_id": self.request.parent_id,
+                "force_update": force_update,
+                "root_task_id": root_task_id,
                 "parent_task_id": self.request.id,
+                "update_context": update_context,
             },
-            priority=DEFAULT_TASK_PRIORITY,
+            **lane_options(LANE_DEFAULT),
         )
 
-    if force_update or character.is_update_section_stale(
-        Character.UpdateSection.ASSETS
-    ):
+    if Character.UpdateSection.ASSETS in stale_sections:
         update_character_assets.apply_async(
             kwargs={
                 "character_pk": character.pk,
                 "force_update": force_update,
-                "root_task_id": self.request.parent_id,
+                "root_task_id": root_task_id,
                 "parent_task_id": self.request.id,
+                "update_context": update_context,
             },
-            priority=DEFAULT_TASK_PRIORITY,
+            **_section_lane_options(Character.UpdateSection.ASSETS),
         )
 
     if (
-        force_update
-        or character.is_update_section_stale(Character.UpdateSection.SKILLS)
-        or character.is_update_section_stale(Character.UpdateSection.SKILL_SETS)
+        Character.UpdateSection.SKILLS in stale_sections
+        or Character.UpdateSection.SKILL_SETS in stale_sections
     ):
-        chain(
+        _apply_chain_in_lane(
+            LANE_DEFAULT,
             update_character_section.si(
                 character.pk,
                 Character.UpdateSection.SKILLS,
                 force_update,
-                self.request.parent_id,
+                root_task_id,
                 self.request.id,
+                update_context,
             ),
             update_character_section.si(
                 character.pk,
                 Character.UpdateSection.SKILL_SETS,
                 force_update,
-                self.request.parent_id,
+                root_task_id,
                 self.request.id,
+                update_context,
             ),
-        ).apply_async(priority=DEFAULT_TASK_PRIORITY)
+        )
 
     return True
 
@@ -246,6 +550,22 @@ def update_character(self, character_pk: int, force_update: bool = False) -> boo
 # Update sections
 
 
+def _get_character(character_pk: int, update_context: dict = None) -> Character:
+    """Returns the character for an update task with its update context if given"""
+    character = Character.objects.get_cached(
+        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
+    )
+    if update_context:
+        character.set_update_context(CharacterUpdateContext.from_dict(update_context))
+    return character
+
+
+@task_postrun.connect
+def _flush_update_context_stats(**kwargs) -> None:
+    """Flushes the queries avoided by update contexts once after each task"""
+    flush_avoided_queries()
+
+
 @shared_task(**{**TASK_ESI_KWARGS, **{"base": QueueOnce}})
 def update_character_section(
     self,
@@ -254,13 +574,12 @@ def update_character_section(
     force_update: bool = False,
     root_task_id: str = None,
     parent_task_id: str = None,
+    update_context: dict = None,
     **kwargs,
 ) -> None:
     """Task that updates the section of a character"""
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     character.reset_update_section(section, root_task_id, parent_task_id)
     logger.info(
         "%s: Updating %s", character, Character.UpdateSection.display_name(section)
@@ -287,26 +606,31 @@ def _character_update_with_error_logging(
     try:
         return method(*args, **kwargs)
     except Exception as ex:
-        error_message = f"{type(ex).__name__}: {str(ex)}"
-        logger.error(
-            "%s: %s: Error ocurred: %s",
-            character,
-            Character.UpdateSection.display_name(section),
-            error_message,
-            exc_info=True,
-        )
-        CharacterUpdateStatus.objects.update_or_create(
-            character=character,
-            section=section,
-            defaults={
-                "is_success": False,
-                "last_error_message": error_message,
-                "finished_at": now(),
-            },
-        )
+        _log_character_update_error(character, section, ex)
         raise ex
 
 
+def _log_character_update_error(character: Character, section: str, ex: Exception):
+    """Logs character update error for a section"""
+    error_message = f"{type(ex).__name__}: {str(ex)}"
+    logger.error(
+        "%s: %s: Error ocurred: %s",
+        character,
+        Character.UpdateSection.display_name(section),
+        error_message,
+        exc_info=True,
+    )
+    CharacterUpdateStatus.objects.update_or_create(
+        character=character,
+        section=section,
+        defaults={
+            "is_success": False,
+            "last_error_message": error_message,
+            "finished_at": now(),
+        },
+    )
+
+
 def _log_character_update_success(character: Character, section: str):
     """Logs character update success for a section"""
     logger.info(
@@ -314,24 +638,27 @@ def _log_character_update_success(character: Character, section: str):
         character,
         Character.UpdateSection.display_name(section),
     )
-    CharacterUpdateStatus.objects.update_or_create(
+    update_status, _ = CharacterUpdateStatus.objects.update_or_create(
         character=character,
         section=section,
         defaults={"is_success": True, "last_error_message": "", "finished_at": now()},
     )
+    update_status.update_unchanged_count()
 
 
 @shared_task(**TASK_ESI_KWARGS)
 def update_unresolved_eve_entities(
-    self, character_pk: int, section: str, last_in_chain: bool = False
+    self,
+    character_pk: int,
+    section: str,
+    last_in_chain: bool = False,
+    update_context: dict = None,
 ) -> None:
     """Bulk resolved all unresolved EveEntity objects in database and logs errors to respective section
 
     Optionally logs success for given update section
     """
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     _character_update_with_error_logging(
         self, character, section, EveEntity.objects.bulk_update_new_esi
     )
@@ -348,11 +675,14 @@ def update_character_assets(
     force_update: bool = False,
     root_task_id: str = None,
     parent_task_id: str = None,
+    update_context: dict = None,
 ) -> None:
-    """Main tasks for updating the character's assets"""
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    """Main tasks for updating the character's assets
+
+    The asset list is staged out-of-band and the tasks of the chain
+    only pass on the staging key.
+    """
+    character = _get_character(character_pk, update_context)
     logger.info(
         "%s: Updating %s",
         character,
@@ -363,22 +693,34 @@ def update_character_assets(
         root_task_id=root_task_id,
         parent_task_id=parent_task_id,
     )
-    chain(
-        assets_build_list_from_esi.s(character.pk, force_update),
-        assets_preload_objects.s(character.pk),
-        assets_create_parents.s(character.pk),
-    ).apply_async(priority=DEFAULT_TASK_PRIORITY)
+    staging_key = make_staging_key(
+        character.pk, Character.UpdateSection.ASSETS, uuid.uuid4().hex
+    )
+    _apply_chain_in_lane(
+        LANE_BULK,
+        assets_build_list_from_esi.s(
+            character.pk, force_update, staging_key, update_context
+        ),
+        assets_preload_objects.s(character.pk, update_context),
+        assets_create_tree.s(character.pk, update_context),
+        link_error=delete_staged_asset_list.si(staging_key),
+    )
 
 
 @shared_task(**TASK_ESI_KWARGS)
 def assets_build_list_from_esi(
-    self, character_pk: int, force_update: bool = False
-) -> dict:
-    """Building asset list"""
+    self,
+    character_pk: int,
+    force_update: bool = False,
+    staging_key: str = None,
+    update_context: dict = None,
+) -> Optional[str]:
+    """Building asset list and staging it
+
+    Returns the staging key or None if no update is required
+    """
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     asset_list = _character_update_with_error_logging(
         self,
         character,
@@ -386,18 +728,27 @@ def assets_build_list_from_esi(
         character.assets_build_list_from_esi,
         force_update,
     )
-    return asset_list
+    if asset_list is None:
+        return None
+
+    if not staging_key:
+        staging_key = make_staging_key(
+            character.pk, Character.UpdateSection.ASSETS, uuid.uuid4().hex
+        )
+    stage_list(staging_key, asset_list, timeout=MEMBERAUDIT_TASKS_STAGING_TIMEOUT)
+    return staging_key
 
 
 @shared_task(**TASK_ESI_KWARGS)
-def assets_preload_objects(self, asset_list: dict, character_pk: int) -> Optional[dict]:
+def assets_preload_objects(
+    self, staging_key: str, character_pk: int, update_context: dict = None
+) -> Optional[str]:
     """Task for preloading asset objects"""
-    if asset_list is None:
+    if staging_key is None:
         return None
 
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
+    asset_list = _fetch_staged_asset_list(self, character, staging_key)
     _character_update_with_error_logging(
         self,
         character,
@@ -405,171 +756,151 @@ def assets_preload_objects(self, asset_list: dict, character_pk: int) -> Optiona
         character.assets_preload_objects,
         asset_list,
     )
-    return asset_list
+    return staging_key
 
 
 @shared_task(**TASK_ESI_KWARGS)
-def assets_create_parents(
-    self, asset_list: list, character_pk: int, cycle: int = 1
+def assets_create_tree(
+    self, staging_key: str, character_pk: int, update_context: dict = None
 ) -> None:
-    """creates the parent assets from given asset_list
+    """creates the asset tree from the staged asset list
 
-    Parent assets are assets attached directly to a Location object (e.g. station)
-
-    This task will recursively call itself until all possible parent assets
-    from the asset list have been created.
-    Then call another task to create child assets.
+    The flat asset list is ordered into the levels of the asset tree in memory,
+    which are then written level by level with bulk inserts.
+    Parent assets of each level are resolved from a local map of their pks.
     """
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
-    if asset_list is None:
+    character = _get_character(character_pk, update_context)
+    if staging_key is None:
         _log_character_update_success(character, Character.UpdateSection.ASSETS)
         return
 
-    logger.info("%s: Creating parent assets - pass %s", character, cycle)
+    asset_list = _fetch_staged_asset_list(self, character, staging_key)
+    _character_update_with_error_logging(
+        self,
+        character,
+        Character.UpdateSection.ASSETS,
+        _assets_create_tree,
+        character,
+        asset_list,
+    )
+    delete_staged_list(staging_key)
+    _log_character_update_success(character, Character.UpdateSection.ASSETS)
+
 
-    assets_flat = {int(x["item_id"]): x for x in asset_list}
-    new_assets = list()
+def _assets_create_tree(character: Character, asset_list: list) -> None:
+    location_ids = Location.objects.ids_existing(
+        {x["location_id"] for x in asset_list if x.get("location_id")}
+    )
+    asset_tree = build_asset_tree(asset_list, location_ids)
+    logger.info(
+        "%s: Updating asset tree with %s assets in %s levels",
+        character,
+        asset_tree.assets_count,
+        len(asset_tree.levels),
+    )
     with transaction.atomic():
-        if cycle == 1:
-            character.assets.all().delete()
-
-        location_ids = set(Location.objects.values_list("id", flat=True))
-        parent_asset_ids = {
-            item_id
-            for item_id, asset_info in assets_flat.items()
-            if asset_info.get("location_id")
-            and asset_info["location_id"] in location_ids
+        existing_assets = {
+            obj.item_id: obj
+            for obj in character.assets.select_for_update().only(
+                "pk", "item_id", *ASSET_SYNC_FIELDS
+            )
         }
-        for item_id in parent_asset_ids:
-            item = assets_flat[item_id]
-            new_assets.append(
-                CharacterAsset(
-                    character=character,
-                    item_id=item_id,
-                    location_id=item["location_id"],
-                    eve_type_id=item.get("type_id"),
-                    name=item.get("name"),
-                    is_blueprint_copy=item.get("is_blueprint_copy"),
-                    is_singleton=item.get("is_singleton"),
-                    location_flag=item.get("location_flag"),
-                    quantity=item.get("quantity"),
-                )
+        item_pks = {item_id: obj.pk for item_id, obj in existing_assets.items()}
+        created_count = 0
+        updated_count = 0
+        for level_num, level in enumerate(asset_tree.levels):
+            new_assets = list()
+            changed_assets = list()
+            for item in level:
+                values = {
+                    "location_id": item["location_id"] if level_num == 0 else None,
+                    "parent_id": item_pks[item["location_id"]] if level_num else None,
+                    "eve_type_id": item.get("type_id"),
+                    "name": item.get("name"),
+                    "is_blueprint_copy": item.get("is_blueprint_copy"),
+                    "is_singleton": item.get("is_singleton"),
+                    "location_flag": item.get("location_flag"),
+                    "quantity": item.get("quantity"),
+                }
+                obj = existing_assets.pop(item["item_id"], None)
+                if obj is None:
+                    new_assets.append(
+                        CharacterAsset(
+                            character=character, item_id=item["item_id"], **values
+                        )
+                    )
+                elif any(getattr(obj, key) != value for key, value in values.items()):
+                    for key, value in values.items():
+                        setattr(obj, key, value)
+                    changed_assets.append(obj)
+
+            CharacterAsset.objects.bulk_update(
+                changed_assets,
+                fields=ASSET_SYNC_FIELDS,
+                batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
             )
-            assets_flat.pop(item_id)
-            if len(new_assets) >= MEMBERAUDIT_TASKS_MAX_ASSETS_PER_PASS:
-                break
-
-        logger.info("%s: Writing %s parent assets", character, len(new_assets))
-        # TODO: `ignore_conflicts=True` needed as workaround to compensate for
-        # occasional duplicate FK constraint errors. Needs to be investigated
-        CharacterAsset.objects.bulk_create(
-            new_assets,
-            batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
-            ignore_conflicts=True,
-        )
+            CharacterAsset.objects.bulk_create(
+                new_assets, batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
+            )
+            created_count += len(new_assets)
+            updated_count += len(changed_assets)
+            if new_assets and level_num + 1 < len(asset_tree.levels):
+                new_parent_item_ids = {
+                    item["location_id"] for item in asset_tree.levels[level_num + 1]
+                }.difference(item_pks.keys())
+                for item_ids_chunk in chunks(
+                    list(new_parent_item_ids), MEMBERAUDIT_BULK_METHODS_BATCH_SIZE
+                ):
+                    item_pks.update(
+                        character.assets.filter(item_id__in=item_ids_chunk).values_list(
+                            "item_id", "pk"
+                        )
+                    )
+
+        obsolete_pks = [obj.pk for obj in existing_assets.values()]
+        for pks_chunk in chunks(obsolete_pks, MEMBERAUDIT_BULK_METHODS_BATCH_SIZE):
+            CharacterAsset.objects.filter(pk__in=pks_chunk).delete()
 
-    if len(parent_asset_ids) > len(new_assets):
-        # there are more parent assets to create
-        assets_create_parents.apply_async(
-            kwargs={
-                "asset_list": list(assets_flat.values()),
-                "character_pk": character.pk,
-                "cycle": cycle + 1,
-            },
-            priority=DEFAULT_TASK_PRIORITY,
+    logger.info(
+        "%s: Asset tree updated: %s created, %s changed, %s deleted",
+        character,
+        created_count,
+        updated_count,
+        len(obsolete_pks),
+    )
+    if asset_tree.orphans:
+        logger.warning(
+            "%s: Failed to add %s assets to the tree, "
+            "because their parent does not exist: %s",
+            character,
+            len(asset_tree.orphans),
+            sorted(asset_tree.orphans),
+        )
+    if asset_tree.cycles:
+        logger.warning(
+            "%s: Failed to add %s assets to the tree, "
+            "because their parents form a cycle: %s",
+            character,
+            len(asset_tree.cycles),
+            sorted(asset_tree.cycles),
         )
-    else:
-        # all parent assets created
-        if assets_flat:
-            assets_create_children.apply_async(
-                kwargs={
-                    "asset_list": list(assets_flat.values()),
-                    "character_pk": character.pk,
-                },
-                priority=DEFAULT_TASK_PRIORITY,
-            )
-        else:
-            _log_character_update_success(character, Character.UpdateSection.ASSETS)
 
 
-@shared_task(**TASK_ESI_KWARGS)
-def assets_create_children(
-    self, asset_list: dict, character_pk: int, cycle: int = 1
-) -> None:
-    """Created child assets from given asset list
+@shared_task(**TASK_DEFAULT_KWARGS)
+def delete_staged_asset_list(staging_key: str) -> None:
+    """Deletes a staged asset list, e.g. after the asset update failed"""
+    delete_staged_list(staging_key)
 
-    Child assets are assets located within other assets (aka containers)
 
-    This task will recursively call itself until all possible assets from the
-    asset list are included into the asset tree
-    """
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
+def _fetch_staged_asset_list(self, character: Character, staging_key: str) -> list:
+    """Returns the staged asset list and logs an error if it no longer exists"""
+    return _character_update_with_error_logging(
+        self,
+        character,
+        Character.UpdateSection.ASSETS,
+        fetch_staged_list,
+        staging_key,
     )
-    logger.info("%s: Creating child assets - pass %s", character, cycle)
-
-    # for debug
-    # character._store_list_to_disk(asset_list, f"child_asset_list_{cycle}")
-
-    new_assets = list()
-    assets_flat = {int(x["item_id"]): x for x in asset_list}
-    with transaction.atomic():
-        parent_asset_ids = set(character.assets.values_list("item_id", flat=True))
-        child_asset_ids = {
-            item_id
-            for item_id, item in assets_flat.items()
-            if item.get("location_id") and item["location_id"] in parent_asset_ids
-        }
-        for item_id in child_asset_ids:
-            item = assets_flat[item_id]
-            new_assets.append(
-                CharacterAsset(
-                    character=character,
-                    item_id=item_id,
-                    parent=character.assets.get(item_id=item["location_id"]),
-                    eve_type_id=item.get("type_id"),
-                    name=item.get("name"),
-                    is_blueprint_copy=item.get("is_blueprint_copy"),
-                    is_singleton=item.get("is_singleton"),
-                    location_flag=item.get("location_flag"),
-                    quantity=item.get("quantity"),
-                )
-            )
-            assets_flat.pop(item_id)
-            if len(new_assets) >= MEMBERAUDIT_TASKS_MAX_ASSETS_PER_PASS:
-                break
-
-        if new_assets:
-            logger.info("%s: Writing %s child assets", character, len(new_assets))
-            # TODO: `ignore_conflicts=True` needed as workaround to compensate for
-            # occasional duplicate FK constraint errors. Needs to be investigated
-            CharacterAsset.objects.bulk_create(
-                new_assets,
-                batch_size=MEMBERAUDIT_BULK_METHODS_BATCH_SIZE,
-                ignore_conflicts=True,
-            )
-
-    if new_assets and assets_flat:
-        # there are more child assets to create
-        assets_create_children.apply_async(
-            kwargs={
-                "asset_list": list(assets_flat.values()),
-                "character_pk": character.pk,
-                "cycle": cycle + 1,
-            },
-            priority=DEFAULT_TASK_PRIORITY,
-        )
-    else:
-        _log_character_update_success(character, Character.UpdateSection.ASSETS)
-        if len(assets_flat) > 0:
-            logger.warning(
-                "%s: Failed to add %s assets to the tree: %s",
-                character,
-                len(assets_flat),
-                assets_flat.keys(),
-            )
 
 
 # Special tasks for updating mail section
@@ -582,11 +913,10 @@ def update_character_mails(
     force_update: bool = False,
     root_task_id: str = None,
     parent_task_id: str = None,
+    update_context: dict = None,
 ) -> None:
     """Main task for updating mails of a character"""
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     section = Character.UpdateSection.MAILS
     logger.info(
         "%s: Updating %s", character, Character.UpdateSection.display_name(section)
@@ -594,23 +924,30 @@ def update_character_mails(
     character.reset_update_section(
         section=section, root_task_id=root_task_id, parent_task_id=parent_task_id
     )
-    chain(
-        update_character_mailing_lists.si(character.pk, force_update=force_update),
-        update_character_mail_labels.si(character.pk, force_update=force_update),
-        update_character_mail_headers.si(character.pk, force_update=force_update),
-        update_character_mail_bodies.si(character.pk),
-        update_unresolved_eve_entities.si(character.pk, section),
-    ).apply_async(priority=DEFAULT_TASK_PRIORITY)
+    _apply_chain_in_lane(
+        LANE_DEFAULT,
+        update_character_mailing_lists.si(
+            character.pk, force_update=force_update, update_context=update_context
+        ),
+        update_character_mail_labels.si(
+            character.pk, force_update=force_update, update_context=update_context
+        ),
+        update_character_mail_headers.si(
+            character.pk, force_update=force_update, update_context=update_context
+        ),
+        update_character_mail_bodies.si(character.pk, update_context=update_context),
+        update_unresolved_eve_entities.si(
+            character.pk, section, update_context=update_context
+        ),
+    )
 
 
 @shared_task(**TASK_ESI_KWARGS)
 def update_character_mailing_lists(
-    self, character_pk: int, force_update: bool = False
+    self, character_pk: int, force_update: bool = False, update_context: dict = None
 ) -> None:
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     _character_update_with_error_logging(
         self,
         character,
@@ -622,12 +959,10 @@ def update_character_mailing_lists(
 
 @shared_task(**TASK_ESI_KWARGS)
 def update_character_mail_labels(
-    self, character_pk: int, force_update: bool = False
+    self, character_pk: int, force_update: bool = False, update_context: dict = None
 ) -> None:
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     _character_update_with_error_logging(
         self,
         character,
@@ -639,12 +974,10 @@ def update_character_mail_labels(
 
 @shared_task(**TASK_ESI_KWARGS)
 def update_character_mail_headers(
-    self, character_pk: int, force_update: bool = False
+    self, character_pk: int, force_update: bool = False, update_context: dict = None
 ) -> None:
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     _character_update_with_error_logging(
         self,
         character,
@@ -657,34 +990,79 @@ def update_character_mail_headers(
 @shared_task(**TASK_ESI_KWARGS)
 def update_mail_body_esi(self, character_pk: int, mail_pk: int):
     """Task for updating the body of a mail from ESI"""
-    _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
-    mail = CharacterMail.objects.get(pk=mail_pk)
-    _character_update_with_error_logging(
-        self,
-        character,
-        Character.UpdateSection.MAILS,
-        character.update_mail_body,
-        mail,
+    update_mail_bodies_esi.apply_async(
+        kwargs={"character_pk": character_pk, "mail_pks": [mail_pk]},
+        **lane_options(LANE_BULK),
     )
 
 
 @shared_task(**TASK_ESI_KWARGS)
-def update_character_mail_bodies(self, character_pk: int) -> None:
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
+def update_mail_bodies_esi(
+    self, character_pk: int, mail_pks: list, update_context: dict = None
+):
+    """Task for updating the bodies of a batch of mails from ESI
+
+    Retries later for the remaining mails if the ESI error limit has been reached
+    """
+    _retry_if_esi_is_down(self)
+    character = _get_character(character_pk, update_context)
+    if self.request.retries:
+        mail_pks = list(
+            character.mails.filter(pk__in=mail_pks, content__isnull=True).values_list(
+                "pk", flat=True
+            )
+        )
+    try:
+        character.update_mail_bodies(mail_pks=mail_pks)
+    except EsiErrorLimitExceeded as ex:
+        logger.warning(
+            "%s: ESI error limit threshold reached. Trying again in %s seconds",
+            character,
+            ex.retry_in,
+        )
+        raise self.retry(countdown=ex.retry_in) from ex
+    except Exception as ex:
+        _log_character_update_error(character, Character.UpdateSection.MAILS, ex)
+        raise ex
+
+
+@shared_task(**TASK_DEFAULT_KWARGS)
+def delete_orphaned_mail_contents() -> None:
+    """Delete mail contents which are no longer referenced by any mail"""
+    deleted_count = MailContent.objects.delete_orphans()
+    if deleted_count:
+        logger.info("Deleted %d orphaned mail contents", deleted_count)
+
+
+@shared_task(**TASK_ESI_KWARGS)
+def update_character_mail_bodies(
+    self, character_pk: int, update_context: dict = None
+) -> None:
+    character = _get_character(character_pk, update_context)
+    linked_count = character.mails.link_existing_contents()
+    if linked_count:
+        logger.info(
+            "%s: Linked %s mails to bodies fetched for other characters",
+            character,
+            linked_count,
+        )
+    mail_pks = list(
+        character.mails.filter(content__isnull=True)
+        .order_by("pk")
+        .values_list("pk", flat=True)
     )
-    mails_without_body_qs = character.mails.filter(body="")
-    mails_without_body_count = mails_without_body_qs.count()
-
-    if mails_without_body_count > 0:
-        logger.info("%s: Loading %s mailbodies", character, mails_without_body_count)
-        for mail in mails_without_body_qs:
-            update_mail_body_esi.apply_async(
-                kwargs={"character_pk": character.pk, "mail_pk": mail.pk},
-                priority=DEFAULT_TASK_PRIORITY,
+    if mail_pks:
+        logger.info("%s: Loading %s mailbodies", character, len(mail_pks))
+        for mail_pks_chunk in chunks(
+            mail_pks, MEMBERAUDIT_TASKS_MAX_MAIL_BODIES_PER_TASK
+        ):
+            update_mail_bodies_esi.apply_async(
+                kwargs={
+                    "character_pk": character.pk,
+                    "mail_pks": mail_pks_chunk,
+                    "update_context": update_context,
+                },
+                **lane_options(LANE_BULK),
             )
 
     # the last task in the chain logs success (if any)
@@ -700,11 +1078,10 @@ def update_character_contacts(
     force_update: bool = False,
     root_task_id: str = None,
     parent_task_id: str = None,
+    update_context: dict = None,
 ) -> None:
     """Main task for updating contacts of a character"""
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     section = Character.UpdateSection.CONTACTS
     character.reset_update_section(
         section=section, root_task_id=root_task_id, parent_task_id=parent_task_id
@@ -712,21 +1089,26 @@ def update_character_contacts(
     logger.info(
         "%s: Updating %s", character, Character.UpdateSection.display_name(section)
     )
-    chain(
-        update_character_contact_labels.si(character.pk, force_update=force_update),
-        update_character_contacts_2.si(character.pk, force_update=force_update),
-        update_unresolved_eve_entities.si(character.pk, section, last_in_chain=True),
-    ).apply_async(priority=DEFAULT_TASK_PRIORITY)
+    _apply_chain_in_lane(
+        LANE_DEFAULT,
+        update_character_contact_labels.si(
+            character.pk, force_update=force_update, update_context=update_context
+        ),
+        update_character_contacts_2.si(
+            character.pk, force_update=force_update, update_context=update_context
+        ),
+        update_unresolved_eve_entities.si(
+            character.pk, section, last_in_chain=True, update_context=update_context
+        ),
+    )
 
 
 @shared_task(**TASK_ESI_KWARGS)
 def update_character_contact_labels(
-    self, character_pk: int, force_update: bool = False
+    self, character_pk: int, force_update: bool = False, update_context: dict = None
 ) -> None:
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     _character_update_with_error_logging(
         self,
         character,
@@ -738,12 +1120,10 @@ def update_character_contact_labels(
 
 @shared_task(**TASK_ESI_KWARGS)
 def update_character_contacts_2(
-    self, character_pk: int, force_update: bool = False
+    self, character_pk: int, force_update: bool = False, update_context: dict = None
 ) -> None:
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     _character_update_with_error_logging(
         self,
         character,
@@ -762,11 +1142,10 @@ def update_character_contracts(
     force_update: bool = False,
     root_task_id: str = None,
     parent_task_id: str = None,
+    update_context: dict = None,
 ) -> None:
     """Main task for updating contracts of a character"""
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     section = Character.UpdateSection.CONTRACTS
     character.reset_update_section(
         section=section, root_task_id=root_task_id, parent_task_id=parent_task_id
@@ -774,22 +1153,27 @@ def update_character_contracts(
     logger.info(
         "%s: Updating %s", character, Character.UpdateSection.display_name(section)
     )
-    chain(
-        update_character_contract_headers.si(character.pk, force_update=force_update),
-        update_character_contracts_items.si(character.pk),
-        update_character_contracts_bids.si(character.pk),
-        update_unresolved_eve_entities.si(character.pk, section, last_in_chain=True),
-    ).apply_async(priority=DEFAULT_TASK_PRIORITY)
+    _apply_chain_in_lane(
+        LANE_DEFAULT,
+        update_character_contract_headers.si(
+            character.pk, force_update=force_update, update_context=update_context
+        ),
+        update_character_contracts_items.si(
+            character.pk, update_context=update_context
+        ),
+        update_character_contracts_bids.si(character.pk, update_context=update_context),
+        update_unresolved_eve_entities.si(
+            character.pk, section, last_in_chain=True, update_context=update_context
+        ),
+    )
 
 
 @shared_task(**TASK_ESI_KWARGS)
 def update_character_contract_headers(
-    self, character_pk: int, force_update: bool = False
+    self, character_pk: int, force_update: bool = False, update_context: dict = None
 ) -> bool:
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     _character_update_with_error_logging(
         self,
         character,
@@ -800,28 +1184,34 @@ def update_character_contract_headers(
 
 
 @shared_task(**TASK_DEFAULT_KWARGS)
-def update_character_contracts_items(character_pk: int):
+def update_character_contracts_items(character_pk: int, update_context: dict = None):
     """Update items for all contracts of a character"""
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
-    contract_pks = set(
-        character.contracts.filter(
-            contract_type__in=[
-                CharacterContract.TYPE_ITEM_EXCHANGE,
-                CharacterContract.TYPE_AUCTION,
-            ],
-            items__isnull=True,
-        ).values_list("pk", flat=True)
+    character = _get_character(character_pk, update_context)
+    contract_pks = sorted(
+        set(
+            character.contracts.filter(
+                contract_type__in=[
+                    CharacterContract.TYPE_ITEM_EXCHANGE,
+                    CharacterContract.TYPE_AUCTION,
+                ],
+                items__isnull=True,
+            ).values_list("pk", flat=True)
+        )
     )
     if len(contract_pks) > 0:
         logger.info(
             "%s: Starting updating items for %s contracts", character, len(contract_pks)
         )
-        for contract_pk in contract_pks:
-            update_contract_items_esi.apply_async(
-                kwargs={"character_pk": character.pk, "contract_pk": contract_pk},
-                priority=DEFAULT_TASK_PRIORITY,
+        for contract_pks_chunk in chunks(
+            contract_pks, MEMBERAUDIT_TASKS_MAX_CONTRACTS_PER_TASK
+        ):
+            update_contracts_items_esi.apply_async(
+                kwargs={
+                    "character_pk": character.pk,
+                    "contract_pks": contract_pks_chunk,
+                    "update_context": update_context,
+                },
+                **lane_options(LANE_BULK),
             )
 
     else:
@@ -831,34 +1221,65 @@ def update_character_contracts_items(character_pk: int):
 @shared_task(**TASK_ESI_KWARGS)
 def update_contract_items_esi(self, character_pk: int, contract_pk: int):
     """Task for updating the items of a contract from ESI"""
-    _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
+    update_contracts_items_esi.apply_async(
+        kwargs={"character_pk": character_pk, "contract_pks": [contract_pk]},
+        **lane_options(LANE_BULK),
     )
-    contract = CharacterContract.objects.get(pk=contract_pk)
-    character.update_contract_items(contract)
+
+
+@shared_task(**TASK_ESI_KWARGS)
+def update_contracts_items_esi(
+    self, character_pk: int, contract_pks: list, update_context: dict = None
+):
+    """Task for updating the items of a batch of contracts from ESI
+
+    Retries later for the remaining contracts if the ESI error limit has been reached
+    """
+    _retry_if_esi_is_down(self)
+    character = _get_character(character_pk, update_context)
+    if self.request.retries:
+        contract_pks = list(
+            character.contracts.filter(
+                pk__in=contract_pks, items__isnull=True
+            ).values_list("pk", flat=True)
+        )
+    try:
+        character.update_contracts_items(contract_pks=contract_pks)
+    except EsiErrorLimitExceeded as ex:
+        logger.warning(
+            "%s: ESI error limit threshold reached. Trying again in %s seconds",
+            character,
+            ex.retry_in,
+        )
+        raise self.retry(countdown=ex.retry_in) from ex
 
 
 @shared_task(**TASK_DEFAULT_KWARGS)
-def update_character_contracts_bids(character_pk: int):
+def update_character_contracts_bids(character_pk: int, update_context: dict = None):
     """Update bids for all contracts of a character"""
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
-    contract_pks = set(
-        character.contracts.filter(
-            contract_type__in=[CharacterContract.TYPE_AUCTION],
-            status=CharacterContract.STATUS_OUTSTANDING,
-        ).values_list("pk", flat=True)
+    character = _get_character(character_pk, update_context)
+    contract_pks = sorted(
+        set(
+            character.contracts.filter(
+                contract_type__in=[CharacterContract.TYPE_AUCTION],
+                status=CharacterContract.STATUS_OUTSTANDING,
+            ).values_list("pk", flat=True)
+        )
     )
     if len(contract_pks) > 0:
         logger.info(
             "%s: Starting updating bids for %s contracts", character, len(contract_pks)
         )
-        for contract_pk in contract_pks:
-            update_contract_bids_esi.apply_async(
-                kwargs={"character_pk": character.pk, "contract_pk": contract_pk},
-                priority=DEFAULT_TASK_PRIORITY,
+        for contract_pks_chunk in chunks(
+            contract_pks, MEMBERAUDIT_TASKS_MAX_CONTRACTS_PER_TASK
+        ):
+            update_contracts_bids_esi.apply_async(
+                kwargs={
+                    "character_pk": character.pk,
+                    "contract_pks": contract_pks_chunk,
+                    "update_context": update_context,
+                },
+                **lane_options(LANE_BULK),
             )
 
     else:
@@ -868,12 +1289,31 @@ def update_character_contracts_bids(character_pk: int):
 @shared_task(**TASK_ESI_KWARGS)
 def update_contract_bids_esi(self, character_pk: int, contract_pk: int):
     """Task for updating the bids of a contract from ESI"""
-    _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
+    update_contracts_bids_esi.apply_async(
+        kwargs={"character_pk": character_pk, "contract_pks": [contract_pk]},
+        **lane_options(LANE_BULK),
     )
-    contract = CharacterContract.objects.get(pk=contract_pk)
-    character.update_contract_bids(contract)
+
+
+@shared_task(**TASK_ESI_KWARGS)
+def update_contracts_bids_esi(
+    self, character_pk: int, contract_pks: list, update_context: dict = None
+):
+    """Task for updating the bids of a batch of contracts from ESI
+
+    Retries later if the ESI error limit has been reached
+    """
+    _retry_if_esi_is_down(self)
+    character = _get_character(character_pk, update_context)
+    try:
+        character.update_contracts_bids(contract_pks=contract_pks)
+    except EsiErrorLimitExceeded as ex:
+        logger.warning(
+            "%s: ESI error limit threshold reached. Trying again in %s seconds",
+            character,
+            ex.retry_in,
+        )
+        raise self.retry(countdown=ex.retry_in) from ex
 
 
 # special tasks for updating wallet
@@ -881,12 +1321,14 @@ def update_contract_bids_esi(self, character_pk: int, contract_pk: int):
 
 @shared_task(**TASK_DEFAULT_KWARGS)
 def update_character_wallet_journal(
-    character_pk: int, root_task_id: str = None, parent_task_id: str = None
+    character_pk: int,
+    force_update: bool = False,
+    root_task_id: str = None,
+    parent_task_id: str = None,
+    update_context: dict = None,
 ) -> None:
     """Main task for updating wallet journal of a character"""
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     section = Character.UpdateSection.WALLET_JOURNAL
     character.reset_update_section(
         section=section, root_task_id=root_task_id, parent_task_id=parent_task_id
@@ -894,23 +1336,29 @@ def update_character_wallet_journal(
     logger.info(
         "%s: Updating %s", character, Character.UpdateSection.display_name(section)
     )
-    chain(
-        update_character_wallet_journal_entries.si(character.pk),
-        update_unresolved_eve_entities.si(character.pk, section, last_in_chain=True),
-    ).apply_async(priority=DEFAULT_TASK_PRIORITY)
+    _apply_chain_in_lane(
+        LANE_DEFAULT,
+        update_character_wallet_journal_entries.si(
+            character.pk, force_update, update_context
+        ),
+        update_unresolved_eve_entities.si(
+            character.pk, section, last_in_chain=True, update_context=update_context
+        ),
+    )
 
 
 @shared_task(**TASK_ESI_KWARGS)
-def update_character_wallet_journal_entries(self, character_pk: int) -> None:
+def update_character_wallet_journal_entries(
+    self, character_pk: int, force_update: bool = False, update_context: dict = None
+) -> None:
     _retry_if_esi_is_down(self)
-    character = Character.objects.get_cached(
-        pk=character_pk, timeout=MEMBERAUDIT_TASKS_OBJECT_CACHE_TIMEOUT
-    )
+    character = _get_character(character_pk, update_context)
     _character_update_with_error_logging(
         self,
         character,
         Character.UpdateSection.WALLET_JOURNAL,
         character.update_wallet_journal,
+        force_update,
     )
 
 
@@ -999,23 +1447,84 @@ def update_mail_entity_esi(self, id: int, category: str = None):
 
 
 @shared_task(**TASK_DEFAULT_KWARGS)
-def update_characters_skill_checks(force_update: bool = False) -> None:
+def update_characters_skill_checks(
+    force_update: bool = False, skill_set_ids: list = None
+) -> None:
     """Start the update of skill checks for all registered characters
 
     Args:
     - force_update: When set to True will always update regardless of stale status
+    - skill_set_ids: Only check these skill sets. Default is all.
     """
     section = Character.UpdateSection.SKILL_SETS
-    for character in Character.objects.all():
-        if force_update or character.is_update_section_stale(section):
-            update_character_section.apply_async(
+    if force_update:
+        character_pks = list(Character.objects.values_list("pk", flat=True))
+    else:
+        character_pks = [
+            character_pk
+            for character_pk, sections in Character.objects.stale_sections_map().items()
+            if section in sections
+        ]
+    run_id = _new_run_id()
+    logger.info(
+        "Starting skill checks run %s for %d characters", run_id, len(character_pks)
+    )
+    _publish_in_batches(
+        [
+            update_characters_skill_sets.signature(
                 kwargs={
-                    "character_pk": character.pk,
-                    "section": section,
-                    "force_update": force_update,
+                    "character_pks": character_pks_chunk,
+                    "root_task_id": run_id,
+                    "skill_set_ids": skill_set_ids,
                 },
-                priority=DEFAULT_TASK_PRIORITY,
+                **_section_lane_options(section),
+            )
+            for character_pks_chunk in chunks(
+                character_pks, MEMBERAUDIT_TASKS_MAX_CHARACTERS_PER_SKILL_CHECK
             )
+        ]
+    )
+
+
+@shared_task(**TASK_DEFAULT_KWARGS)
+def update_characters_skill_sets(
+    character_pks: list, root_task_id: str = None, skill_set_ids: list = None
+) -> None:
+    """Check the skill sets of the given characters in one pass
+
+    Args:
+    - character_pks: PKs of characters to check
+    - root_task_id: ID of the update run
+    - skill_set_ids: Only check these skill sets. Default is all.
+    """
+    section = Character.UpdateSection.SKILL_SETS
+    character_pks = list(
+        Character.objects.filter(pk__in=character_pks).values_list("pk", flat=True)
+    )
+    CharacterUpdateStatus.objects.reset_for_characters(
+        character_pks, section, root_task_id
+    )
+    statuses = CharacterUpdateStatus.objects.filter(
+        character_id__in=character_pks, section=section
+    )
+    try:
+        CharacterSkillSetCheck.objects.update_for_characters(
+            character_pks, skill_set_ids
+        )
+    except Exception as ex:
+        logger.error(
+            "Failed to check skill sets of %d characters",
+            len(character_pks),
+            exc_info=True,
+        )
+        statuses.update(
+            is_success=False,
+            last_error_message=f"{type(ex).__name__}: {str(ex)}",
+            finished_at=now(),
+        )
+        raise ex
+
+    statuses.update(is_success=True, last_error_message="", finished_at=now())
 
 
 @shared_task(**TASK_DEFAULT_KWARGS)
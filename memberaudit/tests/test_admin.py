@@ -29,13 +29,19 @@ class TestSkillSetAdmin(TestCase):
         cls.user, _ = create_user_from_evecharacter(1001)
 
     @patch(ADMIN_PATH + ".tasks.update_characters_skill_checks")
-    def test_save_model(self, mock_update_characters_skill_checks):
+    def test_save_related(self, mock_update_characters_skill_checks):
         ship = SkillSet.objects.create(name="Dummy")
         request = MockRequest(self.user)
-        form = self.modeladmin.get_form(request)
-        self.modeladmin.save_model(request, ship, form, True)
+        form = self.modeladmin.get_form(request, ship)(
+            instance=ship, data={"name": "Dummy 2", "is_visible": True}
+        )
+        self.assertTrue(form.is_valid())
+        form.save(commit=False)
+        self.modeladmin.save_related(request, form, [], True)
 
-        self.assertTrue(mock_update_characters_skill_checks.delay.called)
+        mock_update_characters_skill_checks.delay.assert_called_once_with(
+            force_update=True, skill_set_ids=[ship.pk]
+        )
 
     @patch(ADMIN_PATH + ".tasks.update_characters_skill_checks")
     def test_delete_model(self, mock_update_characters_skill_checks):
@@ -43,7 +49,8 @@ class TestSkillSetAdmin(TestCase):
         request = MockRequest(self.user)
         self.modeladmin.delete_model(request, ship)
 
-        self.assertTrue(mock_update_characters_skill_checks.delay.called)
+        self.assertFalse(SkillSet.objects.filter(pk=ship.pk).exists())
+        self.assertFalse(mock_update_characters_skill_checks.delay.called)
 
     def test_ship_type_filter(self):
         class SkillSetAdminTest(SkillSetAdmin):
@@ -94,9 +101,9 @@ class TestCharacterAdmin(TestCase):
         cls.user = cls.character.character_ownership.user
 
     @patch(ADMIN_PATH + ".CharacterAdmin.message_user")
-    @patch(ADMIN_PATH + ".tasks.update_character")
+    @patch(ADMIN_PATH + ".tasks.update_characters")
     def test_should_update_characters(
-        self, mock_task_update_character, mock_message_user
+        self, mock_task_update_characters, mock_message_user
     ):
         # given
         request = self.factory.get(reverse("admin:memberaudit_character_changelist"))
@@ -104,5 +111,8 @@ class TestCharacterAdmin(TestCase):
         # when
         self.modeladmin.update_characters(request, queryset)
         # then
-        self.assertEqual(mock_task_update_character.delay.call_count, 1)
+        self.assertEqual(mock_task_update_characters.delay.call_count, 1)
+        _, kwargs = mock_task_update_characters.delay.call_args
+        self.assertListEqual(kwargs["character_pks"], [self.character.pk])
+        self.assertTrue(kwargs["force_update"])
         self.assertTrue(mock_message_user.called)
@@ -1,14 +1,36 @@
 from unittest.mock import Mock, patch
 
+from django.test import TestCase, override_settings
+
 from allianceauth.eveonline.evelinks import dotlan, evewho
+from app_utils.esi import EsiErrorLimitExceeded, EsiOffline, EsiStatus
 from app_utils.testing import NoSocketsTestCase
 
-from ..core.xml_converter import eve_xml_to_html
+from ..core import esi_governor
+from ..core.asset_tree import build_asset_tree
+from ..core.staging import (
+    StagedDataNotFound,
+    delete_staged_list,
+    fetch_staged_list,
+    make_staging_key,
+    stage_list,
+)
+from ..core.task_lanes import (
+    LANE_BULK,
+    LANE_DEFAULT,
+    LANE_FAST,
+    LANE_PRIORITIES,
+    lane_options,
+    queue_depths,
+)
+from ..core.xml_converter import eve_xml_entity_ids, eve_xml_to_html
 from .testdata.esi_client_stub import load_test_data
 from .testdata.load_entities import load_entities
 from .testdata.load_eveuniverse import load_eveuniverse
 
+ESI_GOVERNOR_PATH = "memberaudit.core.esi_governor"
 MODULE_PATH = "memberaudit.core.xml_converter"
+TASK_LANES_PATH = "memberaudit.core.task_lanes"
 
 
 class TestHTMLConversion(NoSocketsTestCase):
@@ -74,6 +96,29 @@ class TestHTMLConversion(NoSocketsTestCase):
             )
             self.assertTrue(result.find(dotlan.solar_system_url("Polaris")) != -1)
 
+    def test_should_return_ids_of_linked_entities(self):
+        # given
+        xml = (
+            '<a href="showinfo:1376//1001">Bruce</a> '
+            '<a href="showinfo:5//30004984">Abune</a> '
+            '<a href="showinfo:2//2001">Wayne Tech</a> '
+            '<a href="showinfo:16159//3001">Wayne Enterprises</a>'
+        )
+        # when
+        result = eve_xml_entity_ids(xml)
+        # then
+        self.assertSetEqual(result, {30004984, 2001, 3001})
+
+    @patch("eveuniverse.models.EveEntity.objects.resolve_name")
+    def test_should_use_given_names_for_links(self, mock_resolve_name):
+        # given
+        xml = '<a href="showinfo:16159//3001">Wayne Enterprises</a>'
+        # when
+        result = eve_xml_to_html(xml, names={3001: "An Alliance"})
+        # then
+        self.assertIn(dotlan.alliance_url("An Alliance"), result)
+        self.assertFalse(mock_resolve_name.called)
+
     def test_convert_bio_1(self):
         """can convert a bio includes lots of non-ASCII characters and handle the u-bug"""
         with patch(
@@ -111,3 +156,229 @@ class TestHTMLConversion(NoSocketsTestCase):
                 self.fail(f"Unexpected exception was raised: {ex}")
 
             self.assertNotEqual(result[:2], "u'")
+
+
+class TestStaging(TestCase):
+    def test_should_stage_and_fetch_list(self):
+        # given
+        key = make_staging_key(1001, "assets", "abc")
+        data = [{"item_id": 1, "name": "Alpha"}, {"item_id": 2, "name": None}]
+        # when
+        stage_list(key, data, timeout=60)
+        # then
+        self.assertListEqual(fetch_staged_list(key), data)
+
+    def test_should_raise_error_when_staged_list_not_found(self):
+        # given
+        key = make_staging_key(1001, "assets", "unknown")
+        # when/then
+        with self.assertRaises(StagedDataNotFound):
+            fetch_staged_list(key)
+
+    def test_should_delete_staged_list(self):
+        # given
+        key = make_staging_key(1001, "assets", "def")
+        stage_list(key, [1, 2, 3], timeout=60)
+        # when
+        delete_staged_list(key)
+        # then
+        with self.assertRaises(StagedDataNotFound):
+            fetch_staged_list(key)
+
+
+class TestBuildAssetTree(NoSocketsTestCase):
+    def test_should_order_assets_into_levels(self):
+        # given
+        asset_list = [
+            {"item_id": 3, "location_id": 2},
+            {"item_id": 2, "location_id": 1},
+            {"item_id": 1, "location_id": 60003760},
+            {"item_id": 4, "location_id": 60003760},
+        ]
+        # when
+        result = build_asset_tree(asset_list, {60003760})
+        # then
+        self.assertListEqual(
+            [[x["item_id"] for x in level] for level in result.levels],
+            [[1, 4], [2], [3]],
+        )
+        self.assertEqual(result.assets_count, 4)
+        self.assertSetEqual(result.orphans, set())
+        self.assertSetEqual(result.cycles, set())
+
+    def test_should_report_orphans(self):
+        # given
+        asset_list = [
+            {"item_id": 1, "location_id": 60003760},
+            {"item_id": 2, "location_id": 99},
+            {"item_id": 3, "location_id": 2},
+            {"item_id": 4},
+        ]
+        # when
+        result = build_asset_tree(asset_list, {60003760})
+        # then
+        self.assertEqual(result.assets_count, 1)
+        self.assertSetEqual(result.orphans, {2, 3, 4})
+        self.assertSetEqual(result.cycles, set())
+
+    def test_should_report_cycles(self):
+        # given
+        asset_list = [
+            {"item_id": 1, "location_id": 60003760},
+            {"item_id": 2, "location_id": 3},
+            {"item_id": 3, "location_id": 2},
+            {"item_id": 4, "location_id": 3},
+        ]
+        # when
+        result = build_asset_tree(asset_list, {60003760})
+        # then
+        self.assertEqual(result.assets_count, 1)
+        self.assertSetEqual(result.orphans, set())
+        self.assertSetEqual(result.cycles, {2, 3, 4})
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
+class TestEsiGovernor(NoSocketsTestCase):
+    def setUp(self) -> None:
+        esi_governor.clear()
+
+    def test_should_fetch_status_only_once_per_interval(self, mock_fetch_esi_status):
+        # given
+        mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
+        # when
+        for _ in range(3):
+            esi_governor.raise_for_status()
+        # then
+        self.assertEqual(mock_fetch_esi_status.call_count, 1)
+
+    def test_should_raise_for_all_workers_when_esi_is_offline(
+        self, mock_fetch_esi_status
+    ):
+        # given
+        mock_fetch_esi_status.return_value = EsiStatus(False)
+        with self.assertRaises(EsiOffline):
+            esi_governor.raise_for_status()
+        # when/then
+        with self.assertRaises(EsiOffline):
+            esi_governor.raise_for_status()
+        self.assertEqual(mock_fetch_esi_status.call_count, 1)
+
+    def test_should_pause_when_status_reports_error_limit_reached(
+        self, mock_fetch_esi_status
+    ):
+        # given
+        mock_fetch_esi_status.return_value = EsiStatus(True, 10, 60)
+        # when/then
+        with self.assertRaises(EsiErrorLimitExceeded) as cm:
+            esi_governor.raise_for_status()
+        self.assertGreater(cm.exception.retry_in, 59)
+
+    def test_should_pause_all_workers_when_response_reports_low_budget(
+        self, mock_fetch_esi_status
+    ):
+        # given
+        response = Mock(
+            headers={"X-Esi-Error-Limit-Remain": "20", "X-Esi-Error-Limit-Reset": "40"}
+        )
+        # when
+        esi_governor.record_response(response)
+        # then
+        with self.assertRaises(EsiErrorLimitExceeded):
+            esi_governor.raise_for_status()
+        self.assertFalse(mock_fetch_esi_status.called)
+        self.assertEqual(esi_governor.error_limit_remain(), 20)
+
+    def test_should_not_pause_when_budget_is_above_threshold(
+        self, mock_fetch_esi_status
+    ):
+        # given
+        mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
+        response = Mock(
+            headers={"X-Esi-Error-Limit-Remain": "80", "X-Esi-Error-Limit-Reset": "40"}
+        )
+        # when
+        esi_governor.record_response(response)
+        # then
+        self.assertEqual(esi_governor.error_limit_remain(), 80)
+        esi_governor.raise_for_status()
+
+    def test_should_ignore_responses_without_error_limit_headers(
+        self, mock_fetch_esi_status
+    ):
+        # when
+        esi_governor.record_response(Mock(headers={}))
+        esi_governor.record_response(None)
+        # then
+        self.assertIsNone(esi_governor.error_limit_remain())
+
+    def test_should_resume_after_clear(self, mock_fetch_esi_status):
+        # given
+        mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
+        esi_governor.record_error_limit(remain=5, reset=60)
+        # when
+        esi_governor.clear()
+        # then
+        esi_governor.raise_for_status()
+
+
+class TestTaskLanes(NoSocketsTestCase):
+    def test_should_return_priority_only_when_no_queue_defined(self):
+        # when
+        options = lane_options(LANE_FAST)
+        # then
+        self.assertDictEqual(options, {"priority": LANE_PRIORITIES[LANE_FAST]})
+
+    @patch.dict(TASK_LANES_PATH + ".LANE_QUEUES", {LANE_BULK: "memberaudit_bulk"})
+    def test_should_return_queue_when_defined(self):
+        # when
+        options = lane_options(LANE_BULK)
+        # then
+        self.assertDictEqual(
+            options,
+            {
+                "priority": LANE_PRIORITIES[LANE_BULK],
+                "queue": "memberaudit_bulk",
+                "routing_key": "memberaudit_bulk",
+            },
+        )
+
+    def test_should_prioritize_fast_lane_over_bulk_lane(self):
+        self.assertLess(LANE_PRIORITIES[LANE_FAST], LANE_PRIORITIES[LANE_DEFAULT])
+        self.assertLess(LANE_PRIORITIES[LANE_DEFAULT], LANE_PRIORITIES[LANE_BULK])
+
+    @patch.dict(TASK_LANES_PATH + ".LANE_QUEUES", {LANE_FAST: "memberaudit_fast"})
+    @patch(TASK_LANES_PATH + ".current_app")
+    def test_should_report_queue_depths(self, mock_app):
+        # given
+        mock_app.conf.task_default_queue = "celery"
+        channel = (
+            mock_app.connection_for_read.return_value.__enter__.return_value
+        ).default_channel
+        channel.queue_declare.side_effect = lambda queue, passive: Mock(
+            message_count={"memberaudit_fast": 3, "celery": 12}[queue]
+        )
+        # when
+        result = queue_depths()
+        # then
+        self.assertDictEqual(
+            result,
+            {
+                LANE_FAST: {"queue": "memberaudit_fast", "depth": 3},
+                LANE_DEFAULT: {"queue": "celery", "depth": 12},
+                LANE_BULK: {"queue": "celery", "depth": 12},
+            },
+        )
+
+    @patch(TASK_LANES_PATH + ".current_app")
+    def test_should_report_unknown_depths_when_broker_not_available(self, mock_app):
+        # given
+        mock_app.conf.task_default_queue = "celery"
+        mock_app.connection_for_read.side_effect = OSError
+        # when
+        result = queue_depths()
+        # then
+        self.assertIsNone(result[LANE_FAST]["depth"])
+        self.assertEqual(result[LANE_FAST]["queue"], "celery")
@@ -17,6 +17,7 @@ from ..models import (
     CharacterMail,
     CharacterMailLabel,
     Location,
+    MailContent,
     MailEntity,
 )
 from . import (
@@ -30,11 +31,12 @@ from .testdata.load_entities import load_entities
 from .testdata.load_eveuniverse import load_eveuniverse
 from .testdata.load_locations import load_locations
 
+ESI_GOVERNOR_PATH = "memberaudit.core.esi_governor"
 MODELS_PATH = "memberaudit.models"
 TASKS_PATH = "memberaudit.tasks"
 
 
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 class TestUILauncher(WebTest):
     @classmethod
     def setUpClass(cls):
@@ -289,7 +291,7 @@ class TestUICharacterViewer(WebTest):
             mail_id=7001,
             sender=sender_1002,
             subject="Dummy 1",
-            body=body_text,
+            content=MailContent.objects.create(id=7001, body=body_text),
             timestamp=now(),
         )
         recipient_1001, _ = MailEntity.objects.update_or_create_from_eve_entity_id(
@@ -4,22 +4,34 @@ from unittest.mock import Mock, patch
 from bravado.exception import HTTPForbidden, HTTPNotFound, HTTPUnauthorized
 
 from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 from eveuniverse.models import EveEntity, EveMarketPrice, EveSolarSystem, EveType
 
+from allianceauth.eveonline.evelinks import dotlan
 from allianceauth.eveonline.models import EveAllianceInfo
 from allianceauth.tests.auth_utils import AuthUtils
 from app_utils.esi import EsiStatus
 from app_utils.testing import NoSocketsTestCase
 
+from ..core import esi_governor
+from ..core.xml_converter import XML_CONVERTER_VERSION
 from ..models import (
     Character,
     CharacterAsset,
+    CharacterDetails,
+    CharacterMail,
     CharacterMailLabel,
     CharacterUpdateStatus,
+    CharacterWalletJournalEntry,
+    CharacterWalletTransaction,
     Location,
+    MailContent,
     MailEntity,
+    SkillSet,
+    SkillSetSkill,
 )
 from . import add_memberaudit_character_to_user, create_memberaudit_character
 from .testdata.esi_client_stub import esi_client_stub
@@ -28,6 +40,7 @@ from .testdata.load_entities import load_entities
 from .testdata.load_eveuniverse import load_eveuniverse
 from .testdata.load_locations import load_locations
 
+ESI_GOVERNOR_PATH = "memberaudit.core.esi_governor"
 MODELS_PATH = "memberaudit.models"
 MANAGERS_PATH = "memberaudit.managers"
 
@@ -109,6 +122,80 @@ class TestCharacterMailLabelManager(TestCharacterUpdateBase):
         self.assertDictEqual(labels, dict())
 
 
+@patch(MODELS_PATH + ".character.Character._preload_all_locations")
+@patch(MANAGERS_PATH + ".sections.EveEntity.objects.bulk_update_new_esi")
+@patch(MANAGERS_PATH + ".sections.EveType.objects.bulk_get_or_create_esi")
+class TestCharacterWalletTransactionManager(TestCharacterUpdateBase):
+    @staticmethod
+    def _make_transaction(transaction_id: int, client_id: int) -> dict:
+        return {
+            "client_id": client_id,
+            "date": now(),
+            "is_buy": True,
+            "is_personal": True,
+            "journal_ref_id": 1000 + transaction_id,
+            "location_id": 60003760,
+            "quantity": 1,
+            "transaction_id": transaction_id,
+            "type_id": 603,
+            "unit_price": 1.5,
+        }
+
+    def _create_journal_entry(self, entry_id: int) -> CharacterWalletJournalEntry:
+        return CharacterWalletJournalEntry.objects.create(
+            character=self.character_1001,
+            entry_id=entry_id,
+            context_id_type=CharacterWalletJournalEntry.CONTEXT_ID_TYPE_UNDEFINED,
+            date=now(),
+            description="dummy",
+        )
+
+    def test_should_resolve_references_of_new_transactions(self, *args):
+        # given
+        journal_entry = self._create_journal_entry(1001)
+        transactions = [
+            self._make_transaction(1, 1001),
+            self._make_transaction(2, 99_000_001),
+        ]
+        # when
+        CharacterWalletTransaction.objects.update_for_character(
+            self.character_1001, None, transactions, self.token
+        )
+        # then
+        obj = self.character_1001.wallet_transactions.get(transaction_id=1)
+        self.assertEqual(obj.journal_ref, journal_entry)
+        self.assertEqual(obj.client_id, 1001)
+        self.assertEqual(obj.location, self.jita_44)
+        self.assertEqual(obj.eve_type_id, 603)
+        obj = self.character_1001.wallet_transactions.get(transaction_id=2)
+        self.assertIsNone(obj.journal_ref)
+        self.assertTrue(EveEntity.objects.filter(id=99_000_001).exists())
+
+    def test_should_not_need_more_queries_for_more_transactions(self, *args):
+        # given
+        for transaction_id in range(1, 6):
+            self._create_journal_entry(1000 + transaction_id)
+        character_1002 = self.character_1002
+        # when
+        with CaptureQueriesContext(connection) as one_transaction:
+            CharacterWalletTransaction.objects.update_for_character(
+                character_1002, None, [self._make_transaction(1, 1001)], self.token
+            )
+        with CaptureQueriesContext(connection) as many_transactions:
+            CharacterWalletTransaction.objects.update_for_character(
+                self.character_1001,
+                None,
+                [
+                    self._make_transaction(transaction_id, 1001)
+                    for transaction_id in range(1, 6)
+                ],
+                self.token,
+            )
+        # then
+        self.assertEqual(self.character_1001.wallet_transactions.count(), 5)
+        self.assertEqual(len(many_transactions), len(one_transaction))
+
+
 class TestCharacterManager(TestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -120,6 +207,193 @@ class TestCharacterManager(TestCase):
     def test_should_return_set_of_eve_character_ids(self):
         self.assertSetEqual(Character.objects.all().eve_character_ids(), {1001, 1002})
 
+    def test_should_return_stale_sections_for_all_characters(self):
+        # given
+        all_sections = set(Character.UpdateSection.values)
+        for section in all_sections:
+            CharacterUpdateStatus.objects.create(
+                character=self.character_1001,
+                section=section,
+                is_success=True,
+                started_at=now() - dt.timedelta(seconds=30),
+                finished_at=now(),
+            )
+        CharacterUpdateStatus.objects.create(
+            character=self.character_1002,
+            section=Character.UpdateSection.LOCATION,
+            is_success=True,
+            started_at=now() - dt.timedelta(seconds=30),
+            finished_at=now(),
+        )
+        CharacterUpdateStatus.objects.create(
+            character=self.character_1002,
+            section=Character.UpdateSection.ASSETS,
+            is_success=True,
+            started_at=now() - dt.timedelta(days=1),
+            finished_at=now() - dt.timedelta(days=1),
+        )
+        CharacterUpdateStatus.objects.create(
+            character=self.character_1002,
+            section=Character.UpdateSection.SKILLS,
+            is_success=False,
+            started_at=now() - dt.timedelta(seconds=30),
+            finished_at=now(),
+        )
+        # when
+        result = Character.objects.all().stale_sections_map()
+        # then
+        self.assertDictEqual(
+            result,
+            {
+                self.character_1002.pk: all_sections.difference(
+                    {Character.UpdateSection.LOCATION}
+                )
+            },
+        )
+        for section in all_sections:
+            self.assertEqual(
+                section in result[self.character_1002.pk],
+                self.character_1002.is_update_section_stale(section),
+            )
+
+    def test_should_return_stale_sections_at_given_offsets(self):
+        # given
+        CharacterUpdateStatus.objects.create(
+            character=self.character_1001,
+            section=Character.UpdateSection.LOCATION,
+            is_success=True,
+            started_at=now() - dt.timedelta(minutes=30),
+            finished_at=now(),
+        )
+        CharacterUpdateStatus.objects.create(
+            character=self.character_1002,
+            section=Character.UpdateSection.LOCATION,
+            is_success=True,
+            started_at=now() - dt.timedelta(minutes=30),
+            finished_at=now(),
+        )
+        # when
+        result = Character.objects.all().stale_sections_map(
+            {self.character_1001.pk: dt.timedelta(hours=1)}
+        )
+        # then
+        self.assertIn(Character.UpdateSection.LOCATION, result[self.character_1001.pk])
+        self.assertNotIn(
+            Character.UpdateSection.LOCATION, result[self.character_1002.pk]
+        )
+
+
+@patch(MANAGERS_PATH + ".character.esi")
+class TestCharacterUpdateAffiliations(TestCharacterUpdateBase):
+    def setUp(self) -> None:
+        self.started_at = now() - dt.timedelta(hours=12)
+        for character in [self.character_1001, self.character_1002]:
+            for section in Character.UpdateSection.values:
+                CharacterUpdateStatus.objects.create(
+                    character=character,
+                    section=section,
+                    is_success=True,
+                    started_at=self.started_at,
+                    finished_at=self.started_at,
+                )
+        CharacterDetails.objects.create(
+            character=self.character_1001,
+            birthday=now(),
+            corporation=self.corporation_2001,
+            eve_bloodline_id=1,
+            eve_race_id=1,
+            name="Bruce Wayne",
+        )
+        CharacterDetails.objects.create(
+            character=self.character_1002,
+            birthday=now(),
+            corporation=self.corporation_2001,
+            eve_bloodline_id=1,
+            eve_race_id=1,
+            name="Clark Kent",
+        )
+
+    def _started_at(self, character, section):
+        return character.update_status_set.get(section=section).started_at
+
+    def test_should_mark_corporation_history_fresh_when_unchanged(self, mock_esi):
+        # given
+        mock_esi.client.Character.post_characters_affiliation.return_value.results.return_value = [
+            {"character_id": 1001, "corporation_id": 2001},
+            {"character_id": 1002, "corporation_id": 2002},
+        ]
+        # when
+        result = Character.objects.all().update_affiliations()
+        # then
+        self.assertSetEqual(result, {self.character_1002.pk})
+        self.assertEqual(
+            self._started_at(
+                self.character_1001, Character.UpdateSection.CHARACTER_DETAILS
+            ),
+            self.started_at,
+        )
+        self.assertGreater(
+            self._started_at(
+                self.character_1001, Character.UpdateSection.CORPORATION_HISTORY
+            ),
+            self.started_at,
+        )
+        self.assertEqual(
+            self._started_at(self.character_1001, Character.UpdateSection.SKILLS),
+            self.started_at,
+        )
+        self.assertEqual(
+            self._started_at(
+                self.character_1002, Character.UpdateSection.CORPORATION_HISTORY
+            ),
+            self.started_at,
+        )
+
+    def test_should_fetch_affiliations_in_batches(self, mock_esi):
+        # given
+        mock_esi.client.Character.post_characters_affiliation.return_value.results.return_value = (
+            []
+        )
+        # when
+        with patch(MANAGERS_PATH + ".character.AFFILIATION_MAX_CHARACTERS", 1):
+            Character.objects.all().update_affiliations()
+        # then
+        self.assertListEqual(
+            [
+                kwargs["characters"]
+                for _, kwargs in mock_esi.client.Character.post_characters_affiliation.call_args_list
+            ],
+            [[1001], [1002]],
+        )
+
+    def test_should_report_characters_without_details_as_changed(self, mock_esi):
+        # given
+        self.character_1002.details.delete()
+        mock_esi.client.Character.post_characters_affiliation.return_value.results.return_value = [
+            {"character_id": 1001, "corporation_id": 2001},
+            {"character_id": 1002, "corporation_id": 2001},
+        ]
+        # when
+        result = Character.objects.all().update_affiliations()
+        # then
+        self.assertSetEqual(result, {self.character_1002.pk})
+
+    def test_should_not_change_anything_when_esi_fails(self, mock_esi):
+        # given
+        mock_esi.client.Character.post_characters_affiliation.side_effect = (
+            HTTPNotFound(BravadoResponseStub(404, "Test exception"))
+        )
+        # when
+        result = Character.objects.all().update_affiliations()
+        # then
+        self.assertSetEqual(result, set())
+        self.assertEqual(
+            self._started_at(
+                self.character_1001, Character.UpdateSection.CHARACTER_DETAILS
+            ),
+            self.started_at,
+        )
+
 
 class TestCharacterManagerUserHasAccess(TestCase):
     @classmethod
@@ -280,6 +554,85 @@ class TestCharacterManagerUserHasAccess(TestCase):
         )
 
 
+@patch(MANAGERS_PATH + ".general.MEMBERAUDIT_TASKS_TIME_LIMIT", 7200)
+class TestMailContentManager(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        load_entities()
+        cls.character_1001 = create_memberaudit_character(1001)
+        cls.character_1002 = create_memberaudit_character(1002)
+
+    def test_should_delete_contents_of_deleted_mails_only(self):
+        # given
+        content_1 = MailContent.objects.create(id=1, body="alpha")
+        content_2 = MailContent.objects.create(id=2, body="bravo")
+        content_3 = MailContent.objects.create(id=3, body="charlie")
+        for character in [self.character_1001, self.character_1002]:
+            CharacterMail.objects.create(
+                character=character, mail_id=1, content=content_1
+            )
+        CharacterMail.objects.create(
+            character=self.character_1001, mail_id=2, content=content_2
+        )
+        CharacterMail.objects.create(
+            character=self.character_1002, mail_id=3, content=content_3
+        )
+        self.character_1002.delete()
+        MailContent.objects.update(created_at=now() - dt.timedelta(hours=3))
+        # when
+        result = MailContent.objects.delete_orphans()
+        # then
+        self.assertEqual(result, 1)
+        self.assertSetEqual(
+            set(MailContent.objects.values_list("id", flat=True)), {1, 2}
+        )
+
+    def test_should_keep_new_contents_not_yet_linked_to_mails(self):
+        # given
+        old_content = MailContent.objects.create(id=1, body="alpha")
+        MailContent.objects.filter(pk=old_content.pk).update(
+            created_at=now() - dt.timedelta(hours=3)
+        )
+        MailContent.objects.create(id=2, body="bravo")
+        # when
+        result = MailContent.objects.delete_orphans()
+        # then
+        self.assertEqual(result, 1)
+        self.assertSetEqual(set(MailContent.objects.values_list("id", flat=True)), {2})
+
+    @patch(MANAGERS_PATH + ".general.EveEntity.objects.bulk_resolve_names")
+    def test_should_render_html_with_resolved_names(self, mock_bulk_resolve_names):
+        # given
+        mock_bulk_resolve_names.return_value.to_name.side_effect = {
+            3001: "An Alliance"
+        }.get
+        content = MailContent(
+            id=1, body='<a href="showinfo:16159//3001">Wayne Enterprises</a>'
+        )
+        # when
+        MailContent.objects.render_html([content])
+        # then
+        self.assertIn(dotlan.alliance_url("An Alliance"), content.body_html)
+        self.assertEqual(content.body_html_version, XML_CONVERTER_VERSION)
+
+    @patch(MANAGERS_PATH + ".general.EveEntity.objects.bulk_resolve_names")
+    def test_should_render_html_again_when_names_are_missing(
+        self, mock_bulk_resolve_names
+    ):
+        # given
+        mock_bulk_resolve_names.return_value.to_name.return_value = ""
+        content_1 = MailContent(
+            id=1, body='<a href="showinfo:16159//3001">Wayne Enterprises</a>'
+        )
+        content_2 = MailContent(id=2, body="<p>no links</p>")
+        # when
+        MailContent.objects.render_html([content_1, content_2])
+        # then
+        self.assertEqual(content_1.body_html_version, 0)
+        self.assertEqual(content_2.body_html_version, XML_CONVERTER_VERSION)
+
+
 class TestMailEntityManager(NoSocketsTestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -298,7 +651,7 @@ class TestMailEntityManager(NoSocketsTestCase):
         self.assertEqual(obj.category, MailEntity.Category.CHARACTER)
         self.assertEqual(obj.name, "John Doe")
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_get_or_create_esi_2(self, mock_fetch_esi_status):
         """When entity does not exist, create it from ESI / existing EveEntity"""
         mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
@@ -309,7 +662,7 @@ class TestMailEntityManager(NoSocketsTestCase):
         self.assertEqual(obj.category, MailEntity.Category.CHARACTER)
         self.assertEqual(obj.name, "Bruce Wayne")
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_update_or_create_esi_1(self, mock_fetch_esi_status):
         """When entity does not exist, create it from ESI / existing EveEntity"""
         mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
@@ -463,7 +816,7 @@ class TestMailEntityManager(NoSocketsTestCase):
 
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
-@patch(MANAGERS_PATH + ".general.fetch_esi_status")
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
 class TestMailEntityManagerAsync(TestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -471,6 +824,9 @@ class TestMailEntityManagerAsync(TestCase):
         load_entities()
         MailEntity.objects.all().delete()
 
+    def setUp(self) -> None:
+        esi_governor.clear()
+
     def test_get_or_create_esi_async_1(self, mock_fetch_esi_status):
         """When entity already exists, return it"""
         mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
@@ -636,6 +992,36 @@ class TestCharacterUpdateStatusManager(TestCase):
         self.assertEqual(stats["ring_3"]["max"]["section"], "assets")
         self.assertEqual(stats["ring_3"]["max"]["duration"], 90)
 
+    def test_calculate_stats_3(self):
+        """reports responses not modified"""
+        my_now = now()
+        CharacterUpdateStatus.objects.create(
+            character=self.character_1001,
+            section=Character.UpdateSection.ASSETS,
+            is_success=True,
+            started_at=my_now,
+            finished_at=my_now + dt.timedelta(seconds=90),
+            root_task_id="1",
+            not_modified_count=3,
+            not_modified_bytes=3000,
+        )
+        stats = CharacterUpdateStatus.objects.statistics()["update_statistics"]
+
+        self.assertDictEqual(
+            stats["ring_3"]["not_modified"],
+            {"responses_count": 3, "bytes_saved": 3000},
+        )
+        self.assertDictEqual(
+            stats["ring_1"]["not_modified"], {"responses_count": 0, "bytes_saved": 0}
+        )
+
+    @patch(MANAGERS_PATH + ".character.avoided_queries_count", lambda: 42)
+    def test_calculate_stats_4(self):
+        """reports queries avoided by update contexts"""
+        stats = CharacterUpdateStatus.objects.statistics()["update_statistics"]
+
+        self.assertDictEqual(stats["update_context"], {"avoided_queries_count": 42})
+
 
 @patch(MANAGERS_PATH + ".general.esi")
 class TestLocationManager(NoSocketsTestCase):
@@ -656,7 +1042,7 @@ class TestLocationManager(NoSocketsTestCase):
 
     # Structures
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_can_create_structure(self, mock_fetch_esi_status, mock_esi):
         mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
         mock_esi.client = esi_client_stub
@@ -671,7 +1057,7 @@ class TestLocationManager(NoSocketsTestCase):
         self.assertEqual(obj.eve_type, self.astrahus)
         self.assertEqual(obj.owner, self.corporation_2001)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_can_update_structure(self, mock_fetch_esi_status, mock_esi):
         mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
         mock_esi.client = esi_client_stub
@@ -694,7 +1080,7 @@ class TestLocationManager(NoSocketsTestCase):
         self.assertEqual(obj.eve_type, self.astrahus)
         self.assertEqual(obj.owner, self.corporation_2001)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_does_not_update_existing_location_during_grace_period(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -714,7 +1100,7 @@ class TestLocationManager(NoSocketsTestCase):
         self.assertFalse(created)
         self.assertEqual(obj, obj_existing)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_always_update_existing_empty_locations_after_grace_period_1(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -725,7 +1111,7 @@ class TestLocationManager(NoSocketsTestCase):
         obj, _ = Location.objects.get_or_create_esi(id=1000000000001, token=self.token)
         self.assertIsNone(obj.eve_solar_system)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_always_update_existing_empty_locations_after_grace_period_2(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -740,7 +1126,7 @@ class TestLocationManager(NoSocketsTestCase):
             )
         self.assertEqual(obj.eve_solar_system, self.amamake)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     @patch(MANAGERS_PATH + ".general.MEMBERAUDIT_LOCATION_STALE_HOURS", 24)
     def test_always_update_existing_locations_which_are_stale(
         self, mock_fetch_esi_status, mock_esi
@@ -763,7 +1149,7 @@ class TestLocationManager(NoSocketsTestCase):
         self.assertFalse(created)
         self.assertEqual(obj.eve_solar_system, self.amamake)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_propagates_http_error_on_structure_create(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -773,7 +1159,7 @@ class TestLocationManager(NoSocketsTestCase):
         with self.assertRaises(HTTPNotFound):
             Location.objects.update_or_create_esi(id=1000000000099, token=self.token)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_always_creates_empty_location_for_invalid_ids(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -786,7 +1172,7 @@ class TestLocationManager(NoSocketsTestCase):
         self.assertTrue(created)
         self.assertTrue(obj.is_empty)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_propagates_exceptions_on_structure_create(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -798,7 +1184,7 @@ class TestLocationManager(NoSocketsTestCase):
         with self.assertRaises(RuntimeError):
             Location.objects.update_or_create_esi(id=1000000000099, token=self.token)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_can_create_empty_location_on_access_error_1(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -813,7 +1199,7 @@ class TestLocationManager(NoSocketsTestCase):
         self.assertTrue(created)
         self.assertEqual(obj.id, 1000000000099)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_can_create_empty_location_on_access_error_2(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -828,7 +1214,7 @@ class TestLocationManager(NoSocketsTestCase):
         self.assertTrue(created)
         self.assertEqual(obj.id, 1000000000099)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_does_not_creates_empty_location_on_access_errors_if_requested(
         self, mock_fetch_esi_status, mock_esi
     ):
@@ -839,7 +1225,7 @@ class TestLocationManager(NoSocketsTestCase):
         with self.assertRaises(RuntimeError):
             Location.objects.update_or_create_esi(id=1000000000099, token=self.token)
 
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_records_esi_error_on_access_error(self, mock_fetch_esi_status, mock_esi):
         mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
         mock_esi.client.Universe.get_universe_structures_structure_id.side_effect = (
@@ -919,6 +1305,63 @@ class TestLocationManager(NoSocketsTestCase):
         self.assertIsNone(obj.owner)
 
 
+class TestLocationManagerIdsExisting(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        load_eveuniverse()
+        load_entities()
+        load_locations()
+
+    def setUp(self) -> None:
+        Location.objects._known_ids.clear()
+
+    def tearDown(self) -> None:
+        Location.objects._known_ids.clear()
+
+    def test_should_return_existing_ids_only(self):
+        # when
+        result = Location.objects.ids_existing([60003760, 1000000000001, 99])
+        # then
+        self.assertSetEqual(result, {60003760, 1000000000001})
+
+    @patch(MANAGERS_PATH + ".general.transaction")
+    def test_should_not_query_known_ids_again(self, mock_transaction):
+        # given
+        mock_transaction.get_connection.return_value.in_atomic_block = False
+        Location.objects.ids_existing([60003760])
+        # when
+        with self.assertNumQueries(0):
+            result = Location.objects.ids_existing([60003760])
+        # then
+        self.assertSetEqual(result, {60003760})
+
+    def test_should_not_cache_ids_found_inside_a_transaction(self):
+        # given
+        Location.objects.ids_existing([60003760])
+        # when
+        with self.assertNumQueries(1):
+            result = Location.objects.ids_existing([60003760])
+        # then
+        self.assertSetEqual(result, {60003760})
+
+    @patch(MANAGERS_PATH + ".general.time")
+    @patch(MANAGERS_PATH + ".general.transaction")
+    def test_should_query_known_ids_again_after_timeout(
+        self, mock_transaction, mock_time
+    ):
+        # given
+        mock_transaction.get_connection.return_value.in_atomic_block = False
+        mock_time.monotonic.return_value = 1000.0
+        Location.objects.ids_existing([60003760])
+        mock_time.monotonic.return_value = 1000.0 + 24 * 3600
+        # when
+        with self.assertNumQueries(1):
+            result = Location.objects.ids_existing([60003760])
+        # then
+        self.assertSetEqual(result, {60003760})
+
+
 @patch(MANAGERS_PATH + ".general.esi")
 class TestLocationManagerAsync(TestCase):
     @classmethod
@@ -940,7 +1383,7 @@ class TestLocationManagerAsync(TestCase):
         cache.clear()
 
     @override_settings(CELERY_ALWAYS_EAGER=True)
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     def test_can_create_structure_async(self, mock_fetch_esi_status, mock_esi):
         mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
         mock_esi.client = esi_client_stub
@@ -960,3 +1403,39 @@ class TestLocationManagerAsync(TestCase):
         self.assertEqual(obj.owner, self.corporation_2001)
 
         self.assertTrue(mock_fetch_esi_status.called)  # proofs task was called
+
+
+class TestSkillSetSkillManager(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        load_eveuniverse()
+        cls.skill_set_1 = SkillSet.objects.create(name="Ship 1")
+        SkillSetSkill.objects.create(
+            skill_set=cls.skill_set_1, eve_type_id=24311, required_level=3
+        )
+        SkillSetSkill.objects.create(
+            skill_set=cls.skill_set_1, eve_type_id=24312, required_level=3
+        )
+        cls.skill_set_2 = SkillSet.objects.create(name="Ship 2")
+        SkillSetSkill.objects.create(
+            skill_set=cls.skill_set_2, eve_type_id=24312, recommended_level=3
+        )
+
+    def test_should_return_skill_sets_by_skill_type(self):
+        # when
+        result = SkillSetSkill.objects.skill_set_ids_by_skill_type()
+        # then
+        self.assertDictEqual(
+            result,
+            {
+                24311: {self.skill_set_1.pk},
+                24312: {self.skill_set_1.pk, self.skill_set_2.pk},
+            },
+        )
+
+    def test_should_return_skill_sets_for_given_skill_types(self):
+        # when
+        result = SkillSetSkill.objects.skill_set_ids_for_skill_types([24311])
+        # then
+        self.assertSetEqual(result, {self.skill_set_1.pk})
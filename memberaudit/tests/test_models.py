@@ -6,6 +6,7 @@ from unittest.mock import Mock, patch
 from bravado.exception import HTTPNotFound
 from pytz import UTC
 
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.test import TestCase, override_settings
 from django.utils.dateparse import parse_datetime
@@ -15,11 +16,20 @@ from esi.models import Token
 from eveuniverse.models import EveEntity, EveMarketPrice, EveSolarSystem, EveType
 
 from allianceauth.tests.auth_utils import AuthUtils
-from app_utils.esi import EsiStatus
+from app_utils.esi import EsiErrorLimitExceeded, EsiStatus
 from app_utils.esi_testing import BravadoResponseStub
 from app_utils.testing import NoSocketsTestCase
 
-from ..core.xml_converter import eve_xml_to_html
+from ..core import esi_governor
+from ..core.update_context import (
+    AVOIDED_QUERIES_KEY,
+    QUERIES_PER_CHARACTER_LOOKUP,
+    QUERIES_PER_TOKEN_LOOKUP,
+    CharacterUpdateContext,
+    avoided_queries_count,
+    flush_avoided_queries,
+)
+from ..core.xml_converter import XML_CONVERTER_VERSION, eve_xml_to_html
 from ..models import (
     Character,
     CharacterAttributes,
@@ -33,9 +43,12 @@ from ..models import (
     CharacterMailLabel,
     CharacterSkill,
     CharacterSkillqueueEntry,
+    CharacterSkillSetCheck,
     CharacterUpdateStatus,
     CharacterWalletJournalEntry,
+    CharacterWalletTransaction,
     Location,
+    MailContent,
     MailEntity,
     SkillSet,
     SkillSetGroup,
@@ -49,10 +62,12 @@ from . import (
     scope_names_set,
 )
 from .testdata.esi_client_stub import esi_client_stub
+from .testdata.esi_test_tools import BravadoOperationStub
 from .testdata.load_entities import load_entities
 from .testdata.load_eveuniverse import load_eveuniverse
 from .testdata.load_locations import load_locations
 
+ESI_GOVERNOR_PATH = "memberaudit.core.esi_governor"
 MODELS_PATH = "memberaudit.models"
 MANAGERS_PATH = "memberaudit.managers"
 TASKS_PATH = "memberaudit.tasks"
@@ -239,6 +254,120 @@ class TestCharacterFetchToken(TestCase):
         self.assertEqual(kwargs["user"], self.character.character_ownership.user)
 
 
+class TestCharacterUpdateContext(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        load_entities()
+
+    def setUp(self) -> None:
+        self.character = create_memberaudit_character(1001)
+        flush_avoided_queries()
+        cache.delete(AVOIDED_QUERIES_KEY)
+
+    def _fresh_character(self, update_context) -> Character:
+        character = Character.objects.get(pk=self.character.pk)
+        character.set_update_context(update_context)
+        return character
+
+    def test_should_build_context_with_token_for_all_scopes(self):
+        # when
+        update_context = self.character.build_update_context()
+        # then
+        self.assertEqual(update_context.character_pk, self.character.pk)
+        self.assertEqual(update_context.eve_character_id, 1001)
+        self.assertEqual(update_context.character_name, "Bruce Wayne")
+        self.assertEqual(
+            update_context.user_id, self.character.character_ownership.user_id
+        )
+        token = Token.objects.get(pk=update_context.token_pk)
+        self.assertSetEqual(scope_names_set(token), set(Character.get_esi_scopes()))
+
+    @patch(MODELS_PATH + ".character.notify_throttled", lambda *args, **kwargs: None)
+    def test_should_build_context_without_token_when_no_valid_token(self):
+        # given
+        Token.objects.filter(character_id=1001).delete()
+        # when
+        update_context = self.character.build_update_context()
+        # then
+        self.assertIsNone(update_context.token_pk)
+
+    def test_should_survive_roundtrip_as_dict(self):
+        # given
+        update_context = self.character.build_update_context()
+        # when
+        data = json.loads(json.dumps(update_context.asdict()))
+        # then
+        self.assertEqual(CharacterUpdateContext.from_dict(data), update_context)
+
+    def test_should_fetch_token_from_context_with_one_query(self):
+        # given
+        update_context = self.character.build_update_context()
+        character = self._fresh_character(update_context)
+        # when
+        with self.assertNumQueries(1):
+            token = character.fetch_token("esi-mail.read_mail.v1")
+        with self.assertNumQueries(0):
+            token_2 = character.fetch_token("esi-skills.read_skills.v1")
+        # then
+        self.assertEqual(token.pk, update_context.token_pk)
+        self.assertEqual(token_2.pk, update_context.token_pk)
+        flush_avoided_queries()
+        self.assertEqual(avoided_queries_count(), 2 * QUERIES_PER_TOKEN_LOOKUP - 1)
+
+    def test_should_count_avoided_queries_locally_until_flushed(self):
+        # given
+        character = self._fresh_character(self.character.build_update_context())
+        # when
+        with patch(MODELS_PATH + ".character.cache") as mock_cache, patch(
+            "memberaudit.core.update_context.cache"
+        ) as mock_cache_2:
+            character.fetch_token("esi-mail.read_mail.v1")
+            character.fetch_token("esi-skills.read_skills.v1")
+            character.eve_character_id
+        # then
+        self.assertFalse(mock_cache.method_calls)
+        self.assertFalse(mock_cache_2.method_calls)
+        self.assertEqual(avoided_queries_count(), 0)
+        flush_avoided_queries()
+        self.assertEqual(
+            avoided_queries_count(),
+            2 * QUERIES_PER_TOKEN_LOOKUP - 1 + QUERIES_PER_CHARACTER_LOOKUP,
+        )
+
+    def test_should_provide_character_id_and_name_without_queries(self):
+        # given
+        character = self._fresh_character(self.character.build_update_context())
+        # when
+        with self.assertNumQueries(0):
+            character_id = character.eve_character_id
+            name = str(character)
+        # then
+        self.assertEqual(character_id, 1001)
+        self.assertEqual(name, f"Bruce Wayne (PK:{character.pk})")
+        flush_avoided_queries()
+        self.assertEqual(avoided_queries_count(), QUERIES_PER_CHARACTER_LOOKUP)
+
+    def test_should_fall_back_to_normal_lookup_when_token_no_longer_exists(self):
+        # given
+        update_context = self.character.build_update_context()
+        token_pk = update_context.token_pk
+        character = self._fresh_character(update_context._replace(token_pk=999999))
+        # when
+        token = character.fetch_token()
+        # then
+        self.assertEqual(token.pk, token_pk)
+        self.assertIsNone(character.update_context.token_pk)
+
+    def test_should_not_accept_context_of_other_character(self):
+        # given
+        other_character = create_memberaudit_character(1002)
+        update_context = other_character.build_update_context()
+        # when/then
+        with self.assertRaises(ValueError):
+            self.character.set_update_context(update_context)
+
+
 class TestCharacterSkillQueue(NoSocketsTestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -417,6 +546,54 @@ class TestCharacterUpdateStatus(NoSocketsTestCase):
         )
         self.assertFalse(status.has_changed(content=self.content, hash_num=3))
 
+    def test_should_increase_unchanged_count_when_content_did_not_change(self):
+        # given
+        status = CharacterUpdateStatus.objects.create(
+            character=self.character_1001,
+            section=Character.UpdateSection.ASSETS,
+            is_success=True,
+            content_hash_1="abc",
+            started_at=now(),
+            changed_at=now() - dt.timedelta(hours=4),
+            unchanged_count=1,
+        )
+        # when
+        status.update_unchanged_count()
+        # then
+        status.refresh_from_db()
+        self.assertEqual(status.unchanged_count, 2)
+
+    def test_should_reset_unchanged_count_when_content_changed(self):
+        # given
+        status = CharacterUpdateStatus.objects.create(
+            character=self.character_1001,
+            section=Character.UpdateSection.ASSETS,
+            is_success=True,
+            started_at=now(),
+            unchanged_count=3,
+        )
+        # when
+        status.update_content_hash(self.content)
+        status.update_unchanged_count()
+        # then
+        status.refresh_from_db()
+        self.assertEqual(status.unchanged_count, 0)
+        self.assertIsNotNone(status.changed_at)
+
+    def test_should_not_track_unchanged_count_for_sections_without_content(self):
+        # given
+        status = CharacterUpdateStatus.objects.create(
+            character=self.character_1001,
+            section=Character.UpdateSection.LOCATION,
+            is_success=True,
+            started_at=now(),
+        )
+        # when
+        status.update_unchanged_count()
+        # then
+        status.refresh_from_db()
+        self.assertEqual(status.unchanged_count, 0)
+
     def test_is_updating_1(self):
         """When started_at exist and finished_at does not exist, return True"""
         status = CharacterUpdateStatus.objects.create(
@@ -549,6 +726,96 @@ class TestCharacterUpdateSectionMethods(NoSocketsTestCase):
         self.assertTrue(self.character_1001.is_section_updating(section=self.section))
 
 
+class TestCharacterFetchEsiConditional(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        load_entities()
+
+    def setUp(self) -> None:
+        self.character_1001 = create_memberaudit_character(1001)
+        self.section = Character.UpdateSection.ASSETS
+        self.pages = {1: [1, 2], 2: [3]}
+        self.requests = list()
+
+    def operation(self, page=1, _request_options=None, **kwargs):
+        data = self.pages[page]
+        etag = f'"{page}-{data}"'
+        headers = {"x-pages": len(self.pages), "ETag": etag, "Content-Length": 10}
+        if_none_match = (_request_options or {}).get("headers", {}).get("If-None-Match")
+        self.requests.append((page, if_none_match))
+        return BravadoOperationStub(
+            data, headers=headers, not_modified=if_none_match == etag
+        )
+
+    def fetch_and_store(self, force_update=False):
+        data = self.character_1001._fetch_esi_conditional(
+            self.operation, section=self.section, force_update=force_update
+        )
+        if data is not None:
+            self.character_1001.update_section_content_hash(self.section, data)
+        return data
+
+    def test_should_fetch_all_pages(self):
+        # when
+        result = self.fetch_and_store()
+        # then
+        self.assertListEqual(result, [1, 2, 3])
+        self.assertListEqual(self.requests, [(1, None), (2, None)])
+
+    def test_should_return_none_when_not_modified(self):
+        # given
+        self.fetch_and_store()
+        # when
+        result = self.fetch_and_store()
+        # then
+        self.assertIsNone(result)
+        status = self.character_1001.update_status_set.get(section=self.section)
+        self.assertEqual(status.not_modified_count, 1)
+        self.assertEqual(status.not_modified_bytes, 20)
+
+    def test_should_refetch_unmodified_pages_when_other_pages_modified(self):
+        # given
+        self.fetch_and_store()
+        self.pages[2] = [4]
+        self.requests.clear()
+        # when
+        result = self.fetch_and_store()
+        # then
+        self.assertListEqual(result, [1, 2, 4])
+        self.assertListEqual(
+            self.requests, [(1, '"1-[1, 2]"'), (2, '"2-[3]"'), (1, None)]
+        )
+        # and new ETags are used for next request
+        self.assertIsNone(self.fetch_and_store())
+
+    def test_should_not_send_etags_when_forced(self):
+        # given
+        self.fetch_and_store()
+        self.requests.clear()
+        # when
+        result = self.fetch_and_store(force_update=True)
+        # then
+        self.assertListEqual(result, [1, 2, 3])
+        self.assertListEqual(self.requests, [(1, None), (2, None)])
+
+    def test_should_keep_new_etags_when_content_unchanged(self):
+        # given
+        self.fetch_and_store()
+        status = self.character_1001.update_status_set.get(section=self.section)
+        status.content_etags_1 = ""
+        status.save()
+        # when
+        data = self.character_1001._fetch_esi_conditional(
+            self.operation, section=self.section
+        )
+        has_changed = self.character_1001.has_section_changed(self.section, data)
+        # then
+        self.assertFalse(has_changed)
+        status.refresh_from_db()
+        self.assertEqual(len(status.content_etags()), 2)
+
+
 @patch(MODELS_PATH + ".character.MEMBERAUDIT_UPDATE_STALE_RING_3", 640)
 class TestCharacterIsUpdateSectionStale(NoSocketsTestCase):
     @classmethod
@@ -591,6 +858,76 @@ class TestCharacterIsUpdateSectionStale(NoSocketsTestCase):
         """When section does not exist, then return True"""
         self.assertTrue(self.character.is_update_section_stale(self.section))
 
+    def test_expired_on_esi(self):
+        """When data has expired on ESI and ring 1 time has passed, then return True"""
+        CharacterUpdateStatus.objects.create(
+            character=self.character,
+            section=self.section,
+            is_success=True,
+            started_at=now() - dt.timedelta(hours=2),
+            finished_at=now() - dt.timedelta(hours=2),
+            expires_at=now() - dt.timedelta(hours=1),
+        )
+        self.assertTrue(self.character.is_update_section_stale(self.section))
+
+    def test_expired_on_esi_within_ring_1(self):
+        """When data has expired on ESI, but ring 1 time has not passed,
+        then return False
+        """
+        CharacterUpdateStatus.objects.create(
+            character=self.character,
+            section=self.section,
+            is_success=True,
+            started_at=now() - dt.timedelta(minutes=30),
+            finished_at=now() - dt.timedelta(minutes=30),
+            expires_at=now() - dt.timedelta(minutes=25),
+        )
+        self.assertFalse(self.character.is_update_section_stale(self.section))
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_UPDATE_BACKOFF_MAX_FACTOR", 4)
+    def test_should_back_off_when_content_did_not_change(self):
+        """When content did not change in recent updates,
+        then section becomes stale later
+        """
+        CharacterUpdateStatus.objects.create(
+            character=self.character,
+            section=self.section,
+            is_success=True,
+            started_at=now() - dt.timedelta(hours=12),
+            finished_at=now() - dt.timedelta(hours=12),
+            unchanged_count=1,
+        )
+        self.assertFalse(self.character.is_update_section_stale(self.section))
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_UPDATE_BACKOFF_MAX_FACTOR", 4)
+    def test_should_limit_backoff(self):
+        """When content did not change for a long time,
+        then section becomes stale after max backoff
+        """
+        CharacterUpdateStatus.objects.create(
+            character=self.character,
+            section=self.section,
+            is_success=True,
+            started_at=now() - dt.timedelta(hours=48),
+            finished_at=now() - dt.timedelta(hours=48),
+            unchanged_count=10,
+        )
+        self.assertTrue(self.character.is_update_section_stale(self.section))
+
+    def test_not_yet_expired_on_esi(self):
+        """When data has not expired on ESI, but ring time has passed,
+        then return True
+        """
+        CharacterUpdateStatus.objects.create(
+            character=self.character,
+            section=self.section,
+            is_success=True,
+            started_at=now() - dt.timedelta(hours=12),
+            finished_at=now() - dt.timedelta(hours=12),
+            expires_at=now() + dt.timedelta(hours=1),
+        )
+        self.assertTrue(self.character.is_update_section_stale(self.section))
+
 
 class TestCharacterUserHasAccess(TestCase):
     @classmethod
@@ -1243,6 +1580,63 @@ class TestCharacterUpdateContracts(TestCharacterUpdateBase):
         bid = obj.bids.get(bid_id=2)
         self.assertEqual(float(bid.amount), 21_000_000)
 
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    def test_should_update_items_of_multiple_contracts_at_once(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        self.character_1001.update_contract_headers()
+        contract_pks = list(self.character_1001.contracts.values_list("pk", flat=True))
+        # when
+        with patch(
+            MANAGERS_PATH + ".sections.EveType.objects.bulk_get_or_create_esi"
+        ) as mock_bulk_get_or_create_esi:
+            self.character_1001.update_contracts_items(contract_pks=contract_pks)
+        # then
+        self.assertEqual(mock_bulk_get_or_create_esi.call_count, 1)
+        obj = self.character_1001.contracts.get(contract_id=100000002)
+        self.assertSetEqual(set(obj.items.values_list("record_id", flat=True)), {1, 2})
+        obj = self.character_1001.contracts.get(contract_id=100000003)
+        self.assertSetEqual(set(obj.items.values_list("record_id", flat=True)), {1})
+        obj = self.character_1001.contracts.get(contract_id=100000001)
+        self.assertFalse(obj.items.exists())
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    def test_should_update_bids_of_multiple_contracts_at_once(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        self.character_1001.update_contract_headers()
+        contract_pks = list(self.character_1001.contracts.values_list("pk", flat=True))
+        # when
+        with patch(
+            MODELS_PATH + ".character.EveEntity.objects.bulk_create_esi"
+        ) as mock_bulk_create_esi:
+            self.character_1001.update_contracts_bids(contract_pks=contract_pks)
+        # then
+        mock_bulk_create_esi.assert_called_once_with(ids={1101})
+        obj = self.character_1001.contracts.get(contract_id=100000003)
+        bid = obj.bids.get(bid_id=1)
+        self.assertEqual(bid.bidder, EveEntity.objects.get(id=1101))
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    def test_should_not_resolve_bidders_when_fetching_bids_failed(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        self.character_1001.update_contract_headers()
+        contract_pks = list(self.character_1001.contracts.values_list("pk", flat=True))
+        # when
+        with patch(
+            MODELS_PATH + ".character.EveEntity.objects.bulk_create_esi"
+        ) as mock_bulk_create_esi, patch(
+            MODELS_PATH + ".character.Character._raise_if_esi_error_limit_reached"
+        ) as mock_raise:
+            mock_raise.side_effect = EsiErrorLimitExceeded(retry_in=30)
+            with self.assertRaises(EsiErrorLimitExceeded):
+                self.character_1001.update_contracts_bids(contract_pks=contract_pks)
+        # then
+        self.assertFalse(mock_bulk_create_esi.called)
+        obj = self.character_1001.contracts.get(contract_id=100000003)
+        self.assertFalse(obj.bids.exists())
+
     @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
     def test_update_contracts_7(self, mock_esi):
         """when contract list from ESI has not changed, then skip update"""
@@ -1562,6 +1956,33 @@ class TestCharacterUpdateImplants(TestCharacterUpdateBase):
         self.character_1001.update_implants(force_update=True)
         self.assertTrue(self.character_1001.implants.filter(eve_type_id=19540).exists())
 
+    def test_update_implants_6(self, mock_esi):
+        """stores when data expires on ESI"""
+        mock_esi.client = esi_client_stub
+        self.character_1001.reset_update_section(Character.UpdateSection.IMPLANTS)
+
+        self.character_1001.update_implants()
+
+        status = self.character_1001.update_status_set.get(
+            section=Character.UpdateSection.IMPLANTS
+        )
+        self.assertEqual(
+            status.expires_at, make_aware(dt.datetime(2030, 1, 1, 12, 0), UTC)
+        )
+
+    def test_update_implants_5(self, mock_esi):
+        """when ESI reports data as not modified, then skip update"""
+        mock_esi.client = esi_client_stub
+
+        self.character_1001.update_implants()
+        self.character_1001.update_implants()
+
+        status = self.character_1001.update_status_set.get(
+            section=Character.UpdateSection.IMPLANTS
+        )
+        self.assertEqual(status.not_modified_count, 1)
+        self.assertGreater(status.not_modified_bytes, 0)
+
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
 @patch(MODELS_PATH + ".character.esi")
@@ -1627,6 +2048,13 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
     def setUpClass(cls) -> None:
         super().setUpClass()
 
+    def setUp(self) -> None:
+        esi_governor.clear()
+        cache.delete(self.character_1001._mail_headers_full_sync_key())
+
+    def tearDown(self) -> None:
+        esi_governor.clear()
+
     def test_update_mailing_lists_1(self, mock_esi):
         """can create new mailing lists from scratch"""
         mock_esi.client = esi_client_stub
@@ -1810,7 +2238,7 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
             return None, False
 
     @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
     def test_update_mail_headers_1(
         self, mock_eve_entity, mock_fetch_esi_status, mock_esi
@@ -1852,7 +2280,34 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
         self.assertEqual(obj.timestamp, parse_datetime("2015-09-20T12:07:00Z"))
 
     @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
+    @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
+    def test_should_create_recipients_and_labels_of_new_mails_in_bulk(
+        self, mock_eve_entity, mock_fetch_esi_status, mock_esi
+    ):
+        # given
+        mock_esi.client = esi_client_stub
+        mock_eve_entity.side_effect = self.stub_eve_entity_get_or_create_esi
+        mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
+        self.character_1001.update_mailing_lists()
+        self.character_1001.update_mail_labels()
+        # when
+        with patch.object(
+            MailEntity.objects,
+            "bulk_update_names",
+            wraps=MailEntity.objects.bulk_update_names,
+        ) as mock_bulk_update_names:
+            self.character_1001.update_mail_headers()
+        # then
+        self.assertEqual(mock_bulk_update_names.call_count, 1)
+        obj = self.character_1001.mails.get(mail_id=1)
+        self.assertSetEqual(
+            set(obj.recipients.values_list("id", flat=True)), {1001, 9001}
+        )
+        self.assertSetEqual(set(obj.labels.values_list("label_id", flat=True)), {3})
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
     def test_update_mail_headers_2(
         self, mock_eve_entity, mock_fetch_esi_status, mock_esi
@@ -1898,7 +2353,7 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
         self.assertSetEqual(set(obj.labels.values_list("label_id", flat=True)), {3})
 
     @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
     def test_update_mail_headers_3(
         self, mock_eve_entity, mock_fetch_esi_status, mock_esi
@@ -1921,7 +2376,7 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
         self.assertFalse(obj.is_read)
 
     @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
     def test_update_mail_headers_4(
         self, mock_eve_entity, mock_fetch_esi_status, mock_esi
@@ -1943,38 +2398,242 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
         obj = self.character_1001.mails.get(mail_id=1)
         self.assertTrue(obj.is_read)
 
-    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", 15)
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
-    @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
-    def test_update_mail_headers_6(
-        self, mock_eve_entity, mock_fetch_esi_status, mock_esi
-    ):
-        """when data retention limit is set, then only fetch mails within that limit"""
+    def _update_mail_headers_and_spy_writes(self):
+        """updates mail headers with spies on the methods writing changes
+        and returns the spies
+        """
+        LabelsThrough = CharacterMail.labels.through
+        # the code writes through the related manager character.mails,
+        # which is a subclass of the manager class
+        with patch.object(
+            type(CharacterMail.objects),
+            "bulk_update",
+            autospec=True,
+            side_effect=type(CharacterMail.objects).bulk_update,
+        ) as mock_bulk_update, patch.object(
+            LabelsThrough.objects,
+            "bulk_create",
+            wraps=LabelsThrough.objects.bulk_create,
+        ) as mock_bulk_create:
+            self.character_1001.update_mail_headers(force_update=True)
+        return mock_bulk_update, mock_bulk_create
+
+    def _load_mail_headers(self, mock_eve_entity, mock_fetch_esi_status, mock_esi):
         mock_esi.client = esi_client_stub
         mock_eve_entity.side_effect = self.stub_eve_entity_get_or_create_esi
         mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
+        self.character_1001.update_mailing_lists()
+        self.character_1001.update_mail_labels()
+        self.character_1001.update_mail_headers()
 
-        with patch(MODELS_PATH + ".character.now") as mock_now:
-            mock_now.return_value = make_aware(dt.datetime(2015, 9, 20, 20, 5), UTC)
-            self.character_1001.update_mailing_lists()
-            self.character_1001.update_mail_labels()
-            self.character_1001.update_mail_headers()
-
-        self.assertSetEqual(
-            set(self.character_1001.mails.values_list("mail_id", flat=True)),
-            {2, 3},
-        )
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
+    @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
+    def test_should_not_write_unchanged_mail_headers(
+        self, mock_eve_entity, mock_fetch_esi_status, mock_esi
+    ):
+        # given
+        self._load_mail_headers(mock_eve_entity, mock_fetch_esi_status, mock_esi)
+        # when
+        mock_bulk_update, mock_bulk_create = self._update_mail_headers_and_spy_writes()
+        # then
+        self.assertFalse(mock_bulk_update.called)
+        self.assertFalse(mock_bulk_create.called)
+        obj = self.character_1001.mails.get(mail_id=1)
+        self.assertTrue(obj.is_read)
+        self.assertSetEqual(set(obj.labels.values_list("label_id", flat=True)), {3})
 
-    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", 15)
-    @patch(MANAGERS_PATH + ".general.fetch_esi_status")
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
     @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
-    def test_update_mail_headers_7(
+    def test_should_write_only_changed_read_state_of_mail_headers(
         self, mock_eve_entity, mock_fetch_esi_status, mock_esi
     ):
-        """when data retention limit is set, then remove old data beyond that limit"""
-        mock_esi.client = esi_client_stub
-        mock_eve_entity.side_effect = self.stub_eve_entity_get_or_create_esi
-        mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
+        # given
+        self._load_mail_headers(mock_eve_entity, mock_fetch_esi_status, mock_esi)
+        self.character_1001.mails.filter(mail_id=1).update(is_read=False)
+        # when
+        mock_bulk_update, mock_bulk_create = self._update_mail_headers_and_spy_writes()
+        # then
+        self.assertEqual(mock_bulk_update.call_count, 1)
+        changed_mails = mock_bulk_update.call_args[0][1]
+        self.assertListEqual([mail.mail_id for mail in changed_mails], [1])
+        self.assertFalse(mock_bulk_create.called)
+        obj = self.character_1001.mails.get(mail_id=1)
+        self.assertTrue(obj.is_read)
+        self.assertSetEqual(set(obj.labels.values_list("label_id", flat=True)), {3})
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
+    @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
+    def test_should_add_missing_label_to_mail_header(
+        self, mock_eve_entity, mock_fetch_esi_status, mock_esi
+    ):
+        # given
+        self._load_mail_headers(mock_eve_entity, mock_fetch_esi_status, mock_esi)
+        mail = self.character_1001.mails.get(mail_id=1)
+        mail.labels.clear()
+        # when
+        mock_bulk_update, mock_bulk_create = self._update_mail_headers_and_spy_writes()
+        # then
+        self.assertFalse(mock_bulk_update.called)
+        self.assertEqual(mock_bulk_create.call_count, 1)
+        self.assertEqual(len(mock_bulk_create.call_args[0][0]), 1)
+        self.assertSetEqual(set(mail.labels.values_list("label_id", flat=True)), {3})
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
+    @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
+    def test_should_remove_obsolete_label_from_mail_header(
+        self, mock_eve_entity, mock_fetch_esi_status, mock_esi
+    ):
+        # given
+        self._load_mail_headers(mock_eve_entity, mock_fetch_esi_status, mock_esi)
+        mail = self.character_1001.mails.get(mail_id=1)
+        mail.labels.add(self.character_1001.mail_labels.get(label_id=17))
+        # when
+        mock_bulk_update, mock_bulk_create = self._update_mail_headers_and_spy_writes()
+        # then
+        self.assertFalse(mock_bulk_update.called)
+        self.assertFalse(mock_bulk_create.called)
+        self.assertSetEqual(set(mail.labels.values_list("label_id", flat=True)), {3})
+        other_mail = self.character_1001.mails.get(mail_id=2)
+        self.assertSetEqual(
+            set(other_mail.labels.values_list("label_id", flat=True)), {3}
+        )
+
+    @staticmethod
+    def _mail_header_pages(is_read: bool = True):
+        """returns stub for fetching mail headers with pages of 50 mails each"""
+
+        def stub(character_id, last_mail_id=None, **kwargs):
+            mail_ids = range(min(last_mail_id or 151, 151) - 1, 0, -1)
+            result = [
+                {
+                    "mail_id": mail_id,
+                    "from": 1002,
+                    "is_read": is_read,
+                    "labels": [],
+                    "recipients": [],
+                    "subject": f"Mail {mail_id}",
+                    "timestamp": parse_datetime("2015-09-05T16:07:00Z"),
+                }
+                for mail_id in list(mail_ids)[:50]
+            ]
+            return BravadoOperationStub(result)
+
+        return stub
+
+    def _create_mails(self, mail_ids, is_read: bool = True):
+        CharacterMail.objects.bulk_create(
+            [
+                CharacterMail(
+                    character=self.character_1001,
+                    mail_id=mail_id,
+                    is_read=is_read,
+                    timestamp=parse_datetime("2015-09-05T16:07:00Z"),
+                )
+                for mail_id in mail_ids
+            ]
+        )
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    def test_should_stop_fetching_mail_headers_when_reaching_known_mails(
+        self, mock_esi
+    ):
+        # given
+        mock_esi.client.Mail.get_characters_character_id_mail.side_effect = (
+            self._mail_header_pages()
+        )
+        self._create_mails(range(1, 141))
+        # when
+        mail_headers = self.character_1001._fetch_mail_headers(Mock(), full_sync=False)
+        # then
+        self.assertEqual(
+            mock_esi.client.Mail.get_characters_character_id_mail.call_count, 1
+        )
+        self.assertSetEqual(set(mail_headers.keys()), set(range(101, 151)))
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    def test_should_continue_fetching_mail_headers_when_read_state_changed(
+        self, mock_esi
+    ):
+        # given
+        mock_esi.client.Mail.get_characters_character_id_mail.side_effect = (
+            self._mail_header_pages()
+        )
+        self._create_mails(range(1, 101), is_read=True)
+        self._create_mails(range(101, 151), is_read=False)
+        # when
+        self.character_1001._fetch_mail_headers(Mock(), full_sync=False)
+        # then
+        self.assertEqual(
+            mock_esi.client.Mail.get_characters_character_id_mail.call_count, 2
+        )
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    def test_should_fetch_all_mail_headers_for_full_sync(self, mock_esi):
+        # given
+        mock_esi.client.Mail.get_characters_character_id_mail.side_effect = (
+            self._mail_header_pages()
+        )
+        self._create_mails(range(1, 151))
+        # when
+        mail_headers = self.character_1001._fetch_mail_headers(Mock(), full_sync=True)
+        # then
+        self.assertEqual(
+            mock_esi.client.Mail.get_characters_character_id_mail.call_count, 4
+        )
+        self.assertEqual(len(mail_headers), 150)
+
+    @patch(MODELS_PATH + ".character.Character._fetch_mail_headers")
+    def test_should_do_full_sync_of_mail_headers_only_periodically(
+        self, mock_fetch_mail_headers, mock_esi
+    ):
+        # given
+        mock_fetch_mail_headers.return_value = dict()
+        # when
+        self.character_1001.update_mail_headers()
+        self.character_1001.update_mail_headers()
+        self.character_1001.update_mail_headers(force_update=True)
+        # then
+        self.assertListEqual(
+            [call[1]["full_sync"] for call in mock_fetch_mail_headers.call_args_list],
+            [True, False, True],
+        )
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", 15)
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
+    @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
+    def test_update_mail_headers_6(
+        self, mock_eve_entity, mock_fetch_esi_status, mock_esi
+    ):
+        """when data retention limit is set, then only fetch mails within that limit"""
+        mock_esi.client = esi_client_stub
+        mock_eve_entity.side_effect = self.stub_eve_entity_get_or_create_esi
+        mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
+
+        with patch(MODELS_PATH + ".character.now") as mock_now:
+            mock_now.return_value = make_aware(dt.datetime(2015, 9, 20, 20, 5), UTC)
+            self.character_1001.update_mailing_lists()
+            self.character_1001.update_mail_labels()
+            self.character_1001.update_mail_headers()
+
+        self.assertSetEqual(
+            set(self.character_1001.mails.values_list("mail_id", flat=True)),
+            {2, 3},
+        )
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", 15)
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status")
+    @patch(MANAGERS_PATH + ".sections.EveEntity.objects.get_or_create_esi")
+    def test_update_mail_headers_7(
+        self, mock_eve_entity, mock_fetch_esi_status, mock_esi
+    ):
+        """when data retention limit is set, then remove old data beyond that limit"""
+        mock_esi.client = esi_client_stub
+        mock_eve_entity.side_effect = self.stub_eve_entity_get_or_create_esi
+        mock_fetch_esi_status.return_value = EsiStatus(True, 99, 60)
         sender, _ = MailEntity.objects.update_or_create_from_eve_entity_id(id=1002)
         CharacterMail.objects.create(
             character=self.character_1001,
@@ -1996,37 +2655,66 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
             {2, 3},
         )
 
-    def test_should_update_existing_mail_body(self, mock_esi):
+    def test_should_not_fetch_mail_body_fetched_for_other_character(self, mock_esi):
         # given
-        mock_esi.client = esi_client_stub
         sender, _ = MailEntity.objects.update_or_create_from_eve_entity_id(id=1002)
+        content = MailContent.objects.create(id=1, body="blah blah blah")
+        CharacterMail.objects.create(
+            character=self.character_1002,
+            mail_id=1,
+            sender=sender,
+            subject="Mail 1",
+            content=content,
+            is_read=False,
+            timestamp=parse_datetime("2015-09-30T16:07:00Z"),
+        )
         mail = CharacterMail.objects.create(
             character=self.character_1001,
             mail_id=1,
             sender=sender,
             subject="Mail 1",
-            body="Update me",
             is_read=False,
             timestamp=parse_datetime("2015-09-30T16:07:00Z"),
         )
-        recipient_1001, _ = MailEntity.objects.update_or_create_from_eve_entity_id(
-            id=1001
+        # when
+        self.character_1001.update_mail_body(mail)
+        # then
+        self.assertFalse(
+            mock_esi.client.Mail.get_characters_character_id_mail_mail_id.called
         )
-        recipient_9001 = MailEntity.objects.create(
-            id=9001, category=MailEntity.Category.MAILING_LIST, name="Dummy 2"
+
+    def test_should_share_fetched_mail_body_with_other_characters(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        sender, _ = MailEntity.objects.update_or_create_from_eve_entity_id(id=1002)
+        mail_1001 = CharacterMail.objects.create(
+            character=self.character_1001,
+            mail_id=1,
+            sender=sender,
+            subject="Mail 1",
+            is_read=False,
+            timestamp=parse_datetime("2015-09-30T16:07:00Z"),
+        )
+        mail_1002 = CharacterMail.objects.create(
+            character=self.character_1002,
+            mail_id=1,
+            sender=sender,
+            subject="Mail 1",
+            is_read=False,
+            timestamp=parse_datetime("2015-09-30T16:07:00Z"),
         )
-        mail.recipients.add(recipient_1001, recipient_9001)
         # when
-        self.character_1001.update_mail_body(mail)
+        self.character_1001.update_mail_body(mail_1001)
         # then
-        obj = self.character_1001.mails.get(mail_id=1)
-        self.assertEqual(obj.body, "blah blah blah")
+        mail_1002.refresh_from_db()
+        self.assertEqual(mail_1002.body, "blah blah blah")
+        self.assertEqual(MailContent.objects.count(), 1)
 
-    @patch(MODELS_PATH + ".character.eve_xml_to_html")
+    @patch(MANAGERS_PATH + ".general.eve_xml_to_html")
     def test_should_update_mail_body_from_scratch(self, mock_eve_xml_to_html, mock_esi):
         # given
         mock_esi.client = esi_client_stub
-        mock_eve_xml_to_html.side_effect = lambda x: eve_xml_to_html(x)
+        mock_eve_xml_to_html.side_effect = lambda x, names: eve_xml_to_html(x, names)
         sender, _ = MailEntity.objects.update_or_create_from_eve_entity_id(id=1002)
         mail = CharacterMail.objects.create(
             character=self.character_1001,
@@ -2043,7 +2731,31 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
         # then
         obj = self.character_1001.mails.get(mail_id=2)
         self.assertTrue(obj.body)
-        self.assertTrue(mock_eve_xml_to_html.called)
+        self.assertEqual(mock_eve_xml_to_html.call_count, 1)
+        self.assertTrue(obj.content.body_html)
+        self.assertEqual(obj.content.body_html_version, XML_CONVERTER_VERSION)
+
+    @patch(MANAGERS_PATH + ".general.eve_xml_to_html")
+    def test_should_render_outdated_mail_body_html_again(
+        self, mock_eve_xml_to_html, mock_esi
+    ):
+        # given
+        mock_eve_xml_to_html.return_value = "<p>new</p>"
+        content = MailContent.objects.create(
+            id=1, body="<p>new</p>", body_html="<p>old</p>", body_html_version=0
+        )
+        mail = CharacterMail.objects.create(
+            character=self.character_1001, mail_id=1, content=content
+        )
+        # when
+        body_html_1 = mail.body_html
+        body_html_2 = mail.body_html
+        # then
+        self.assertEqual(body_html_1, "<p>new</p>")
+        self.assertEqual(body_html_2, "<p>new</p>")
+        self.assertEqual(mock_eve_xml_to_html.call_count, 1)
+        content.refresh_from_db()
+        self.assertEqual(content.body_html_version, XML_CONVERTER_VERSION)
 
     def test_should_delete_mail_header_when_fetching_body_returns_404(self, mock_esi):
         # given
@@ -2071,6 +2783,89 @@ class TestCharacterUpdateMails(TestCharacterUpdateBase):
         # then
         self.assertFalse(self.character_1001.mails.filter(mail_id=1).exists())
 
+    def _create_mails_without_body(self, mail_ids: list) -> list:
+        sender, _ = MailEntity.objects.update_or_create_from_eve_entity_id(id=1002)
+        return [
+            CharacterMail.objects.create(
+                character=self.character_1001,
+                mail_id=mail_id,
+                sender=sender,
+                subject=f"Mail {mail_id}",
+                is_read=False,
+                timestamp=parse_datetime("2015-09-30T16:07:00Z"),
+            )
+            for mail_id in mail_ids
+        ]
+
+    @patch(MANAGERS_PATH + ".general.eve_xml_to_html", Mock(return_value=""))
+    def test_should_update_bodies_of_multiple_mails_at_once(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        mails = self._create_mails_without_body([1, 3])
+        # when
+        with patch.object(
+            MailContent.objects, "bulk_create", wraps=MailContent.objects.bulk_create
+        ) as mock_bulk_create:
+            self.character_1001.update_mail_bodies(mail_pks=[obj.pk for obj in mails])
+        # then
+        self.assertEqual(mock_bulk_create.call_count, 1)
+        self.assertEqual(
+            self.character_1001.mails.get(mail_id=1).body, "blah blah blah"
+        )
+        self.assertTrue(
+            self.character_1001.mails.get(mail_id=3).body.startswith("Lorem ipsum")
+        )
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_TASKS_ESI_THREADS", 1)
+    @patch(MANAGERS_PATH + ".general.eve_xml_to_html", Mock(return_value=""))
+    def test_should_stop_fetching_bodies_when_error_limit_reached(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        mails = self._create_mails_without_body([1, 3])
+        # when
+        with patch(
+            MODELS_PATH + ".character.Character._raise_if_esi_error_limit_reached"
+        ) as mock_raise:
+            mock_raise.side_effect = EsiErrorLimitExceeded(retry_in=30)
+            with self.assertRaises(EsiErrorLimitExceeded):
+                self.character_1001.update_mail_bodies(
+                    mail_pks=[obj.pk for obj in mails]
+                )
+        # then
+        self.assertEqual(
+            self.character_1001.mails.get(mail_id=1).body, "blah blah blah"
+        )
+        self.assertEqual(self.character_1001.mails.get(mail_id=3).body, "")
+
+    def test_should_raise_when_esi_error_limit_threshold_reached(self, mock_esi):
+        # given
+        responses = [
+            Mock(headers={}),
+            Mock(
+                headers={
+                    "X-Esi-Error-Limit-Remain": "20",
+                    "X-Esi-Error-Limit-Reset": 40,
+                }
+            ),
+        ]
+        # when/then
+        with self.assertRaises(EsiErrorLimitExceeded) as cm:
+            Character._raise_if_esi_error_limit_reached(responses)
+        self.assertGreater(cm.exception.retry_in, 39)
+
+    def test_should_not_raise_when_esi_error_limit_not_reached(self, mock_esi):
+        # given
+        responses = [
+            Mock(
+                headers={
+                    "X-Esi-Error-Limit-Remain": "99",
+                    "X-Esi-Error-Limit-Reset": 40,
+                }
+            ),
+        ]
+        # when/then
+        Character._raise_if_esi_error_limit_reached(responses)
+
 
 @patch(MODELS_PATH + ".character.esi")
 class TestCharacterUpdateLoyalty(TestCharacterUpdateBase):
@@ -2261,6 +3056,31 @@ class TestCharacterUpdateSkills(TestCharacterUpdateBase):
         skill = self.character_1001.skills.get(eve_type_id=24311)
         self.assertEqual(skill.active_skill_level, 3)
 
+    def test_should_record_skills_with_changed_active_level(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        cache.delete(self.character_1001._changed_skill_types_cache_key())
+        CharacterSkill.objects.create(
+            character=self.character_1001,
+            eve_type=EveType.objects.get(id=24311),
+            active_skill_level=3,
+            skillpoints_in_skill=1,
+            trained_skill_level=3,
+        )
+        CharacterSkill.objects.create(
+            character=self.character_1001,
+            eve_type=EveType.objects.get(id=24312),
+            active_skill_level=0,
+            skillpoints_in_skill=1,
+            trained_skill_level=1,
+        )
+        # when
+        self.character_1001.update_skills()
+        # then
+        self.assertSetEqual(
+            cache.get(self.character_1001._changed_skill_types_cache_key()), {24312}
+        )
+
 
 class TestCharacterUpdateSkillSets(NoSocketsTestCase):
     @classmethod
@@ -2273,6 +3093,9 @@ class TestCharacterUpdateSkillSets(NoSocketsTestCase):
         cls.skill_type_1 = EveType.objects.get(id=24311)
         cls.skill_type_2 = EveType.objects.get(id=24312)
 
+    def setUp(self) -> None:
+        cache.delete(self.character._changed_skill_types_cache_key())
+
     def test_has_all_skills(self):
         CharacterSkill.objects.create(
             character=self.character,
@@ -2436,6 +3259,152 @@ class TestCharacterUpdateSkillSets(NoSocketsTestCase):
             {skill_1.pk, skill_2.pk},
         )
 
+    def test_should_check_many_characters_at_once(self):
+        # given
+        character_1002 = create_memberaudit_character(1002)
+        CharacterSkill.objects.create(
+            character=self.character,
+            eve_type=self.skill_type_1,
+            active_skill_level=5,
+            skillpoints_in_skill=10,
+            trained_skill_level=5,
+        )
+        skill_set_1 = SkillSet.objects.create(name="Ship 1")
+        skill_1 = SkillSetSkill.objects.create(
+            skill_set=skill_set_1, eve_type=self.skill_type_1, required_level=5
+        )
+        skill_set_2 = SkillSet.objects.create(name="Ship 2")
+        # when
+        CharacterSkillSetCheck.objects.update_for_characters(
+            [self.character.pk, character_1002.pk]
+        )
+        # then
+        self.assertEqual(self.character.skill_set_checks.count(), 2)
+        self.assertEqual(character_1002.skill_set_checks.count(), 2)
+        check = self.character.skill_set_checks.get(skill_set=skill_set_1)
+        self.assertEqual(check.failed_required_skills.count(), 0)
+        check = character_1002.skill_set_checks.get(skill_set=skill_set_1)
+        self.assertEqual(
+            {obj.pk for obj in check.failed_required_skills.all()}, {skill_1.pk}
+        )
+        check = character_1002.skill_set_checks.get(skill_set=skill_set_2)
+        self.assertEqual(check.failed_required_skills.count(), 0)
+
+    def test_should_only_write_changed_checks(self):
+        # given
+        skill = CharacterSkill.objects.create(
+            character=self.character,
+            eve_type=self.skill_type_1,
+            active_skill_level=2,
+            skillpoints_in_skill=10,
+            trained_skill_level=2,
+        )
+        skill_set = SkillSet.objects.create(name="Ship 1")
+        skill_1 = SkillSetSkill.objects.create(
+            skill_set=skill_set, eve_type=self.skill_type_1, required_level=3
+        )
+        skill_2 = SkillSetSkill.objects.create(
+            skill_set=skill_set, eve_type=self.skill_type_2, required_level=3
+        )
+        self.character.update_skill_sets()
+        check = self.character.skill_set_checks.get(skill_set=skill_set)
+        through_model = CharacterSkillSetCheck.failed_required_skills.through
+        row_2 = through_model.objects.get(
+            characterskillsetcheck=check, skillsetskill=skill_2
+        )
+        skill.active_skill_level = 3
+        skill.save()
+        # when
+        self.character.update_skill_sets()
+        # then
+        self.assertEqual(
+            self.character.skill_set_checks.get(skill_set=skill_set).pk, check.pk
+        )
+        self.assertEqual(
+            {obj.pk for obj in check.failed_required_skills.all()}, {skill_2.pk}
+        )
+        self.assertTrue(through_model.objects.filter(pk=row_2.pk).exists())
+        self.assertFalse(
+            through_model.objects.filter(
+                characterskillsetcheck=check, skillsetskill=skill_1
+            ).exists()
+        )
+
+    def test_should_only_check_skill_sets_affected_by_changed_skills(self):
+        # given
+        skill_1 = CharacterSkill.objects.create(
+            character=self.character,
+            eve_type=self.skill_type_1,
+            active_skill_level=1,
+            skillpoints_in_skill=10,
+            trained_skill_level=1,
+        )
+        skill_2 = CharacterSkill.objects.create(
+            character=self.character,
+            eve_type=self.skill_type_2,
+            active_skill_level=1,
+            skillpoints_in_skill=10,
+            trained_skill_level=1,
+        )
+        skill_set_1 = SkillSet.objects.create(name="Ship 1")
+        SkillSetSkill.objects.create(
+            skill_set=skill_set_1, eve_type=self.skill_type_1, required_level=3
+        )
+        skill_set_2 = SkillSet.objects.create(name="Ship 2")
+        SkillSetSkill.objects.create(
+            skill_set=skill_set_2, eve_type=self.skill_type_2, required_level=3
+        )
+        self.character.update_skill_sets()
+        skill_1.active_skill_level = 3
+        skill_1.save()
+        skill_2.active_skill_level = 3
+        skill_2.save()
+        self.character._record_changed_skill_types({self.skill_type_1.id})
+        # when
+        self.character.update_skill_sets()
+        # then
+        check_1 = self.character.skill_set_checks.get(skill_set=skill_set_1)
+        self.assertEqual(check_1.failed_required_skills.count(), 0)
+        check_2 = self.character.skill_set_checks.get(skill_set=skill_set_2)
+        self.assertEqual(check_2.failed_required_skills.count(), 1)
+        self.assertIsNone(cache.get(self.character._changed_skill_types_cache_key()))
+
+    def test_should_check_new_skill_sets_when_skills_not_changed(self):
+        # given
+        self.character._record_changed_skill_types(set())
+        skill_set = SkillSet.objects.create(name="Ship 1")
+        SkillSetSkill.objects.create(
+            skill_set=skill_set, eve_type=self.skill_type_1, required_level=3
+        )
+        # when
+        self.character.update_skill_sets()
+        # then
+        check = self.character.skill_set_checks.get(skill_set=skill_set)
+        self.assertEqual(check.failed_required_skills.count(), 1)
+
+    def test_should_check_all_skill_sets_when_forced(self):
+        # given
+        skill = CharacterSkill.objects.create(
+            character=self.character,
+            eve_type=self.skill_type_1,
+            active_skill_level=1,
+            skillpoints_in_skill=10,
+            trained_skill_level=1,
+        )
+        skill_set = SkillSet.objects.create(name="Ship 1")
+        SkillSetSkill.objects.create(
+            skill_set=skill_set, eve_type=self.skill_type_1, required_level=3
+        )
+        self.character.update_skill_sets()
+        skill.active_skill_level = 3
+        skill.save()
+        self.character._record_changed_skill_types(set())
+        # when
+        self.character.update_skill_sets(force_update=True)
+        # then
+        check = self.character.skill_set_checks.get(skill_set=skill_set)
+        self.assertEqual(check.failed_required_skills.count(), 0)
+
     def test_does_not_require_doctrine_definition(self):
         skill_set = SkillSet.objects.create(name="Ship 1")
         skill_1 = SkillSetSkill.objects.create(
@@ -2641,6 +3610,48 @@ class TestCharacterUpdateWalletJournal(TestCharacterUpdateBase):
         self.assertEqual(obj.first_party.id, 1001)
         self.assertEqual(obj.second_party.id, 1002)
 
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    def test_should_add_entries_known_for_other_characters(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        CharacterWalletJournalEntry.objects.create(
+            character=self.character_1002,
+            entry_id=89,
+            amount=1_000_000,
+            balance=10_000_000,
+            context_id_type=CharacterWalletJournalEntry.CONTEXT_ID_TYPE_UNDEFINED,
+            date=now(),
+            description="dummy",
+        )
+        # when
+        self.character_1001.update_wallet_journal()
+        # then
+        self.assertSetEqual(
+            set(self.character_1001.wallet_journal.values_list("entry_id", flat=True)),
+            {89, 91},
+        )
+
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
+    def test_should_add_missing_entries_below_watermark(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        CharacterWalletJournalEntry.objects.create(
+            character=self.character_1001,
+            entry_id=90,
+            amount=1_000_000,
+            balance=10_000_000,
+            context_id_type=CharacterWalletJournalEntry.CONTEXT_ID_TYPE_UNDEFINED,
+            date=now(),
+            description="dummy",
+        )
+        # when
+        self.character_1001.update_wallet_journal()
+        # then
+        self.assertSetEqual(
+            set(self.character_1001.wallet_journal.values_list("entry_id", flat=True)),
+            {89, 90, 91},
+        )
+
     @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", 10)
     def test_update_wallet_journal_4(self, mock_esi):
         """When new wallet entry is older than retention limit, then do not store it"""
@@ -2680,6 +3691,38 @@ class TestCharacterUpdateWalletJournal(TestCharacterUpdateBase):
             {89, 91},
         )
 
+    @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", 20)
+    def test_should_delete_old_entries_when_journal_not_modified(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        self.character_1001.reset_update_section(Character.UpdateSection.WALLET_JOURNAL)
+        with patch(MODELS_PATH + ".character.now") as mock_now:
+            mock_now.return_value = make_aware(dt.datetime(2018, 3, 11, 20, 5), UTC)
+            self.character_1001.update_wallet_journal()
+            CharacterWalletJournalEntry.objects.create(
+                character=self.character_1001,
+                entry_id=55,
+                amount=1_000_000,
+                balance=10_000_000,
+                context_id_type=CharacterWalletJournalEntry.CONTEXT_ID_TYPE_UNDEFINED,
+                date=make_aware(dt.datetime(2018, 2, 11, 20, 5), UTC),
+                description="dummy",
+                first_party=EveEntity.objects.get(id=1001),
+                second_party=EveEntity.objects.get(id=1002),
+            )
+            # when
+            self.character_1001.update_wallet_journal()
+        # then
+        self.assertSetEqual(
+            set(self.character_1001.wallet_journal.values_list("entry_id", flat=True)),
+            {89, 91},
+        )
+        status = self.character_1001.update_status_set.get(
+            section=Character.UpdateSection.WALLET_JOURNAL
+        )
+        self.assertEqual(status.not_modified_count, 1)
+        self.assertEqual(status.content_hash_1, "")
+
 
 @patch(MODELS_PATH + ".character.esi")
 class TestCharacterUpdateWalletTransaction(TestCharacterUpdateBase):
@@ -2740,6 +3783,34 @@ class TestCharacterUpdateWalletTransaction(TestCharacterUpdateBase):
         obj = self.character_1001.wallet_transactions.get(transaction_id=42)
         self.assertEqual(obj.journal_ref, journal_entry)
 
+    def test_should_add_transactions_known_for_other_characters(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        CharacterWalletTransaction.objects.create(
+            character=self.character_1002,
+            transaction_id=42,
+            client=EveEntity.objects.get(id=1003),
+            date=now(),
+            location=Location.objects.get(id=60003760),
+            eve_type=EveType.objects.get(id=603),
+            is_buy=True,
+            is_personal=True,
+            quantity=1,
+            unit_price=1,
+        )
+        # when
+        with patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None):
+            self.character_1001.update_wallet_transactions()
+        # then
+        self.assertSetEqual(
+            set(
+                self.character_1001.wallet_transactions.values_list(
+                    "transaction_id", flat=True
+                )
+            ),
+            {42},
+        )
+
 
 class TestDataRetentionCutoff(TestCase):
     @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", 10)
@@ -4,26 +4,56 @@ from unittest.mock import patch
 from bravado.exception import HTTPInternalServerError
 from celery.exceptions import Retry as CeleryRetry
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.utils.timezone import now
 from esi.models import Token
-from eveuniverse.models import EveSolarSystem, EveType
+from eveuniverse.models import EveEntity, EveSolarSystem, EveType
 
 from app_utils.esi import EsiErrorLimitExceeded, EsiOffline, EsiStatus
 from app_utils.testing import generate_invalid_pk
 
-from ..models import Character, CharacterAsset, CharacterUpdateStatus, Location
+from ..core import esi_governor
+from ..core.staging import (
+    StagedDataNotFound,
+    delete_staged_list,
+    fetch_staged_list,
+    stage_list,
+)
+from ..core.task_lanes import LANE_BULK, LANE_DEFAULT, LANE_FAST, LANE_PRIORITIES
+from ..core.update_context import (
+    AVOIDED_QUERIES_KEY,
+    avoided_queries_count,
+    flush_avoided_queries,
+)
+from ..models import (
+    Character,
+    CharacterAsset,
+    CharacterContract,
+    CharacterMail,
+    CharacterUpdateStatus,
+    Location,
+    MailContent,
+    MailEntity,
+)
 from ..tasks import (
+    DEFERRED_CHARACTER_PKS_KEY,
     delete_character,
+    delete_orphaned_mail_contents,
     run_regular_updates,
     update_all_characters,
     update_character,
     update_character_assets,
     update_character_contacts,
     update_character_contracts,
+    update_character_contracts_bids,
+    update_character_contracts_items,
+    update_character_mail_bodies,
     update_character_mails,
     update_character_wallet_journal,
+    update_characters_affiliations,
     update_characters_skill_checks,
+    update_mail_bodies_esi,
     update_mail_entity_esi,
     update_market_prices,
     update_structure_esi,
@@ -35,60 +65,93 @@ from .testdata.load_entities import load_entities
 from .testdata.load_eveuniverse import load_eveuniverse
 from .testdata.load_locations import load_locations
 
+ESI_GOVERNOR_PATH = "memberaudit.core.esi_governor"
 MODELS_PATH = "memberaudit.models"
 MANAGERS_PATH = "memberaudit.managers"
 TASKS_PATH = "memberaudit.tasks"
 
 
-@patch(TASKS_PATH + ".update_all_characters")
+def published_signatures(mock_publish) -> list:
+    """returns all task signatures published with a mocked _publish_in_batches"""
+    return [
+        signature for args, _ in mock_publish.call_args_list for signature in args[0]
+    ]
+
+
+@patch(TASKS_PATH + ".delete_orphaned_mail_contents")
+@patch(TASKS_PATH + ".chain")
 @patch(TASKS_PATH + ".update_market_prices")
 class TestRegularUpdates(TestCase):
-    @patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+    def setUp(self) -> None:
+        esi_governor.clear()
+
+    def tearDown(self) -> None:
+        esi_governor.clear()
+
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
     def test_should_run_update_normally(
         self,
         mock_update_market_prices,
-        mock_update_all_characters,
+        mock_chain,
+        mock_delete_orphaned_mail_contents,
     ):
         run_regular_updates()
 
         self.assertTrue(mock_update_market_prices.apply_async.called)
-        self.assertTrue(mock_update_all_characters.apply_async.called)
+        self.assertTrue(mock_delete_orphaned_mail_contents.apply_async.called)
+        self.assertTrue(mock_chain.return_value.apply_async.called)
+        tasks = [signature.task for signature in mock_chain.call_args[0]]
+        self.assertListEqual(
+            tasks,
+            [
+                "memberaudit.tasks.update_characters_affiliations",
+                "memberaudit.tasks.update_all_characters",
+            ],
+        )
 
-    @patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(False, 99, 60))
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(False, 99, 60))
     def test_should_retry_if_esi_is_down(
         self,
         mock_update_market_prices,
-        mock_update_all_characters,
+        mock_chain,
+        mock_delete_orphaned_mail_contents,
     ):
         with self.assertRaises(CeleryRetry):
             run_regular_updates()
 
         self.assertFalse(mock_update_market_prices.apply_async.called)
-        self.assertFalse(mock_update_all_characters.apply_async.called)
+        self.assertFalse(mock_chain.called)
 
-    @patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 1, 60))
+    @patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 1, 60))
     def test_should_retry_if_esi_error_threshold_exceeded(
         self,
         mock_update_market_prices,
-        mock_update_all_characters,
+        mock_chain,
+        mock_delete_orphaned_mail_contents,
     ):
         with self.assertRaises(CeleryRetry):
             run_regular_updates()
 
         self.assertFalse(mock_update_market_prices.apply_async.called)
-        self.assertFalse(mock_update_all_characters.apply_async.called)
+        self.assertFalse(mock_chain.called)
 
 
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 class TestOtherTasks(TestCase):
     @patch(TASKS_PATH + ".EveMarketPrice.objects.update_from_esi")
     def test_update_market_prices(self, mock_update_from_esi):
         update_market_prices()
         self.assertTrue(mock_update_from_esi.called)
 
+    @patch(TASKS_PATH + ".MailContent.objects.delete_orphans")
+    def test_delete_orphaned_mail_contents(self, mock_delete_orphans):
+        mock_delete_orphans.return_value = 0
+        delete_orphaned_mail_contents()
+        self.assertTrue(mock_delete_orphans.called)
+
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(MODELS_PATH + ".character.esi")
 class TestUpdateCharacterAssets(TestCase):
     @classmethod
@@ -266,6 +329,22 @@ class TestUpdateCharacterAssets(TestCase):
             },
         )
 
+    def test_should_update_renamed_assets_when_assets_not_modified(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        self.character_1001.reset_update_section(Character.UpdateSection.ASSETS)
+        update_character_assets(self.character_1001.pk)
+        self.character_1001.assets.filter(item_id=1100000000001).update(name="Old Name")
+        # when
+        update_character_assets(self.character_1001.pk)
+        # then
+        status = self.character_1001.update_status_set.get(
+            section=Character.UpdateSection.ASSETS
+        )
+        self.assertEqual(status.not_modified_count, 1)
+        asset = self.character_1001.assets.get(item_id=1100000000001)
+        self.assertEqual(asset.name, "Parent Item 1")
+
     def test_update_assets_5(self, mock_esi):
         """when update succeeded then report update success"""
         mock_esi.client = esi_client_stub
@@ -314,6 +393,33 @@ class TestUpdateCharacterAssets(TestCase):
             status.last_error_message, "HTTPInternalServerError: 500 Test exception"
         )
 
+    def test_should_delete_staged_asset_list_when_update_failed(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        with patch(MODELS_PATH + ".character.Location") as m, patch(
+            TASKS_PATH + ".stage_list", wraps=stage_list
+        ) as mock_stage_list:
+            m.objects.get_or_create_esi_async.side_effect = HTTPInternalServerError(
+                response=BravadoResponseStub(500, "Test exception")
+            )
+            with self.assertRaises(OSError):
+                update_character_assets(self.character_1001.pk)
+        # then
+        staging_key = mock_stage_list.call_args[0][0]
+        with self.assertRaises(StagedDataNotFound):
+            fetch_staged_list(staging_key)
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_STAGING_TIMEOUT", 86400)
+    def test_should_stage_asset_list_with_staging_timeout(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        with patch(TASKS_PATH + ".stage_list", wraps=stage_list) as mock_stage_list:
+            update_character_assets(self.character_1001.pk)
+        # then
+        self.assertEqual(mock_stage_list.call_args[1]["timeout"], 86400)
+
     def test_update_assets_8(self, mock_esi):
         """when building the asset tree failed then report the error"""
         mock_esi.client = esi_client_stub
@@ -340,18 +446,125 @@ class TestUpdateCharacterAssets(TestCase):
         self.character_1001.reset_update_section(Character.UpdateSection.ASSETS)
         update_character_assets(self.character_1001.pk)
         asset = self.character_1001.assets.get(item_id=1100000000001)
-        asset.name = "New Name"
+        asset.quantity = 5
         asset.save()
         update_character_assets(self.character_1001.pk)
 
         asset = self.character_1001.assets.get(item_id=1100000000001)
-        self.assertEqual(asset.name, "New Name")
+        self.assertEqual(asset.quantity, 5)
 
         status = self.character_1001.update_status_set.get(
             section=Character.UpdateSection.ASSETS
         )
         self.assertTrue(status.is_success)
 
+    def test_update_assets_11(self, mock_esi):
+        """when asset tree is created, then pass only the staging key between tasks
+        and remove the staged asset list when done"""
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        with patch(
+            TASKS_PATH + ".delete_staged_list", wraps=delete_staged_list
+        ) as mock_delete_staged_list, patch(
+            TASKS_PATH + ".stage_list", wraps=stage_list
+        ) as mock_stage_list:
+            update_character_assets(self.character_1001.pk)
+        # then
+        self.assertEqual(self.character_1001.assets.count(), 8)
+        staging_key = mock_stage_list.call_args[0][0]
+        mock_delete_staged_list.assert_called_once_with(staging_key)
+        with self.assertRaises(StagedDataNotFound):
+            fetch_staged_list(staging_key)
+
+    def test_update_assets_13(self, mock_esi):
+        """when parent of an asset does not exist, then report it and create the rest"""
+        # given
+        mock_esi.client = esi_client_stub
+        asset_list = [
+            {
+                "item_id": 1,
+                "location_id": self.jita_44.id,
+                "type_id": 20185,
+                "is_singleton": True,
+                "location_flag": "Hangar",
+                "quantity": 1,
+                "name": "",
+            },
+            {
+                "item_id": 2,
+                "location_id": 1,
+                "type_id": 603,
+                "is_singleton": True,
+                "location_flag": "Cargo",
+                "quantity": 1,
+                "name": "",
+            },
+            {
+                "item_id": 3,
+                "type_id": 603,
+                "is_singleton": True,
+                "location_flag": "Cargo",
+                "quantity": 1,
+                "name": "",
+            },
+        ]
+        # when
+        with patch(
+            MODELS_PATH + ".character.Character.assets_build_list_from_esi"
+        ) as mock_build_list, patch(TASKS_PATH + ".logger") as mock_logger:
+            mock_build_list.return_value = asset_list
+            update_character_assets(self.character_1001.pk)
+        # then
+        self.assertSetEqual(
+            set(self.character_1001.assets.values_list("item_id", flat=True)), {1, 2}
+        )
+        self.assertEqual(self.character_1001.assets.get(item_id=2).parent.item_id, 1)
+        self.assertTrue(mock_logger.warning.called)
+        self.assertEqual(mock_logger.warning.call_args[0][3], [3])
+
+    def test_update_assets_14(self, mock_esi):
+        """when assets are updated, then keep existing assets and only update changes"""
+        # given
+        mock_esi.client = esi_client_stub
+        update_character_assets(self.character_1001.pk)
+        old_pks = dict(self.character_1001.assets.values_list("item_id", "pk"))
+        asset = self.character_1001.assets.get(item_id=1100000000001)
+        asset.name = "New Name"
+        asset.save()
+        # when
+        with patch(
+            TASKS_PATH + ".CharacterAsset.objects.bulk_update",
+            wraps=CharacterAsset.objects.bulk_update,
+        ) as mock_bulk_update:
+            update_character_assets(self.character_1001.pk, force_update=True)
+        # then
+        new_pks = dict(self.character_1001.assets.values_list("item_id", "pk"))
+        self.assertDictEqual(old_pks, new_pks)
+        asset = self.character_1001.assets.get(item_id=1100000000001)
+        self.assertEqual(asset.name, "Parent Item 1")
+        changed_item_ids = {
+            obj.item_id
+            for call in mock_bulk_update.call_args_list
+            for obj in call[0][0]
+        }
+        self.assertSetEqual(changed_item_ids, {1100000000001})
+
+    def test_update_assets_12(self, mock_esi):
+        """when staged asset list has timed out, then report the error"""
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        with patch(TASKS_PATH + ".stage_list"):
+            with self.assertRaises(StagedDataNotFound):
+                update_character_assets(self.character_1001.pk)
+        # then
+        status = self.character_1001.update_status_set.get(
+            section=Character.UpdateSection.ASSETS
+        )
+        self.assertFalse(status.is_success)
+        self.assertIn("StagedDataNotFound", status.last_error_message)
+
     def test_update_assets_10(self, mock_esi):
         """when info from ESI has not change and update is forced, then re-create asset tree"""
         mock_esi.client = esi_client_stub
@@ -373,7 +586,7 @@ class TestUpdateCharacterAssets(TestCase):
 
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(MODELS_PATH + ".character.esi")
 class TestUpdateCharacterMails(TestCase):
     @classmethod
@@ -417,7 +630,7 @@ class TestUpdateCharacterMails(TestCase):
 
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(MODELS_PATH + ".character.esi")
 class TestUpdateCharacterContacts(TestCase):
     @classmethod
@@ -461,7 +674,7 @@ class TestUpdateCharacterContacts(TestCase):
 
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(MODELS_PATH + ".character.esi")
 class TestUpdateCharacterContracts(TestCase):
     @classmethod
@@ -506,7 +719,7 @@ class TestUpdateCharacterContracts(TestCase):
 
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(MODELS_PATH + ".character.esi")
 class TestUpdateCharacterWalletJournal(TestCase):
     @classmethod
@@ -550,7 +763,7 @@ class TestUpdateCharacterWalletJournal(TestCase):
 
 
 @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(MODELS_PATH + ".character.esi")
 @override_settings(CELERY_ALWAYS_EAGER=True)
 class TestUpdateCharacter(TestCase):
@@ -657,6 +870,48 @@ class TestUpdateCharacter(TestCase):
         result = update_character(self.character_1001.pk)
         self.assertFalse(result)
 
+    @patch(TASKS_PATH + ".Character.is_update_section_stale")
+    @patch(TASKS_PATH + ".Character.update_loyalty")
+    def test_should_update_given_sections_only(
+        self, update_loyalty, mock_is_update_section_stale, mock_esi
+    ):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        result = update_character(
+            self.character_1001.pk, sections=[Character.UpdateSection.LOYALTY]
+        )
+        # then
+        self.assertTrue(result)
+        self.assertTrue(update_loyalty.called)
+        self.assertFalse(mock_is_update_section_stale.called)
+        self.assertEqual(self.character_1001.update_status_set.count(), 1)
+
+    @patch(TASKS_PATH + ".Character.update_implants")
+    def test_should_update_backed_off_sections_when_forced(
+        self, mock_update_implants, mock_esi
+    ):
+        # given
+        mock_esi.client = esi_client_stub
+        CharacterUpdateStatus.objects.create(
+            character=self.character_1001,
+            section=Character.UpdateSection.IMPLANTS,
+            is_success=True,
+            content_hash_1="abc",
+            started_at=now() - dt.timedelta(hours=5),
+            finished_at=now() - dt.timedelta(hours=5),
+            unchanged_count=3,
+        )
+        self.assertFalse(
+            self.character_1001.is_update_section_stale(
+                Character.UpdateSection.IMPLANTS
+            )
+        )
+        # when
+        update_character(self.character_1001.pk, force_update=True)
+        # then
+        self.assertTrue(mock_update_implants.called)
+
     def test_update_forced(self, mock_esi):
         """Can do forced update"""
         mock_esi.client = esi_client_stub
@@ -665,8 +920,83 @@ class TestUpdateCharacter(TestCase):
         self.assertTrue(result)
         self.assertTrue(self.character_1001.is_update_status_ok())
 
+    @patch(TASKS_PATH + ".update_character_section")
+    @patch(TASKS_PATH + ".update_character_mails")
+    def test_should_pass_update_context_to_section_tasks(
+        self, mock_update_character_mails, mock_update_character_section, mock_esi
+    ):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        update_character(self.character_1001.pk, force_update=True)
+        # then
+        _, kwargs = mock_update_character_mails.apply_async.call_args
+        update_context = kwargs["kwargs"]["update_context"]
+        self.assertEqual(update_context["character_pk"], self.character_1001.pk)
+        self.assertEqual(update_context["eve_character_id"], 1001)
+        self.assertIsNotNone(update_context["token_pk"])
+        _, kwargs = mock_update_character_section.apply_async.call_args
+        self.assertDictEqual(kwargs["kwargs"]["update_context"], update_context)
+
+    def test_should_flush_avoided_queries_after_tasks(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        flush_avoided_queries()
+        cache.delete(AVOIDED_QUERIES_KEY)
+        # when
+        with patch(
+            TASKS_PATH + ".flush_avoided_queries", wraps=flush_avoided_queries
+        ) as spy_flush:
+            update_character(self.character_1001.pk, force_update=True)
+        # then
+        self.assertTrue(spy_flush.called)
+        self.assertGreater(avoided_queries_count(), 0)
+
+    @patch(TASKS_PATH + ".update_character_assets")
+    @patch(TASKS_PATH + ".update_character_section")
+    def test_should_start_sections_in_their_lanes(
+        self, mock_update_character_section, mock_update_character_assets, mock_esi
+    ):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        update_character(
+            self.character_1001.pk,
+            sections=[
+                Character.UpdateSection.LOCATION,
+                Character.UpdateSection.IMPLANTS,
+                Character.UpdateSection.ASSETS,
+            ],
+        )
+        # then
+        priorities = {
+            kwargs["kwargs"]["section"]: kwargs["priority"]
+            for _, kwargs in mock_update_character_section.apply_async.call_args_list
+        }
+        self.assertDictEqual(
+            priorities,
+            {
+                Character.UpdateSection.LOCATION: LANE_PRIORITIES[LANE_FAST],
+                Character.UpdateSection.IMPLANTS: LANE_PRIORITIES[LANE_DEFAULT],
+            },
+        )
+        _, kwargs = mock_update_character_assets.apply_async.call_args
+        self.assertEqual(kwargs["priority"], LANE_PRIORITIES[LANE_BULK])
+
+    def test_should_look_up_token_only_once(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        with patch.object(
+            Token.objects, "prefetch_related", wraps=Token.objects.prefetch_related
+        ) as mock_prefetch_related:
+            update_character(self.character_1001.pk, force_update=True)
+        # then
+        self.assertTrue(self.character_1001.is_update_status_ok())
+        self.assertEqual(mock_prefetch_related.call_count, 1)
+
 
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(TASKS_PATH + ".MEMBERAUDIT_LOG_UPDATE_STATS", False)
 @patch(MODELS_PATH + ".character.MEMBERAUDIT_DATA_RETENTION_LIMIT", None)
 @patch(MODELS_PATH + ".character.esi")
@@ -681,6 +1011,7 @@ class TestUpdateAllCharacters(TestCase):
 
     def setUp(self) -> None:
         self.character_1001 = create_memberaudit_character(1001)
+        cache.delete(DEFERRED_CHARACTER_PKS_KEY)
 
     def test_normal(self, mock_esi):
         mock_esi.client = esi_client_stub
@@ -688,8 +1019,248 @@ class TestUpdateAllCharacters(TestCase):
         update_all_characters()
         self.assertTrue(self.character_1001.is_update_status_ok())
 
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_dispatch_stale_sections_only(self, mock_publish, mock_esi):
+        # given
+        character_1002 = create_memberaudit_character(1002)
+        for section in Character.UpdateSection.values:
+            for character in [self.character_1001, character_1002]:
+                CharacterUpdateStatus.objects.create(
+                    character=character,
+                    section=section,
+                    is_success=True,
+                    started_at=now() - dt.timedelta(seconds=30),
+                    finished_at=now(),
+                )
+        character_1002.update_status_set.filter(
+            section=Character.UpdateSection.LOYALTY
+        ).update(is_success=False)
+        # when
+        update_all_characters()
+        # then
+        signatures = published_signatures(mock_publish)
+        self.assertEqual(len(signatures), 1)
+        self.assertEqual(signatures[0].kwargs["character_pk"], character_1002.pk)
+        self.assertEqual(
+            signatures[0].kwargs["sections"], [Character.UpdateSection.LOYALTY]
+        )
+
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_not_dispatch_affiliation_sections_started_already(
+        self, mock_publish, mock_esi
+    ):
+        # given
+        for section in Character.UpdateSection.values:
+            CharacterUpdateStatus.objects.create(
+                character=self.character_1001,
+                section=section,
+                is_success=True,
+                started_at=now() - dt.timedelta(seconds=30),
+                finished_at=now(),
+            )
+        self.character_1001.update_status_set.filter(
+            section__in=Character.AFFILIATION_SECTIONS
+            | {Character.UpdateSection.LOYALTY}
+        ).update(is_success=False)
+        # when
+        update_all_characters([self.character_1001.pk])
+        # then
+        signatures = published_signatures(mock_publish)
+        self.assertEqual(len(signatures), 1)
+        self.assertEqual(
+            signatures[0].kwargs["sections"], [Character.UpdateSection.LOYALTY]
+        )
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_SPREAD_RATE", 2)
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_SPREAD_UPDATES", True)
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_spread_updates_across_ring_window(self, mock_publish, mock_esi):
+        # given
+        create_memberaudit_character(1002)
+        create_memberaudit_character(1003)
+        # when
+        update_all_characters()
+        update_all_characters()
+        # then
+        signatures = published_signatures(mock_publish)
+        self.assertEqual(len(signatures), 6)
+        countdowns = dict()
+        for signature in signatures:
+            character_pk = signature.kwargs["character_pk"]
+            countdown = signature.options["countdown"]
+            self.assertEqual(countdowns.setdefault(character_pk, countdown), countdown)
+        values = sorted(countdowns.values())
+        sections_count = len(Character.UpdateSection.values)
+        self.assertGreaterEqual(values[1] - values[0], sections_count / 2 - 1)
+        self.assertGreaterEqual(values[2] - values[1], sections_count / 2 - 1)
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_UPDATE_STALE_OFFSET", 0)
+    @patch(TASKS_PATH + ".MEMBERAUDIT_UPDATE_STALE_RING_1", 10)
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_SPREAD_RATE", 0.1)
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_SPREAD_UPDATES", True)
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_not_release_more_tasks_than_the_rate_allows(
+        self, mock_publish, mock_esi
+    ):
+        # given
+        character_pks = {self.character_1001.pk}
+        for character_id in [1002, 1003, 1101, 1102, 1103]:
+            character_pks.add(create_memberaudit_character(character_id).pk)
+        # when
+        update_all_characters()
+        # then
+        signatures = sorted(
+            published_signatures(mock_publish),
+            key=lambda signature: signature.options["countdown"],
+        )
+        for signature, next_signature in zip(signatures, signatures[1:]):
+            budget_seconds = len(signature.kwargs["sections"]) / 0.1
+            self.assertGreaterEqual(
+                next_signature.options["countdown"] - signature.options["countdown"],
+                round(budget_seconds) - 1,
+            )
+        self.assertLessEqual(signatures[-1].options["countdown"], 600)
+        published_pks = {signature.kwargs["character_pk"] for signature in signatures}
+        deferred_pks = cache.get(DEFERRED_CHARACTER_PKS_KEY)
+        self.assertTrue(deferred_pks)
+        self.assertSetEqual(published_pks | set(deferred_pks), character_pks)
+        self.assertFalse(published_pks & set(deferred_pks))
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_UPDATE_STALE_OFFSET", 0)
+    @patch(TASKS_PATH + ".MEMBERAUDIT_UPDATE_STALE_RING_1", 10)
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_SPREAD_RATE", 0.1)
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_SPREAD_UPDATES", True)
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_start_deferred_updates_first_in_next_run(
+        self, mock_publish, mock_esi
+    ):
+        # given
+        character_1002 = create_memberaudit_character(1002)
+        cache.set(DEFERRED_CHARACTER_PKS_KEY, [character_1002.pk])
+        # when
+        update_all_characters()
+        # then
+        countdowns = {
+            signature.kwargs["character_pk"]: signature.options["countdown"]
+            for signature in published_signatures(mock_publish)
+        }
+        self.assertEqual(countdowns[character_1002.pk], 0)
+        self.assertGreater(countdowns[self.character_1001.pk], 0)
+
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_dispatch_all_characters_when_forced(self, mock_publish, mock_esi):
+        # given
+        for section in Character.UpdateSection.values:
+            CharacterUpdateStatus.objects.create(
+                character=self.character_1001,
+                section=section,
+                is_success=True,
+                started_at=now() - dt.timedelta(seconds=30),
+                finished_at=now(),
+            )
+        # when
+        update_all_characters(force_update=True)
+        # then
+        signatures = published_signatures(mock_publish)
+        self.assertEqual(len(signatures), 1)
+        self.assertTrue(signatures[0].kwargs["force_update"])
 
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_mark_all_updates_with_same_run_id(self, mock_publish, mock_esi):
+        # given
+        create_memberaudit_character(1002)
+        # when
+        update_all_characters(force_update=True)
+        # then
+        run_ids = {
+            signature.kwargs["run_id"]
+            for signature in published_signatures(mock_publish)
+        }
+        self.assertEqual(len(run_ids), 1)
+        self.assertTrue(run_ids.pop())
+
+    def test_should_record_run_id_as_root_task_id(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        update_all_characters(force_update=True)
+        # then
+        root_task_ids = set(
+            self.character_1001.update_status_set.values_list("root_task_id", flat=True)
+        )
+        self.assertEqual(len(root_task_ids), 1)
+        self.assertTrue(root_task_ids.pop())
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_PUBLISH_BATCH_SIZE", 2)
+    @patch(TASKS_PATH + ".group")
+    def test_should_publish_in_batches(self, mock_group, mock_esi):
+        # given
+        create_memberaudit_character(1002)
+        create_memberaudit_character(1003)
+        # when
+        update_all_characters(force_update=True)
+        # then
+        self.assertEqual(mock_group.call_count, 2)
+        batch_sizes = [len(args[0]) for args, _ in mock_group.call_args_list]
+        self.assertListEqual(batch_sizes, [2, 1])
+        self.assertEqual(mock_group.return_value.apply_async.call_count, 2)
+
+
+@patch(TASKS_PATH + "._publish_in_batches")
+@patch(MANAGERS_PATH + ".character.CharacterQuerySet.update_affiliations")
+class TestUpdateCharactersAffiliations(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        load_entities()
+        cls.character_1001 = create_memberaudit_character(1001)
+        cls.character_1002 = create_memberaudit_character(1002)
+
+    def test_should_update_affiliation_sections_of_changed_characters(
+        self, mock_update_affiliations, mock_publish
+    ):
+        # given
+        mock_update_affiliations.return_value = {self.character_1002.pk}
+        # when
+        result = update_characters_affiliations()
+        # then
+        self.assertListEqual(result, [self.character_1002.pk])
+        signatures = published_signatures(mock_publish)
+        self.assertSetEqual(
+            {
+                (signature.kwargs["character_pk"], signature.kwargs["section"])
+                for signature in signatures
+            },
+            {
+                (self.character_1002.pk, Character.UpdateSection.CHARACTER_DETAILS),
+                (self.character_1002.pk, Character.UpdateSection.CORPORATION_HISTORY),
+            },
+        )
+        self.assertTrue(signatures[0].kwargs["root_task_id"])
+
+    def test_should_not_publish_anything_when_nothing_changed(
+        self, mock_update_affiliations, mock_publish
+    ):
+        # given
+        mock_update_affiliations.return_value = set()
+        # when
+        update_characters_affiliations()
+        # then
+        self.assertFalse(mock_publish.called)
+
+    def test_should_return_none_when_check_failed(
+        self, mock_update_affiliations, mock_publish
+    ):
+        # given
+        mock_update_affiliations.side_effect = ValueError("Invalid JSON")
+        # when
+        result = update_characters_affiliations()
+        # then
+        self.assertIsNone(result)
+        self.assertFalse(mock_publish.called)
+
+
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(TASKS_PATH + ".Location.objects.structure_update_or_create_esi")
 class TestUpdateStructureEsi(TestCase):
     @classmethod
@@ -729,7 +1300,7 @@ class TestUpdateStructureEsi(TestCase):
             update_structure_esi(id=1000000000001, token_pk=self.token.pk)
 
 
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @patch(TASKS_PATH + ".MailEntity.objects.update_or_create_esi")
 class TestUpdateMailEntityEsi(TestCase):
     def test_normal(self, mock_update_or_create_esi):
@@ -755,7 +1326,7 @@ class TestUpdateMailEntityEsi(TestCase):
             update_mail_entity_esi(1001)
 
 
-@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
 @override_settings(CELERY_ALWAYS_EAGER=True)
 class TestUpdateCharactersDoctrines(TestCase):
     @classmethod
@@ -766,10 +1337,84 @@ class TestUpdateCharactersDoctrines(TestCase):
     def setUp(self) -> None:
         self.character_1001 = create_memberaudit_character(1001)
 
-    @patch(MODELS_PATH + ".character.Character.update_skill_sets")
-    def test_normal(self, mock_update_skill_sets):
+    @patch(
+        MANAGERS_PATH + ".sections.CharacterSkillSetCheckManager.update_for_characters"
+    )
+    def test_normal(self, mock_update_for_characters):
+        # when
         update_characters_skill_checks()
-        self.assertTrue(mock_update_skill_sets.called)
+        # then
+        mock_update_for_characters.assert_called_once_with(
+            [self.character_1001.pk], None
+        )
+        status = self.character_1001.update_status_set.get(
+            section=Character.UpdateSection.SKILL_SETS
+        )
+        self.assertTrue(status.is_success)
+        self.assertTrue(status.root_task_id)
+
+    @patch(
+        MANAGERS_PATH + ".sections.CharacterSkillSetCheckManager.update_for_characters"
+    )
+    def test_should_report_error_for_all_characters(self, mock_update_for_characters):
+        # given
+        mock_update_for_characters.side_effect = RuntimeError("Dummy")
+        # when
+        update_characters_skill_checks()
+        # then
+        status = self.character_1001.update_status_set.get(
+            section=Character.UpdateSection.SKILL_SETS
+        )
+        self.assertFalse(status.is_success)
+        self.assertEqual(status.last_error_message, "RuntimeError: Dummy")
+
+    @patch(
+        MANAGERS_PATH + ".sections.CharacterSkillSetCheckManager.update_for_characters"
+    )
+    def test_should_check_given_skill_sets_only(self, mock_update_for_characters):
+        # when
+        update_characters_skill_checks(force_update=True, skill_set_ids=[42])
+        # then
+        mock_update_for_characters.assert_called_once_with(
+            [self.character_1001.pk], [42]
+        )
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_MAX_CHARACTERS_PER_SKILL_CHECK", 1)
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_check_characters_in_chunks(self, mock_publish):
+        # given
+        character_1002 = create_memberaudit_character(1002)
+        # when
+        update_characters_skill_checks(force_update=True)
+        # then
+        self.assertListEqual(
+            sorted(
+                signature.kwargs["character_pks"]
+                for signature in published_signatures(mock_publish)
+            ),
+            [[self.character_1001.pk], [character_1002.pk]],
+        )
+
+    @patch(TASKS_PATH + "._publish_in_batches")
+    def test_should_publish_skill_checks_for_stale_characters_only(self, mock_publish):
+        # given
+        character_1002 = create_memberaudit_character(1002)
+        CharacterUpdateStatus.objects.create(
+            character=self.character_1001,
+            section=Character.UpdateSection.SKILL_SETS,
+            is_success=True,
+            started_at=now() - dt.timedelta(seconds=30),
+            finished_at=now(),
+        )
+        # when
+        update_characters_skill_checks()
+        # then
+        signatures = published_signatures(mock_publish)
+        self.assertListEqual(
+            [signature.kwargs["character_pks"] for signature in signatures],
+            [[character_1002.pk]],
+        )
+        self.assertTrue(signatures[0].kwargs["root_task_id"])
 
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
@@ -786,3 +1431,127 @@ class TestDeleteCharacter(TestCase):
         delete_character.delay(character_1001.pk)
         # then
         self.assertFalse(Character.objects.filter(pk=character_1001.pk).exists())
+
+
+@patch(ESI_GOVERNOR_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 99, 60))
+class TestUpdateCharacterMailBodies(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        load_entities()
+        cls.character_1001 = create_memberaudit_character(1001)
+        sender, _ = MailEntity.objects.update_or_create_from_eve_entity_id(id=1002)
+        for mail_id in range(1, 6):
+            CharacterMail.objects.create(
+                character=cls.character_1001,
+                mail_id=mail_id,
+                sender=sender,
+                subject=f"Mail {mail_id}",
+                is_read=False,
+                timestamp=now(),
+            )
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_MAX_MAIL_BODIES_PER_TASK", 2)
+    @patch(TASKS_PATH + ".update_mail_bodies_esi")
+    def test_should_fetch_mail_bodies_in_batches(self, mock_update_mail_bodies_esi):
+        # when
+        update_character_mail_bodies(self.character_1001.pk)
+        # then
+        mail_pks = [
+            call[1]["kwargs"]["mail_pks"]
+            for call in mock_update_mail_bodies_esi.apply_async.call_args_list
+        ]
+        self.assertListEqual([len(pks) for pks in mail_pks], [2, 2, 1])
+        self.assertSetEqual(
+            {pk for pks in mail_pks for pk in pks},
+            set(self.character_1001.mails.values_list("pk", flat=True)),
+        )
+
+    @patch(TASKS_PATH + ".update_mail_bodies_esi")
+    def test_should_skip_mails_with_body_fetched_for_other_character(
+        self, mock_update_mail_bodies_esi
+    ):
+        # given
+        content = MailContent.objects.create(id=1, body="blah blah blah")
+        # when
+        update_character_mail_bodies(self.character_1001.pk)
+        # then
+        mail_pks = {
+            pk
+            for call in mock_update_mail_bodies_esi.apply_async.call_args_list
+            for pk in call[1]["kwargs"]["mail_pks"]
+        }
+        mail = self.character_1001.mails.get(mail_id=1)
+        self.assertNotIn(mail.pk, mail_pks)
+        self.assertEqual(mail.content, content)
+        self.assertEqual(len(mail_pks), 4)
+
+    @patch(MODELS_PATH + ".character.Character.update_mail_bodies")
+    def test_should_retry_when_esi_error_limit_reached(self, mock_update_mail_bodies):
+        # given
+        mock_update_mail_bodies.side_effect = EsiErrorLimitExceeded(retry_in=30)
+        mail_pks = list(self.character_1001.mails.values_list("pk", flat=True))
+        # when
+        with self.assertRaises(CeleryRetry):
+            update_mail_bodies_esi(self.character_1001.pk, mail_pks)
+        # then
+        self.assertFalse(
+            self.character_1001.update_status_set.filter(
+                section=Character.UpdateSection.MAILS, is_success=False
+            ).exists()
+        )
+
+
+class TestUpdateCharacterContractsItemsAndBids(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        load_eveuniverse()
+        load_entities()
+        load_locations()
+        cls.character_1001 = create_memberaudit_character(1001)
+        jita_44 = Location.objects.get(id=60003760)
+        for contract_id in range(1, 6):
+            CharacterContract.objects.create(
+                character=cls.character_1001,
+                contract_id=contract_id,
+                availability=CharacterContract.AVAILABILITY_PERSONAL,
+                contract_type=CharacterContract.TYPE_AUCTION,
+                assignee=EveEntity.objects.get(id=1002),
+                date_issued=now(),
+                date_expired=now() + dt.timedelta(days=3),
+                for_corporation=False,
+                issuer=EveEntity.objects.get(id=1001),
+                issuer_corporation=EveEntity.objects.get(id=2001),
+                status=CharacterContract.STATUS_OUTSTANDING,
+                start_location=jita_44,
+                end_location=jita_44,
+            )
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_MAX_CONTRACTS_PER_TASK", 2)
+    @patch(TASKS_PATH + ".update_contracts_items_esi")
+    def test_should_fetch_contract_items_in_batches(self, mock_task):
+        # when
+        update_character_contracts_items(self.character_1001.pk)
+        # then
+        contract_pks = [
+            call[1]["kwargs"]["contract_pks"]
+            for call in mock_task.apply_async.call_args_list
+        ]
+        self.assertListEqual([len(pks) for pks in contract_pks], [2, 2, 1])
+
+    @patch(TASKS_PATH + ".MEMBERAUDIT_TASKS_MAX_CONTRACTS_PER_TASK", 2)
+    @patch(TASKS_PATH + ".update_contracts_bids_esi")
+    def test_should_fetch_contract_bids_in_batches(self, mock_task):
+        # when
+        update_character_contracts_bids(self.character_1001.pk)
+        # then
+        contract_pks = [
+            call[1]["kwargs"]["contract_pks"]
+            for call in mock_task.apply_async.call_args_list
+        ]
+        self.assertListEqual([len(pks) for pks in contract_pks], [2, 2, 1])
+        self.assertSetEqual(
+            {pk for pks in contract_pks for pk in pks},
+            set(self.character_1001.contracts.values_list("pk", flat=True)),
+        )
@@ -36,6 +36,7 @@ from ..models import (
     CharacterWalletJournalEntry,
     CharacterWalletTransaction,
     Location,
+    MailContent,
     MailEntity,
     SkillSet,
     SkillSetGroup,
@@ -1297,7 +1298,9 @@ class TestMailData(TestCase):
             mail_id=7001,
             sender=sender_1002,
             subject="Dummy 1",
-            body="Mail with normal entity and mailing list as recipient",
+            content=MailContent.objects.create(
+                id=7001, body="Mail with normal entity and mailing list as recipient"
+            ),
             timestamp=now(),
         )
         recipient_1001, _ = MailEntity.objects.update_or_create_from_eve_entity_id(
@@ -1314,7 +1317,7 @@ class TestMailData(TestCase):
             mail_id=7002,
             sender=sender_1002,
             subject="Dummy 2",
-            body="Mail with another label",
+            content=MailContent.objects.create(id=7002, body="Mail with another label"),
             timestamp=now(),
         )
         mail_2.labels.add(labels2)
@@ -1323,7 +1326,7 @@ class TestMailData(TestCase):
             mail_id=7003,
             sender=mailing_list_5,
             subject="Dummy 3",
-            body="Mailing List as sender",
+            content=MailContent.objects.create(id=7003, body="Mailing List as sender"),
             timestamp=now(),
         )
 
@@ -1332,7 +1335,9 @@ class TestMailData(TestCase):
             mail_id=7004,
             sender=sender_1002,
             subject="Dummy 4",
-            body="Mailing List as recipient",
+            content=MailContent.objects.create(
+                id=7004, body="Mailing List as recipient"
+            ),
             timestamp=now(),
         )
         mail_4.recipients.add(mailing_list_5)
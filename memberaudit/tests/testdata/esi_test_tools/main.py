@@ -2,11 +2,16 @@
 Tools for building unit tests with django-esi
 """
 
+import hashlib
+import json
 from collections import namedtuple
+from copy import deepcopy
 from typing import Any, List
 
-from bravado.exception import HTTPInternalServerError, HTTPNotFound
+from bravado.exception import HTTPInternalServerError, HTTPNotFound, HTTPNotModified
+from requests.structures import CaseInsensitiveDict
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.dateparse import parse_datetime
 
 
@@ -35,14 +40,27 @@ class BravadoOperationStub:
 
     class ResponseStub:
         def __init__(self, headers):
-            self.headers = headers
+            self.headers = CaseInsensitiveDict(headers)
 
-    def __init__(self, data, headers: dict = None, also_return_response: bool = False):
+    def __init__(
+        self,
+        data,
+        headers: dict = None,
+        also_return_response: bool = False,
+        not_modified: bool = False,
+    ):
         self._data = data
         self._headers = headers if headers else {"x-pages": 1}
+        self._not_modified = not_modified
         self.request_config = BravadoOperationStub.RequestConfig(also_return_response)
 
     def result(self, **kwargs):
+        if self._not_modified:
+            raise HTTPNotModified(
+                response=BravadoResponseStub(
+                    304, "Not Modified", headers=CaseInsensitiveDict(self._headers)
+                )
+            )
         if self.request_config.also_return_response:
             return [self._data, self.ResponseStub(self._headers)]
         else:
@@ -137,7 +155,20 @@ class _EsiRoute:
                 ),
             ) from None
 
-        return BravadoOperationStub(result)
+        content = json.dumps(result, cls=DjangoJSONEncoder, sort_keys=True)
+        etag = '"' + hashlib.md5(content.encode("utf-8")).hexdigest() + '"'
+        headers = {
+            "x-pages": 1,
+            "ETag": etag,
+            "Content-Length": len(content),
+            "Expires": "Tue, 01 Jan 2030 12:00:00 GMT",
+        }
+        request_headers = kwargs.get("_request_options", {}).get("headers", {})
+        return BravadoOperationStub(
+            result,
+            headers=headers,
+            not_modified=request_headers.get("If-None-Match") == etag,
+        )
 
     @staticmethod
     def _convert_values(data) -> Any:
@@ -152,6 +183,8 @@ class _EsiRoute:
                         except ValueError:
                             pass
 
+        # return a copy, so changes by the caller do not alter the test data
+        data = deepcopy(data)
         if isinstance(data, list):
             for row in data:
                 convert_dict(row)
@@ -1040,7 +1040,7 @@ def _character_mail_headers_data(request, character, mail_headers_qs) -> JsonRes
             mail_ajax_url = reverse(
                 "memberaudit:character_mail_data", args=[character.pk, mail.pk]
             )
-            if mail.body:
+            if mail.content_id:
                 actions_html = (
                     '<button type="button" class="btn btn-primary" '
                     'data-toggle="modal" data-target="#modalCharacterMail" '
@@ -1102,7 +1102,7 @@ def character_mail_data(
 ) -> JsonResponse:
     try:
         mail = (
-            character.mails.select_related("sender")
+            character.mails.select_related("sender", "content")
             .prefetch_related("recipients")
             .get(pk=mail_pk)
         )